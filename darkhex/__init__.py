@@ -1,3 +1,4 @@
+import os
 import typing
 import logging
 
@@ -23,22 +24,45 @@ class CustomFormatter(logging.Formatter):
         logging.CRITICAL: bold + red + format_temp + reset
     }
 
+    def __init__(self):
+        super().__init__(self.format_temp)
+        # one formatter per level, built once
+        self._formatters = {
+            level: logging.Formatter(fmt) for level, fmt in self.formats.items()
+        }
+        self._default_formatter = logging.Formatter(self.format_temp)
+
     def format(self, record):
-        log_fmt = self.formats.get(record.levelno, self.format_temp)
-        formatter = logging.Formatter(log_fmt)
+        formatter = self._formatters.get(record.levelno,
+                                         self._default_formatter)
         return formatter.format(record)
 
 
+def set_log_level(level: typing.Union[int, str]) -> None:
+    """
+    Sets the level of the darkhex logger. Messages below the level are
+    dropped before they are formatted. The initial level is read from the
+    DARKHEX_LOG_LEVEL environment variable, INFO if it is not set.
+
+    Args:
+        level (int or str): The level, i.e. logging.DEBUG or "DEBUG".
+    """
+    if isinstance(level, str):
+        name = level.strip().upper()
+        level = int(name) if name.isdigit() else logging.getLevelName(name)
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level: {name}")
+    logger.setLevel(level)
+
+
 # Logger configuration
 logger = logging.getLogger("darkhex")
-log_level = logging.DEBUG
-logger.setLevel(log_level)
 
 console_handler = logging.StreamHandler()
-console_handler.setLevel(log_level)
 console_handler.setFormatter(CustomFormatter())
 
 logger.addHandler(console_handler)
+set_log_level(os.environ.get("DARKHEX_LOG_LEVEL", "INFO"))
 ###
 
 
@@ -0,0 +1,369 @@
+"""
+Full-width CFR, CFR+, linear CFR and discounted CFR over a game tree that is
+enumerated once into flat arrays.
+
+Histories that reach the same state with the same information state strings
+for both players have the same future, so they are merged into one node and
+the tree becomes a DAG. The reach probabilities of the merged histories add
+up and their values are equal, so CFR on the DAG gives the same updates as on
+the tree. Terminal nodes are merged by level and winner. The game is walked
+on packed integer states (see game_state.DarkHexState), and a level is
+dropped once its edges are stored, so no pyspiel state is kept around. For
+dark_hex_ir, 3x3 becomes 2.8e5 nodes and 1.2e6 edges in a few seconds; dark_hex
+(perfect recall) info states keep the own action history, so nothing merges
+there. 4x3 dark_hex_ir has over 2e7 nodes in its first 14 levels, more than
+the flat arrays fit in memory; GameTree raises a ValueError past max_nodes
+instead.
+
+Nodes are stored level by level (the number of actions taken), and edges are
+grouped by the level of their parent. An iteration is a forward sweep for the
+reach probabilities and a backward sweep for the values, one vectorized step
+per level, followed by the batched regret updates of
+darkhex.algorithms.regret_matching; pyspiel is not called inside the loop.
+"""
+import typing
+import numpy as np
+import pyspiel
+from darkhex import logger as log
+from darkhex.algorithms import regret_matching
+from darkhex.algorithms.mccfr import MCCFRBase
+from darkhex.utils.bitboard import _flood, _render
+from darkhex.utils.game_state import DarkHexState, format_pyspiel_info_state
+
+DEFAULT_MAX_NODES = 5_000_000
+
+
+class GameTree:
+    """
+    Flat game tree (DAG) of a dark_hex or dark_hex_ir game.
+
+    Attributes:
+        node_player (np.ndarray): Acting player of every node, -1 if terminal.
+        node_info_state (np.ndarray): Info state id of every node, -1 if
+            terminal.
+        node_value (np.ndarray): Return of player 0 at the terminal nodes, 0
+            elsewhere.
+        level_offsets (np.ndarray): Nodes of level l are
+            [level_offsets[l], level_offsets[l + 1]).
+        edge_parent, edge_child (np.ndarray): Node indices of every edge.
+        edge_player (np.ndarray): Acting player of the parent of every edge.
+        edge_slot (np.ndarray): Arena index (info state offset + action index)
+            of the action of every edge.
+        edge_offsets (np.ndarray): Edges out of level l are
+            [edge_offsets[l], edge_offsets[l + 1]).
+        info_states (list): Info state strings, player 0's first.
+        legal_actions (list): Legal actions of every info state.
+        offsets, num_actions (np.ndarray): Arena layout of the info states.
+        player_slots (list): Arena range [start, end) of every player.
+    """
+
+    def __init__(self,
+                 game: pyspiel.Game,
+                 max_nodes: int = DEFAULT_MAX_NODES) -> None:
+        """
+        Enumerates the game.
+
+        Args:
+            game (pyspiel.Game): A dark_hex or dark_hex_ir game.
+            max_nodes (int): Largest number of nodes to enumerate; larger
+                games raise a ValueError instead of exhausting the memory.
+        """
+        root = DarkHexState.from_game(game)
+        g = root.geometry
+        perfect_recall = root.perfect_recall
+        abrupt = root.abrupt
+        n = g.num_cells
+        full = g.full_mask
+        # a node is packed as player | black | white | white stones seen by
+        # player 0 | black stones seen by player 1; perfect recall nodes also
+        # carry the action histories of both players
+        black_shift, white_shift = 1, 1 + n
+        seen_shifts = (1 + 2 * n, 1 + 3 * n)
+        edge_masks = ((g.north_mask, g.south_mask), (g.west_mask, g.east_mask))
+        terminal_keys = (-1, -2)  # player 0 won, player 1 won
+
+        info_state_ids = ({}, {})  # per player info state key -> id
+        info_states = ([], [])
+        legal_actions = ([], [])
+        legal_actions_of = {}  # unseen cells mask -> legal actions
+        node_player, node_info_state, node_value = [], [], []
+        edge_parent, edge_child, edge_player = [], [], []
+        edge_info_state, edge_action_idx = [], []
+        level_offsets, edge_offsets = [0], [0]
+
+        level = [0 if not perfect_recall else (0, (), ())]
+        while level:
+            level_start = level_offsets[-1]
+            next_start = level_start + len(level)
+            if next_start > max_nodes:
+                raise ValueError(
+                    f"{game} has more than {max_nodes} nodes, raise max_nodes "
+                    "if the memory allows it")
+            next_ids, next_level = {}, []
+            parents, children, players, ids, action_idxs = [], [], [], [], []
+            for node, key in enumerate(level, level_start):
+                if key in terminal_keys:
+                    node_player.append(-1)
+                    node_info_state.append(-1)
+                    node_value.append(1. if key == -1 else -1.)
+                    continue
+                if perfect_recall:
+                    key, histories = key[0], key[1:]
+                player = key & 1
+                black = (key >> black_shift) & full
+                white = (key >> white_shift) & full
+                seen = (key >> seen_shifts[player]) & full
+                if player == 0:
+                    view_black, view_white, own, other = black, seen, black, white
+                else:
+                    view_black, view_white, own, other = seen, white, white, black
+                info_key = (view_black << n | view_white)
+                if perfect_recall:
+                    num_moves = len(histories[0]) + len(histories[1])
+                    info_key = (info_key, num_moves, histories[player])
+                info_state_id = info_state_ids[player].get(info_key)
+                unseen = full & ~(own | seen)
+                actions = legal_actions_of.get(unseen)
+                if actions is None:
+                    actions = legal_actions_of[unseen] = [
+                        a for a in range(n) if (unseen >> a) & 1
+                    ]
+                if info_state_id is None:
+                    info_state_id = len(legal_actions[player])
+                    info_state_ids[player][info_key] = info_state_id
+                    legal_actions[player].append(actions)
+                    board = g.layered(_render([view_black, view_white], n))
+                    info_states[player].append(
+                        format_pyspiel_info_state(
+                            board, player, perfect_recall,
+                            num_moves if perfect_recall else 0,
+                            histories[player] if perfect_recall else ()))
+                node_player.append(player)
+                node_info_state.append(info_state_id)
+                node_value.append(0.)
+                start_mask, end_mask = edge_masks[player]
+                for action_idx, action in enumerate(actions):
+                    bit = 1 << action
+                    if other & bit:
+                        # collision, the cell is revealed to the player
+                        child = key | (bit << seen_shifts[player])
+                        if abrupt:
+                            child ^= 1
+                    else:
+                        own_after = own | bit
+                        group = _flood(g, bit, own_after)
+                        if group & start_mask and group & end_mask:
+                            child = terminal_keys[player]
+                        else:
+                            child = (key | (bit << (white_shift if player else
+                                                    black_shift))) ^ 1
+                    if perfect_recall and child >= 0:
+                        child_histories = list(histories)
+                        child_histories[player] += (action,)
+                        child = (child, *child_histories)
+                    child_id = next_ids.get(child)
+                    if child_id is None:
+                        child_id = next_ids[child] = len(next_level)
+                        next_level.append(child)
+                    parents.append(node)
+                    children.append(next_start + child_id)
+                    players.append(player)
+                    ids.append(info_state_id)
+                    action_idxs.append(action_idx)
+            # expanded levels are only kept as arrays
+            edge_parent.append(np.array(parents, dtype=np.int64))
+            edge_child.append(np.array(children, dtype=np.int64))
+            edge_player.append(np.array(players, dtype=np.int8))
+            edge_info_state.append(np.array(ids, dtype=np.int64))
+            edge_action_idx.append(np.array(action_idxs, dtype=np.int64))
+            level_offsets.append(next_start)
+            edge_offsets.append(edge_offsets[-1] + len(parents))
+            level = next_level
+
+        # arena layout, player 0's info states first
+        self.info_states = info_states[0] + info_states[1]
+        self.legal_actions = legal_actions[0] + legal_actions[1]
+        self.num_actions = np.array([len(a) for a in self.legal_actions],
+                                    dtype=np.int64)
+        self.offsets = np.zeros(len(self.num_actions), dtype=np.int64)
+        np.cumsum(self.num_actions[:-1], out=self.offsets[1:])
+        num_player0 = len(legal_actions[0])
+        size = int(self.num_actions.sum())
+        player0_size = int(self.num_actions[:num_player0].sum())
+        self.player_slots = [(0, player0_size), (player0_size, size)]
+
+        self.node_player = np.array(node_player, dtype=np.int8)
+        self.node_info_state = np.array(node_info_state, dtype=np.int64)
+        self.node_info_state[self.node_player == 1] += num_player0
+        self.node_value = np.array(node_value, dtype=np.float64)
+        self.level_offsets = np.array(level_offsets, dtype=np.int64)
+        self.edge_parent = np.concatenate(edge_parent)
+        self.edge_child = np.concatenate(edge_child)
+        self.edge_player = np.concatenate(edge_player)
+        self.edge_offsets = np.array(edge_offsets, dtype=np.int64)
+        edge_info_state = np.concatenate(edge_info_state) + np.where(
+            self.edge_player == 1, num_player0, 0)
+        self.edge_slot = self.offsets[edge_info_state] + np.concatenate(
+            edge_action_idx)
+        log.debug("Enumerated %d nodes, %d edges and %d info states",
+                  self.num_nodes, self.num_edges, len(self.info_states))
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_player)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_parent)
+
+    @property
+    def num_levels(self) -> int:
+        return len(self.level_offsets) - 1
+
+
+class CFRSolver(MCCFRBase):
+    """
+    Full-width CFR and its variants on a GameTree. The regrets and average
+    policy live in the MCCFRBase arenas, laid out as in the tree, so the
+    policy accessors and to_policy are shared with the MCCFR solvers.
+    """
+
+    def __init__(self,
+                 game: pyspiel.Game,
+                 variant: str = "cfr",
+                 alternating_updates: bool = True,
+                 alpha: float = 1.5,
+                 beta: float = 0.,
+                 gamma: float = 2.,
+                 tree: GameTree = None) -> None:
+        """
+        Args:
+            game (pyspiel.Game): The game to solve.
+            variant (str): One of regret_matching.VARIANTS; "cfr", "cfr+",
+                "linear" or "dcfr".
+            alternating_updates (bool): Update the players one after the
+                other, each against the other's latest policy, instead of
+                both at once.
+            alpha, beta, gamma (float): DCFR discount exponents.
+            tree (GameTree): The enumerated game, enumerated here if not
+                given.
+        """
+        if variant not in regret_matching.VARIANTS:
+            raise ValueError(f"Unknown variant {variant}, expected one of "
+                             f"{regret_matching.VARIANTS}")
+        super().__init__(game)
+        self._variant = variant
+        self._alternating_updates = alternating_updates
+        self._discounts = dict(alpha=alpha, beta=beta, gamma=gamma)
+        self._iterations = 0
+        self._tree = tree if tree is not None else GameTree(game)
+        tree = self._tree
+        for info_state, legal_actions, offset in zip(tree.info_states,
+                                                     tree.legal_actions,
+                                                     tree.offsets):
+            self._get_info_state(info_state, len(legal_actions),
+                                 legal_actions,
+                                 int(offset >= tree.player_slots[1][0]))
+        # edges of every player, for the regret updates
+        self._player_edges = []
+        for player in range(2):
+            edges = np.flatnonzero(tree.edge_player == player)
+            start, _ = tree.player_slots[player]
+            self._player_edges.append(
+                (tree.edge_parent[edges], tree.edge_child[edges],
+                 tree.edge_slot[edges], tree.edge_slot[edges] - start))
+
+    @property
+    def tree(self) -> GameTree:
+        return self._tree
+
+    @property
+    def iterations(self) -> int:
+        return self._iterations
+
+    def _iteration(self) -> None:
+        """
+        Performs one iteration of CFR.
+        """
+        self._iterations += 1
+        if self._alternating_updates:
+            for player in range(2):
+                self._update(self.current_policies(), (player,))
+        else:
+            self._update(self.current_policies(), (0, 1))
+
+    def _sweep(self,
+               strategy: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Reach probabilities and values of all the nodes under a policy.
+
+        Args:
+            strategy (np.ndarray): Policy arena of all the info states.
+        Returns:
+            typing.Tuple[np.ndarray, np.ndarray]: The reach probabilities of
+                both players (2 x num_nodes), summed over the merged
+                histories, and the values of the nodes for player 0.
+        """
+        tree = self._tree
+        probs = strategy[tree.edge_slot]
+        factors = [
+            np.where(tree.edge_player == player, probs, 1.)
+            for player in range(2)
+        ]
+        reach = np.zeros((2, tree.num_nodes))
+        reach[:, 0] = 1.
+        for level in range(tree.num_levels - 1):
+            edges = slice(tree.edge_offsets[level], tree.edge_offsets[level + 1])
+            start, end = tree.level_offsets[level + 1:level + 3]
+            parents = tree.edge_parent[edges]
+            children = tree.edge_child[edges] - start
+            for player in range(2):
+                reach[player, start:end] = np.bincount(
+                    children,
+                    weights=reach[player, parents] * factors[player][edges],
+                    minlength=end - start)
+
+        values = tree.node_value.copy()
+        for level in reversed(range(tree.num_levels - 1)):
+            edges = slice(tree.edge_offsets[level], tree.edge_offsets[level + 1])
+            start, end = tree.level_offsets[level:level + 2]
+            values[start:end] += np.bincount(
+                tree.edge_parent[edges] - start,
+                weights=probs[edges] * values[tree.edge_child[edges]],
+                minlength=end - start)
+        return reach, values
+
+    def _update(self, strategy: np.ndarray,
+                players: typing.Sequence[int]) -> None:
+        """
+        Accumulates the regrets and average policy of the players for the
+        given policy.
+        """
+        reach, values = self._sweep(strategy)
+        for player in players:
+            parents, children, slots, local_slots = self._player_edges[player]
+            start, end = self._tree.player_slots[player]
+            sign = 1. if player == 0 else -1.
+            instant_regrets = np.bincount(
+                local_slots,
+                weights=reach[1 - player, parents] * sign *
+                (values[children] - values[parents]),
+                minlength=end - start)
+            policy_weights = np.bincount(local_slots,
+                                         weights=reach[player, parents] *
+                                         strategy[slots],
+                                         minlength=end - start)
+            regret_matching.accumulate(self._regrets[start:end],
+                                       self._avg_policy[start:end],
+                                       instant_regrets, policy_weights,
+                                       self._iterations, self._variant,
+                                       **self._discounts)
+
+    def expected_value(self, strategy: np.ndarray = None) -> float:
+        """
+        The value of the game for player 0 under a policy arena, the average
+        policy if not given.
+        """
+        if strategy is None:
+            strategy = self.average_policies()
+        return float(self._sweep(strategy)[1][0])
@@ -0,0 +1,80 @@
+import pyspiel
+from darkhex.algorithms.mccfr import MCCFRBase
+from darkhex.utils.game_state import DarkHexState
+
+
+class ExternalSamplingMCCFR(MCCFRBase):
+    """
+    External sampling MCCFR with simple averaging: all the actions of the
+    update player are explored, the opponent's actions are sampled from its
+    current policy, and the average policy is accumulated at the opponent's
+    nodes.
+
+    The game is walked on a single DarkHexState with apply_action and
+    undo_action, so no state is allocated per node. Only the dark_hex and
+    dark_hex_ir games are supported.
+    """
+
+    def __init__(self, game: pyspiel.Game, seed: int = None) -> None:
+        """
+        Args:
+            game (pyspiel.Game): The game to solve, dark_hex or dark_hex_ir.
+            seed (int): Seed of the sampling, random if not given.
+        """
+        super().__init__(game, seed)
+        self._state = DarkHexState.from_game(game)
+
+    def _iteration(self) -> None:
+        """
+        Performs one iteration of the MCCFR algorithm.
+        """
+        for update_player in range(self._num_players):
+            self._update_regrets(self._state, update_player)
+
+    def _update_regrets(self, state: DarkHexState, update_player: int) -> float:
+        """
+        Traverses the game from the state, updating the regrets of the update
+        player. Every action applied to the state is undone before returning.
+
+        Args:
+            state (DarkHexState): The current state.
+            update_player (int): The player to update.
+        Returns:
+            float: The sampled value of the state for the update player.
+        """
+        if state.is_terminal():
+            return state.player_return(update_player)
+
+        cur_player = state.current_player()
+        info_state = state.information_state_string(cur_player)
+        legal_actions = state.legal_actions()
+        num_legal_actions = len(legal_actions)
+        info_state_slice = self._slice(
+            self._get_info_state(info_state, num_legal_actions, legal_actions,
+                                 cur_player))
+        policy = self._regret_matching(
+            self._regrets[info_state_slice].tolist(), num_legal_actions)
+
+        if cur_player != update_player:
+            # simple averaging, on the nodes of the sampled player
+            self._avg_policy[info_state_slice] = [
+                w + p for w, p in zip(
+                    self._avg_policy[info_state_slice].tolist(), policy)
+            ]
+            state.apply_action(legal_actions[self._sample_action_idx(policy)])
+            value = self._update_regrets(state, update_player)
+            state.undo_action()
+            return value
+
+        child_values = []
+        for action in legal_actions:
+            state.apply_action(action)
+            child_values.append(self._update_regrets(state, update_player))
+            state.undo_action()
+        value = sum([p * v for p, v in zip(policy, child_values)])
+        # the arenas may have grown in the recursion, so index them again
+        self._regrets[info_state_slice] = [
+            r + v - value for r, v in zip(
+                self._regrets[info_state_slice].tolist(), child_values)
+        ]
+        return value
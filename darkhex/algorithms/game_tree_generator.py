@@ -5,6 +5,8 @@ import pydot
 import pyspiel
 import darkhex.utils.util as util
 import darkhex.policy as darkhexPolicy
+from darkhex.utils.geometry import get_geometry
+from darkhex.utils.zobrist import TranspositionTable, get_zobrist_table
 
 
 class TreeGenerator:
@@ -26,6 +28,8 @@ class TreeGenerator:
         assert policy_0.board_size == policy_1.board_size, "Policies must be for the same board size"
         self.num_cols = policy_0.num_cols
         self.num_rows = policy_0.num_rows
+        self.geometry = get_geometry(self.num_rows, self.num_cols)
+        self.zobrist_table = get_zobrist_table(self.num_rows, self.num_cols)
 
         self.name_0 = name_0
         self.name_1 = name_1
@@ -107,6 +111,8 @@ class TreeGenerator:
         self.save_tree_data()
 
     def generate_tree(self):
+        # Info state pairs whose children are already in the tree
+        self.expanded = TranspositionTable()
         # Start the tree
         self.tree_name = f"{self.name_0}_{self.name_1}"
         self.tree = pydot.Dot(
@@ -135,10 +141,19 @@ class TreeGenerator:
         self.tree.write_svg(f"{path}/tree.svg")
         self.tree.write_pdf(f"{path}/tree.pdf")
 
-    def _add_children(self, game_state, parent=None):
+    def _add_children(self, game_state, parent=None, hashes=None, stones=0):
         """
         Generates the children of the parent node.
+
+        Args:
+            game_state (pyspiel.State): The state of the parent node.
+            parent (pydot.Node): The parent node, None for the root.
+            hashes (tuple): The Zobrist hashes of the info states of both
+                players, same as InfoState.zobrist. Empty boards if not given.
+            stones (int): The mask of the cells holding a stone.
         """
+        if hashes is None:
+            hashes = self.zobrist_table.player_keys
         info_state_0 = game_state.information_state_string(0)
         info_state_1 = game_state.information_state_string(1)
         info_state = game_state.information_state_string()
@@ -174,7 +189,7 @@ class TreeGenerator:
                 self.tree.add_node(terminal_node)
 
                 # Add the edge if it doesnt already exist
-                edge_label = f"{util.convert_position_to_alphanumeric(action, self.num_cols)}: {prob:.4f}"
+                edge_label = f"{self.geometry.labels[action]}: {prob:.4f}"
                 if not self.tree.get_edge(parent, terminal_node):
                     edge = pydot.Edge(
                         parent,
@@ -195,7 +210,7 @@ class TreeGenerator:
                 self.tree.add_node(node)
 
                 # Add the edge if it doesnt already exist
-                edge_label = f"{util.convert_position_to_alphanumeric(action, self.num_cols)}: {prob:.4f}"
+                edge_label = f"{self.geometry.labels[action]}: {prob:.4f}"
                 if not self.tree.get_edge(parent, node):
                     edge = pydot.Edge(parent,
                                       node,
@@ -203,8 +218,19 @@ class TreeGenerator:
                                       **self.attributes["edge"])
                     self.tree.add_edge(edge)
 
-                # Add the child's children
-                self._add_children(new_game_state, node)
+                # Add the child's children, unless reached before. The
+                # subtree only depends on the info states of both players,
+                # and only the mover's info state changed: it shows the new
+                # stone, or the opponent's stone the move ran into.
+                bit = 1 << action
+                stone = 1 - cur_player if stones & bit else cur_player
+                new_hashes = list(hashes)
+                new_hashes[cur_player] ^= \
+                    self.zobrist_table.cell_keys[stone][action]
+                key = tuple(new_hashes)
+                if key not in self.expanded:
+                    self.expanded[key] = True
+                    self._add_children(new_game_state, node, key, stones | bit)
 
     def tree_info_string(self, info_state_0, info_state_1):
         """ Converts the info_state to a string. """
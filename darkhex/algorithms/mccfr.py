@@ -1,77 +1,255 @@
+import time
 import typing
 import numpy as np
 import pyspiel
-
-REGRET_IDX = 0
-AVG_POLICY_IDX = 1
+import darkhex.policy as DarkhexPolicy
+from darkhex import logger as log
+from darkhex.algorithms import regret_matching
+from darkhex.utils.game_state import darkhex_info_state
 
 
 class MCCFRBase:
+    """
+    Shared tables of the MCCFR solvers. Regrets and average policy weights of
+    all the info states live in two flat float64 arenas; an info state gets a
+    compact id on first visit, and its legal actions occupy
+    arena[offset:offset + num_legal_actions].
+    """
+    # iterations a ParallelMCCFR worker runs between merges by default
+    sync_interval = 1
 
-    def __init__(self, game: pyspiel.Game) -> None:
+    def __init__(self, game: pyspiel.Game, seed: int = None) -> None:
+        """
+        Args:
+            game (pyspiel.Game): The game to solve.
+            seed (int): Seed of the sampling, random if not given.
+        """
         self._game = game
-        self._info_states = {}
         self._num_players = game.num_players()
-        self._initial_fraction = 1e6  # starting value for the regrets
+        self._rng = np.random.default_rng(seed)
+        self._uniforms = []  # uniform draws, taken in batches
+        self._next_uniform = 0
+        self._info_state_ids = {}  # info state -> id
+        self._info_state_keys = []  # id -> info state
+        self._offsets = []  # id -> offset in the arenas
+        self._num_actions = []  # id -> number of legal actions
+        self._legal_actions = []  # id -> legal actions
+        self._players = []  # id -> acting player
+        self._size = 0  # used length of the arenas
+        self._regrets = np.zeros(1024)
+        self._avg_policy = np.zeros(1024)
+        self._uniform_policies = {}  # number of actions -> uniform policy
+
+    def run(self, num_iterations: int) -> float:
+        """
+        Runs the MCCFR algorithm for the given number of iterations.
+        Args:
+            num_iterations (int): The number of iterations to run.
+        Returns:
+            float: The iterations per second.
+        """
+        start = time.perf_counter()
+        for _ in range(num_iterations):
+            self._iteration()
+        elapsed = time.perf_counter() - start
+        rate = num_iterations / elapsed if elapsed > 0 else float("inf")
+        log.info("Ran %d iterations in %.2fs (%.1f iterations/sec), %d info "
+                 "states", num_iterations, elapsed, rate, self.num_info_states)
+        return rate
+
+    def _iteration(self) -> None:
+        """
+        Performs one iteration of the MCCFR algorithm.
+        """
+        raise NotImplementedError
+
+    @property
+    def num_info_states(self) -> int:
+        return len(self._offsets)
 
-    def _get_info_state(self, info_state: str,
-                        num_legal_actions: int) -> typing.List[np.array]:
+    def _get_info_state(self,
+                        info_state: str,
+                        num_legal_actions: int,
+                        legal_actions: typing.Sequence[int] = None,
+                        player: int = 0) -> int:
         """
-        Returns the info state dictionary for the given info state.
-        If the info state is not in the dictionary, it is initialized with initial_fraction.
+        Returns the id of the given info state. If the info state is new, it
+        gets zero regrets and average policy weights for its legal actions.
 
         Args:
             info_state (str): The info state.
             num_legal_actions (int): The number of legal actions for the info state.
+            legal_actions (typing.Sequence[int]): The legal actions, kept for
+                to_policy. Action indices if not given.
+            player (int): The acting player, kept for to_policy.
         Returns:
-            list: The info state list.
+            int: The info state id.
         """
-        if info_state not in self._info_states:
-            self._info_states[info_state] = [
-                np.zeros(num_legal_actions) / self._initial_fraction,
-                np.zeros(num_legal_actions) / self._initial_fraction,
-            ]
-        return self._info_states[info_state]
+        info_state_id = self._info_state_ids.get(info_state)
+        if info_state_id is None:
+            info_state_id = len(self._offsets)
+            self._info_state_ids[info_state] = info_state_id
+            self._info_state_keys.append(info_state)
+            self._offsets.append(self._size)
+            self._num_actions.append(num_legal_actions)
+            self._legal_actions.append(
+                list(legal_actions) if legal_actions is not None else list(
+                    range(num_legal_actions)))
+            self._players.append(player)
+            self._size += num_legal_actions
+            if self._size > len(self._regrets):
+                capacity = max(2 * len(self._regrets), self._size)
+                self._regrets = self._grow(self._regrets, capacity)
+                self._avg_policy = self._grow(self._avg_policy, capacity)
+        return info_state_id
 
-    def _update_avg_policy(self, info_state: str, action_idx: int,
-                           value_to_add: float) -> None:
+    def _truncate(self, num_info_states: int) -> None:
         """
-        Updates the average policy for the given info state and action.
+        Drops the info states with ids from num_info_states on, clearing
+        their part of the arenas.
+
         Args:
-            info_state (str): The info state.
-            action_idx (int): The action index.
-            value_to_add (float): The value to add to the average policy.
+            num_info_states (int): The number of info states to keep.
+        """
+        for info_state in self._info_state_keys[num_info_states:]:
+            del self._info_state_ids[info_state]
+        if num_info_states < len(self._offsets):
+            self._size = self._offsets[num_info_states]
+        del self._info_state_keys[num_info_states:]
+        del self._offsets[num_info_states:]
+        del self._num_actions[num_info_states:]
+        del self._legal_actions[num_info_states:]
+        del self._players[num_info_states:]
+        self._regrets[self._size:] = 0.
+        self._avg_policy[self._size:] = 0.
+
+    @staticmethod
+    def _grow(arena: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.zeros(capacity)
+        grown[:len(arena)] = arena
+        return grown
+
+    def _slice(self, info_state_id: int) -> slice:
+        """ The arena slice of an info state. """
+        offset = self._offsets[info_state_id]
+        return slice(offset, offset + self._num_actions[info_state_id])
+
+    def _regret_matching(self, regrets: typing.Sequence[float],
+                         num_legal_actions: int) -> typing.Sequence[float]:
+        """
+        Performs regret matching on the given regrets. Regret matching only
+        considers positive regrets; the regrets themselves are not changed.
+        The vectors have a handful of entries, where plain Python loops are
+        cheaper than NumPy calls.
+        Args:
+            regrets (typing.Sequence[float]): The regrets.
+            num_legal_actions (int): The number of legal actions for the info state.
+        Returns:
+            typing.Sequence[float]: The current policy. Must not be modified.
+        """
+        positive = [r if r > 0. else 0. for r in regrets]
+        regret_sum = sum(positive)
+        if regret_sum > 0:
+            return [r / regret_sum for r in positive]
+        uniform = self._uniform_policies.get(num_legal_actions)
+        if uniform is None:
+            uniform = (1. / num_legal_actions,) * num_legal_actions
+            self._uniform_policies[num_legal_actions] = uniform
+        return uniform
+
+    def _uniform(self) -> float:
+        """ A uniform draw in [0, 1). """
+        if self._next_uniform == len(self._uniforms):
+            self._uniforms = self._rng.random(4096).tolist()
+            self._next_uniform = 0
+        self._next_uniform += 1
+        return self._uniforms[self._next_uniform - 1]
+
+    def _sample_action_idx(self, probs: typing.Sequence[float]) -> int:
+        """ Samples an action index from the probabilities. """
+        threshold = self._uniform() * sum(probs)
+        cumulative = 0.
+        for idx, prob in enumerate(probs):
+            cumulative += prob
+            if cumulative > threshold:
+                return idx
+        return len(probs) - 1
+
+    def _layout(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """ Offsets and numbers of legal actions of the info states. """
+        return (np.asarray(self._offsets, dtype=np.int64),
+                np.asarray(self._num_actions, dtype=np.int64))
+
+    def current_policies(self) -> np.ndarray:
+        """
+        The current (regret matching) policy of all the info states at once.
+
+        Returns:
+            np.ndarray: Arena of the policies, info state i at
+                [offset:offset + num_legal_actions] of its slice.
+        """
+        return regret_matching.current_strategy(self._regrets[:self._size],
+                                                *self._layout())
+
+    def average_policies(self) -> np.ndarray:
+        """
+        The average policy of all the info states at once, see
+        current_policies.
         """
-        info_state_list = self._get_info_state(info_state, self._num_players)
-        info_state_list[AVG_POLICY_IDX][action_idx] += value_to_add
+        return regret_matching.average_strategy(self._avg_policy[:self._size],
+                                                *self._layout())
 
-    def _update_regret(self, info_state: str, action_idx: int,
-                       value_to_add: float) -> None:
+    def average_policy(self, info_state: str) -> typing.Optional[np.array]:
         """
-        Updates the regret for the given info state and action.
+        The average policy over the legal actions of an info state, None if
+        the info state was never visited.
+
         Args:
             info_state (str): The info state.
-            action_idx (int): The action index.
-            value_to_add (float): The value to add to the regret.
+        Returns:
+            np.array: The action probabilities, in legal action order.
         """
-        info_state_list = self._get_info_state(info_state, self._num_players)
-        info_state_list[REGRET_IDX][action_idx] += value_to_add
+        info_state_id = self._info_state_ids.get(info_state)
+        if info_state_id is None:
+            return None
+        weights = self._avg_policy[self._slice(info_state_id)]
+        total = weights.sum()
+        if total > 0:
+            return weights / total
+        return np.full(len(weights), 1. / len(weights))
 
-    def _regret_matching(self, regrets: np.array,
-                         num_legal_actions: int) -> np.array:
+    def to_policy(self, player: int = None) -> DarkhexPolicy.TabularPolicy:
         """
-        Performs regret matching on the given regrets. Regret matching only considers
-        positive regrets and updates the negative regrets to 0.
+        The average policy of the visited info states as a darkhex policy.
+
         Args:
-            regrets (np.array): The regrets.
-            num_legal_actions (int): The number of legal actions for the info state.
+            player (int): If given, a single player policy with only the info
+                states of this player.
         Returns:
-            np.array: The regrets after regret matching.
+            TabularPolicy: The average policy, keyed by darkhex info state
+                strings. SinglePlayerTabularPolicy if a player is given.
         """
-        regrets[regrets < 0] = 0.
-        regret_sum = regrets.sum()
-        if regret_sum > 0:
-            regrets /= regret_sum
-        else:
-            regrets[:] = 1. / num_legal_actions
-        return regrets
+        probs = self.average_policies().tolist()
+        is_perfect_recall = self._game.get_type().short_name == "dark_hex"
+        table = {}
+        for info_state, info_state_id in self._info_state_ids.items():
+            info_state_player = self._players[info_state_id]
+            if player is not None and info_state_player != player:
+                continue
+            offset = self._offsets[info_state_id]
+            table[darkhex_info_state(info_state, info_state_player,
+                                     is_perfect_recall)] = dict(
+                zip(self._legal_actions[info_state_id],
+                    probs[offset:offset + self._num_actions[info_state_id]]))
+        parameters = self._game.get_parameters()
+        board_size = (parameters["num_rows"], parameters["num_cols"])
+        initial_player = player if player is not None else 0
+        initial_state = darkhex_info_state(
+            self._game.new_initial_state().information_state_string(
+                initial_player), initial_player, is_perfect_recall)
+        if player is None:
+            return DarkhexPolicy.TabularPolicy(table, board_size, initial_state,
+                                               is_perfect_recall)
+        return DarkhexPolicy.SinglePlayerTabularPolicy(table, board_size,
+                                                       initial_state, player,
+                                                       is_perfect_recall)
@@ -0,0 +1,133 @@
+"""
+Regret matching over whole flat arenas.
+
+The regrets (or average policy weights) of all the info states are stored
+back to back in one float64 array; info state i occupies
+arena[offsets[i]:offsets[i] + num_actions[i]]. The kernels here compute the
+policies of all the info states at once using segment sums
+(np.add.reduceat), so a policy snapshot or a full-width CFR update is a few
+NumPy passes instead of a Python loop over the info states.
+
+Variants of the regret and average policy accumulation:
+    - "cfr": Vanilla CFR, plain sums.
+    - "cfr+": CFR+, regrets floored at zero after every update and the
+      average policy weighted by the iteration.
+    - "linear": Linear CFR, regrets and average policy weighted by the
+      iteration.
+    - "dcfr": Discounted CFR, accumulated positive regrets discounted by
+      t^alpha / (t^alpha + 1), negative ones by t^beta / (t^beta + 1) and the
+      average policy contribution of iteration t weighted by t^gamma.
+"""
+import numpy as np
+
+VARIANTS = ("cfr", "cfr+", "linear", "dcfr")
+
+
+def segment_sums(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Sums of the segments of a flat arena.
+
+    Args:
+        values (np.ndarray): The arena, trimmed to its used length.
+        offsets (np.ndarray): Start of every segment, ascending. Segments
+            may not be empty.
+    Returns:
+        np.ndarray: The sum of every segment.
+    """
+    if len(offsets) == 0:
+        return np.zeros(0)
+    return np.add.reduceat(values, offsets)
+
+
+def current_strategy(regrets: np.ndarray,
+                     offsets: np.ndarray,
+                     num_actions: np.ndarray,
+                     out: np.ndarray = None) -> np.ndarray:
+    """
+    Regret matching for all the info states: positive regrets normalized per
+    info state, uniform where no regret is positive.
+
+    Args:
+        regrets (np.ndarray): The regret arena, trimmed to its used length.
+        offsets (np.ndarray): Offset of every info state.
+        num_actions (np.ndarray): Number of legal actions of every info state.
+        out (np.ndarray): Optional output array, same length as regrets.
+    Returns:
+        np.ndarray: The current policy arena.
+    """
+    positive = np.maximum(regrets, 0., out=out)
+    return _normalize(positive, offsets, num_actions)
+
+
+def average_strategy(avg_policy: np.ndarray, offsets: np.ndarray,
+                     num_actions: np.ndarray) -> np.ndarray:
+    """
+    The average policy of all the info states, uniform where an info state
+    has no weight yet.
+
+    Args:
+        avg_policy (np.ndarray): The average policy weight arena, trimmed to
+            its used length.
+        offsets (np.ndarray): Offset of every info state.
+        num_actions (np.ndarray): Number of legal actions of every info state.
+    Returns:
+        np.ndarray: The average policy arena.
+    """
+    return _normalize(avg_policy.copy(), offsets, num_actions)
+
+
+def _normalize(weights: np.ndarray, offsets: np.ndarray,
+               num_actions: np.ndarray) -> np.ndarray:
+    """ Normalizes non-negative weights per segment in place. """
+    totals = np.repeat(segment_sums(weights, offsets), num_actions)
+    uniform = np.repeat(1. / num_actions, num_actions)
+    positive = totals > 0
+    np.divide(weights, totals, out=weights, where=positive)
+    np.copyto(weights, uniform, where=~positive)
+    return weights
+
+
+def accumulate(regrets: np.ndarray,
+               avg_policy: np.ndarray,
+               instant_regrets: np.ndarray,
+               policy_weights: np.ndarray,
+               iteration: int,
+               variant: str = "cfr",
+               alpha: float = 1.5,
+               beta: float = 0.,
+               gamma: float = 2.) -> None:
+    """
+    Adds an iteration's regrets and average policy contributions to the
+    arenas in place, weighted by the variant.
+
+    Args:
+        regrets (np.ndarray): The regret arena.
+        avg_policy (np.ndarray): The average policy weight arena.
+        instant_regrets (np.ndarray): Counterfactual regrets of the iteration.
+        policy_weights (np.ndarray): Current policy weighted by the player's
+            reach probability, i.e. the average policy contribution.
+        iteration (int): The iteration, starting from 1.
+        variant (str): One of VARIANTS.
+        alpha (float): DCFR discount exponent of positive regrets.
+        beta (float): DCFR discount exponent of negative regrets.
+        gamma (float): DCFR discount exponent of the average policy.
+    """
+    if variant == "cfr":
+        regrets += instant_regrets
+        avg_policy += policy_weights
+    elif variant == "cfr+":
+        regrets += instant_regrets
+        np.maximum(regrets, 0., out=regrets)
+        avg_policy += iteration * policy_weights
+    elif variant == "linear":
+        regrets += iteration * instant_regrets
+        avg_policy += iteration * policy_weights
+    elif variant == "dcfr":
+        regrets += instant_regrets
+        positive_discount = iteration**alpha / (iteration**alpha + 1)
+        negative_discount = iteration**beta / (iteration**beta + 1)
+        regrets *= np.where(regrets > 0, positive_discount, negative_discount)
+        avg_policy += iteration**gamma * policy_weights
+    else:
+        raise ValueError(f"Unknown variant {variant}, expected one of "
+                         f"{VARIANTS}")
@@ -7,6 +7,9 @@ import numpy as np
 import pyspiel
 import darkhex.policy as DarkhexPolicy
 import darkhex.utils.util as util
+from darkhex.utils.geometry import get_geometry
+from darkhex.utils.info_state import InfoStateCodec
+from darkhex.utils.policy_store import SqlitePolicyStore
 from darkhex import *
 
 
@@ -51,6 +54,7 @@ class SimPly:  # Simplified Policy
         action_cap: int,
         eta: float,
         frac_limit: int,
+        store: SqlitePolicyStore = None,
     ):
         """
         Initialize the policy simplification algorithm.
@@ -62,6 +66,8 @@ class SimPly:  # Simplified Policy
             action_cap (int): The maximum number of actions.
             eta (float): The maximum distance between a fraction and an action.
             frac_limit (int): The maximum number of fractions.
+            store (SqlitePolicyStore): If given, the simplified policy is
+                written to the store while it is generated.
         """
         self.policy = policy
         self.player = player
@@ -80,13 +86,29 @@ class SimPly:  # Simplified Policy
             f"action_cap:{self._action_cap},eta:{self._eta},frac_limit:{self._frac_limit}]"
         )
 
+        self.geometry = get_geometry(self.policy.num_rows,
+                                     self.policy.num_cols)
         self.all_states = get_all_states(self.policy.board_size)
+        # new policy is keyed by the compact info state keys
+        self._codec = InfoStateCodec(self.geometry.num_rows,
+                                     self.geometry.num_cols)
         self.new_policy = {}
+        self.store = store
+        if self.store is not None:
+            self.store.set_metadata(board_size=self.policy.board_size,
+                                    initial_state=self.policy.initial_state,
+                                    player=self.player,
+                                    is_perfect_recall=False,
+                                    is_canonical=False)
 
         logger.info(f"Generating the {algo_name} policy...")
-        self._iterate_info_state(self.policy.initial_state)
+        self._iterate_info_state(
+            self.policy.initial_state,
+            self._codec.encode(self.policy.initial_state))
+        if self.store is not None:
+            self.store.flush()
 
-    def _iterate_info_state(self, info_state: str) -> None:
+    def _iterate_info_state(self, info_state: str, key: int) -> None:
         """
         Iterate the information state and update the info_set as to have the new
         policy. This is done by setting all the possible states for the
@@ -97,30 +119,57 @@ class SimPly:  # Simplified Policy
 
         Args:
             info_state (str): The info_state to iterate.
+            key (int): The codec key of the info_state. The keys of the next
+                info states are derived from it, so no string is encoded twice.
         """
-        new_info_states = self._get_new_info_states(info_state)
+        new_info_states = self._get_new_info_states(info_state, key)
         if not new_info_states:
             return
-        actions = self.new_policy[info_state].keys()
+        actions = self.new_policy[key].keys()
         collusion_possible = util.is_collusion_possible(info_state, self.player)
         for action in actions:
             new_info_state = new_info_states[f"{action}{self.player}"]
+            new_key = self._key_after_action(key, action, self.player)
             if not util.is_board_terminal(new_info_state, self.player) and \
-               new_info_state not in self.new_policy:
-                self._iterate_info_state(new_info_state)
+               new_key not in self.new_policy:
+                self._iterate_info_state(new_info_state, new_key)
             if collusion_possible:
                 new_info_state = new_info_states[
                     f"{action}{self.policy.opponent}"]
+                new_key = self._key_after_action(key, action,
+                                                 self.policy.opponent)
                 if not util.is_board_terminal(new_info_state, self.player) and \
-                   new_info_state not in self.new_policy:
-                    self._iterate_info_state(new_info_state)
+                   new_key not in self.new_policy:
+                    self._iterate_info_state(new_info_state, new_key)
 
-    def _get_new_info_states(self, info_state: str) -> typing.Dict[str, str]:
+    def _key_after_action(self, key: int, action: int, player: int) -> int:
+        """
+        The codec key of an info state after a stone of the player shows up
+        at the action.
+
+        Args:
+            key (int): The codec key of the info state.
+            action (int): The cell of the stone.
+            player (int): The player of the stone.
+
+        Returns:
+            int: The codec key of the new info state.
+        """
+        info_state_player, black, white, _ = self._codec.decode_parts(key)
+        if player == 0:
+            black |= 1 << action
+        else:
+            white |= 1 << action
+        return self._codec.encode_parts(info_state_player, black, white)
+
+    def _get_new_info_states(self, info_state: str,
+                             key: int) -> typing.Dict[str, str]:
         """
         Get new information states after the given info_state.
 
         Args:
             info_state (str): The current info_state.
+            key (int): The codec key of the info_state.
         
         Returns:
             typing.Dict[str, str]: The new information states.
@@ -129,19 +178,21 @@ class SimPly:  # Simplified Policy
         if action_probs is None:
             return {}
         action_probs = self._fractionize(action_probs)
-        self.new_policy[info_state] = action_probs
+        self.new_policy[key] = action_probs
+        if self.store is not None:
+            self.store.put(info_state, action_probs)
         new_info_states = {}
-        for a in self.new_policy[info_state].keys():
+        for a in action_probs.keys():
             info_state_board = util.get_board_from_info_state(info_state)
             new_board_collision = util.board_after_action(
-                info_state_board, a, 1 - self.player, self.policy.num_rows,
-                self.policy.num_cols)
+                info_state_board, a, 1 - self.player, self.geometry.num_rows,
+                self.geometry.num_cols)
             new_info_state_collision = util.get_info_state_from_board(
                 new_board_collision, self.player)
             new_board = util.board_after_action(new_info_state_collision, a,
                                                 self.player,
-                                                self.policy.num_rows,
-                                                self.policy.num_cols)
+                                                self.geometry.num_rows,
+                                                self.geometry.num_cols)
             new_info_state = util.get_info_state_from_board(
                 new_board, self.player)
             if new_info_state_collision:
@@ -234,15 +285,19 @@ class SimPly:  # Simplified Policy
         return None if info_state not in self.all_states else self.all_states[
             info_state]
 
-    def save_policy(self, policy_name: str) -> None:
+    def save_policy(self, policy_name: str, quantize: bool = False) -> None:
         """
         Creates a new darkhex policy and saves it to the policy directory with
         the given policy name.
 
         Args:
             policy_name (str): The name of the policy to save.
+            quantize (bool): Whether to save the policy quantized. The
+                fractions of SimPly+ are kept exactly.
         """
         policy = DarkhexPolicy.SinglePlayerTabularPolicy(
-            self.new_policy, self.policy.board_size, self.policy.initial_state,
-            self.player)
+            self._codec.decode_policy(self.new_policy), self.policy.board_size,
+            self.policy.initial_state, self.player)
+        if quantize:
+            policy.quantize(self._frac_limit if self.fraction_values else 0)
         policy.save_policy_to_file(policy_name)
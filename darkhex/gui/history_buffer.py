@@ -61,7 +61,8 @@ class gameBuffer:
         self._update_game(idx)
 
     def _update_game(self, idx):
-        self.stratgen_class.info_states = copy.deepcopy(self.info_states[idx])
+        self.stratgen_class.set_info_states(
+            copy.deepcopy(self.info_states[idx]))
         self.stratgen_class.current_info_state = copy.deepcopy(
             self.current_info_state[idx])
         self.stratgen_class.target_stack_state = copy.deepcopy(
@@ -6,8 +6,11 @@ from copy import deepcopy
 from darkhex import cellState
 import darkhex.utils.util as util
 from darkhex import logger as log
-from darkhex.utils.isomorphic import isomorphic_single
+from darkhex.utils.geometry import get_geometry
+from darkhex.utils.info_state import InfoState
+from darkhex.utils.isomorphic import rotate_info_state, rotate_action_probs
 from darkhex.policy import SinglePlayerTabularPolicy
+from darkhex.utils.policy_store import SqlitePolicyStore
 from darkhex.gui.history_buffer import gameBuffer
 
 
@@ -27,9 +30,11 @@ class StrategyGenerator:
         player: int,
         include_isomorphic: bool = True,
         is_perfect_recall: bool = False,
+        store: SqlitePolicyStore = None,
     ):
         self.num_cols = num_cols
         self.num_rows = num_rows
+        self.geometry = get_geometry(num_rows, num_cols)
         self.p = player
         self.o = 1 - self.p
         self.include_isomorphic = include_isomorphic
@@ -44,6 +49,16 @@ class StrategyGenerator:
         self.random_act = False  # if true, take actions until the terminal state.
         self.target_stack_state = None
 
+        # if given, the strategy is written to the store as it is entered
+        self.store = store
+        self._dirty_info_states = set()  # changed since the last sync
+        if self.store is not None:
+            self.store.set_metadata(board_size=(num_rows, num_cols),
+                                    initial_state=initial_state,
+                                    player=player,
+                                    is_perfect_recall=is_perfect_recall,
+                                    is_canonical=False)
+
         # set history buffer
         self.history_buffer = gameBuffer(self.initial_state, num_rows, num_cols,
                                          player, include_isomorphic, self)
@@ -67,36 +82,28 @@ class StrategyGenerator:
         # update the strategy
         self.info_states[self.current_info_state] = self._action_probs(
             actions, probs)
+        self._mark_dirty([self.current_info_state])
 
         if self.include_isomorphic:
-            raise NotImplementedError("isomorphic not implemented")
-            iso_state, iso_actions_probs = isomorphic_single(
-                self.current_info_state, actions, probs
-            )  # ! WRONG: Just using the board, should convert to info state
+            # the rotated state gets the rotated strategy, so it is not
+            # asked again
+            iso_state = rotate_info_state(self.current_info_state,
+                                          self.num_rows, self.num_cols)
             if iso_state not in self.info_states:
-                self.info_states[iso_state] = iso_actions_probs
-            else:
-                ls = []
-                d = {}
-                for action, prob in iso_actions_probs:
-                    if action not in d:
-                        ls.append((action, prob / 2))
-                        d[action] = len(ls) - 1
-                    else:
-                        ls[d[action]] = (action, ls[d[action]][1] + prob / 2)
-                for action, prob in self.info_states[iso_state]:
-                    if action not in d:
-                        ls.append((action, prob / 2))
-                        d[action] = len(ls) - 1
-                    else:
-                        ls[d[action]] = (action, ls[d[action]][1] + prob / 2)
-                self.info_states[iso_state] = ls
+                self.info_states[iso_state] = rotate_action_probs(
+                    self.info_states[self.current_info_state],
+                    self.geometry.num_cells)
+                self._mark_dirty([iso_state])
+            while self.action_stack and \
+                    self.action_stack[-1] in self.info_states:
+                self.action_stack.pop()
+        self._sync_store()
 
         if len(self.action_stack) == 0:
             self.history_buffer.add_history_buffer(self)
             log.info(f"Game has ended. No more actions to take.")
             return True
-        log.debug(self.action_stack)
+        log.debug("Action stack: %s", self.action_stack)
         self.current_info_state = self.action_stack.pop()
         self.history_buffer.add_history_buffer(self)
         if self.random_act:
@@ -111,7 +118,7 @@ class StrategyGenerator:
             else:
                 self.iterate_board("r")
         log.info("Move performed succeded.")
-        log.debug(f"Current info state: {self.current_info_state}")
+        log.debug("Current info state: %s", self.current_info_state)
         return False
 
     def is_valid_actions(
@@ -129,32 +136,29 @@ class StrategyGenerator:
         actions, probs = [], []
         if len(given_input) < 1:
             error_log("No input given.")
+        # parse the current info state once for all the checks below
+        info_state = InfoState.from_string(self.current_info_state,
+                                           self.num_rows, self.num_cols,
+                                           self.perfect_recall)
         action_probs = given_input.strip().split(" ")
         if action_probs[0] == "r":  # random action
             if self.target_stack_state is None:
                 self.random_act = True
-            action = util.get_random_action_for_info_state(
-                self.current_info_state)
+            action = util.get_random_action_for_info_state(info_state)
             if action == -1:
                 error_log(f"No valid action found. {self.current_info_state}")
             actions, probs = [action], [1.0]
         elif len(action_probs) == 1:
-            a = util.convert_alphanumeric_to_position(action_probs[0],
-                                                      self.num_cols)
+            a = self._position(action_probs[0])
             if isinstance(a, int):
-                if util.is_valid_action_from_info_state(self.current_info_state,
-                                                        a):
+                if util.is_valid_action_from_info_state(info_state, a):
                     actions, probs = [a], [1]
         elif action_probs[0] == "=":  # equiprobable actions
-            actions = [
-                util.convert_alphanumeric_to_position(x, self.num_cols)
-                for x in action_probs[1:]
-            ]
+            actions = [self._position(x) for x in action_probs[1:]]
             probs = [1 / len(actions)] * len(actions)
         else:
             for i in range(0, len(action_probs), 2):
-                a = util.convert_alphanumeric_to_position(
-                    action_probs[i], self.num_cols)
+                a = self._position(action_probs[i])
                 if a:
                     actions.append(a)
                     probs.append(float(action_probs[i + 1]))
@@ -166,22 +170,39 @@ class StrategyGenerator:
         probs = list(map(float, probs))
         addition = 0
         p_list = [self.p, self.o] if util.is_collusion_possible_info_state(
-            self.current_info_state) else [self.p]
+            info_state) else [self.p]
         for action in actions:
             for player in p_list:
                 new_state = util.info_state_after_action(
-                    self.current_info_state, action, player, self.perfect_recall)
+                    info_state, action, player, self.perfect_recall)
+                if new_state is False:
+                    error_log(f"Invalid action: {action}")
                 if util.is_info_state_terminal(new_state, self.perfect_recall):
-                    log.info(f"Terminal state reached with action {action}.")
-                elif new_state not in self.info_states:
-                    self.action_stack.append(new_state)
+                    log.info("Terminal state reached with action %s.", action)
+                elif str(new_state) not in self.info_states:
+                    self.action_stack.append(str(new_state))
                     addition += 1
         # check if sum of probs is 1
         if abs(sum(probs) - 1) > 0.0000001:  # python float comparison
             error_log(f"Values don't add up to one: {probs}->{sum(probs)}")
-        log.info(f"Input processed successfully. {actions} {probs}")
+        log.info("Input processed successfully. %s %s", actions, probs)
         return actions, probs, addition
 
+    def _position(self, alpha_numeric: str) -> int:
+        """Returns the cell for an alpha-numeric or integer input.
+
+        Args:
+            alpha_numeric (str): The action. i.e. "a4" or "9"
+
+        Returns:
+            int: The cell.
+        """
+        position = self.geometry.positions.get(alpha_numeric.lower().strip())
+        if position is None:
+            return util.convert_alphanumeric_to_position(
+                alpha_numeric, self.num_cols)
+        return position
+
     def _action_probs(self,
                       actions: typing.List[int],
                       probs: typing.List[float] = None
@@ -201,6 +222,36 @@ class StrategyGenerator:
             assert len(actions) == len(probs)
         return list(zip(actions, probs))
 
+    def _mark_dirty(self, info_states: typing.Iterable[str]) -> None:
+        """Marks info states to be written to the store on the next sync."""
+        if self.store is not None:
+            self._dirty_info_states.update(info_states)
+
+    def set_info_states(self, info_states: typing.Dict[str, typing.Any]) -> None:
+        """Replaces the strategy, i.e. when going back in the history. Only
+        the info states that differ are marked for the store."""
+        if self.store is not None:
+            old = self.info_states
+            self._mark_dirty([
+                info_state for info_state in old.keys() | info_states.keys()
+                if old.get(info_state) != info_states.get(info_state)
+            ])
+        self.info_states = info_states
+
+    def _sync_store(self) -> None:
+        """Writes the info states changed since the last sync to the store,
+        removing the ones no longer in the strategy."""
+        if self.store is None:
+            return
+        for info_state in self._dirty_info_states:
+            action_probs = self.info_states.get(info_state)
+            if action_probs is None:
+                self.store.delete(info_state)
+            else:
+                self.store.put(info_state, action_probs)
+        self._dirty_info_states = set()
+        self.store.flush()
+
     def save_darkhex_policy(self, path) -> SinglePlayerTabularPolicy:
         """Converts the stored policy to a darkhex policy.
         
@@ -214,16 +265,18 @@ class StrategyGenerator:
                                            self.initial_state, self.p,
                                            self.perfect_recall)
         policy.save_policy_to_file(path)
+        self._sync_store()
         return policy
 
     def load_game(self, history: gameBuffer):
         """Load a game from a history buffer."""
         self.num_cols = history.game_info["num_cols"]
         self.num_rows = history.game_info["num_rows"]
+        self.geometry = get_geometry(self.num_rows, self.num_cols)
         self.p = history.game_info["player"]
         self.o = 1 - self.p
         self.history_buffer = history
         self.history_buffer.stratgen_class = self
-        self.info_states = history.info_states[-1]
+        self.set_info_states(history.info_states[-1])
         self.target_stack_state = history.target_stack_state[-1]
         self.current_info_state = history.current_info_state[-1]
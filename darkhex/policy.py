@@ -1,9 +1,32 @@
 import typing
+import logging
+import collections
+import copy
 import darkhex.utils.util as util
 import pyspiel
 import os
+import numpy as np
 import darkhex.check as CHECK
 from darkhex import logger as log
+from darkhex.utils.isomorphic import (canonicalize_policy,
+                                      canonical_action_probs,
+                                      canonical_info_state, rotate_action)
+from darkhex.utils.policy_file import PolicyFile, write_policy_file
+from darkhex.utils.sampling import AliasTable
+from darkhex.utils.catalog import get_catalog
+from darkhex.utils.sharded_policy import (ShardedPolicyTable, is_sharded_policy,
+                                          write_sharded_policy)
+from darkhex.utils.policy_store import SqlitePolicyStore
+from darkhex.utils.quantize import quantize_policy
+from darkhex.utils.fingerprint import PolicyFingerprint
+from darkhex.utils.geometry import get_geometry
+from darkhex.utils.info_state import split_info_state
+from darkhex.utils.recall import (expand_to_perfect_recall,
+                                  project_to_imperfect_recall)
+
+# Generator used when sampling without an explicit rng. Creating a generator
+# costs far more than a draw, so it is made once for the module.
+_default_rng = np.random.default_rng()
 
 
 class Policy:
@@ -13,7 +36,8 @@ class Policy:
                  board_size: typing.Tuple[int, int],
                  initial_state: pyspiel.State,
                  is_perfect_recall: bool = False,
-                 is_best_response: bool = False) -> None:
+                 is_best_response: bool = False,
+                 memory_budget: int = None) -> None:
         """
         Initialize the policy.
         
@@ -23,7 +47,11 @@ class Policy:
             initial_state (pyspiel.State): The initial state.
             is_perfect_recall (bool): Whether the policy is perfect recall.
             is_best_response (bool): Whether the policy is best response.
+            memory_budget (int): Memory budget in bytes for the resident
+                shards of a sharded policy.
         """
+        self.memory_budget = memory_budget
+        self._fingerprint = None
         if isinstance(policy, str):
             # setup all the parameters using the policy data
             self._load_policy(policy, is_best_response)
@@ -39,6 +67,7 @@ class Policy:
             self.policy = policy
             self.is_perfect_recall = is_perfect_recall
             self.is_best_response = is_best_response
+            self.is_canonical = False
         self.num_rows = self.board_size[0]
         self.num_cols = self.board_size[1]
         self.num_cells = self.num_rows * self.num_cols
@@ -55,6 +84,21 @@ class Policy:
         """
         raise NotImplementedError
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        Content fingerprint of the policy table, see utils/fingerprint.py.
+        Stable across saves and loads, so it can key caches of results
+        computed from the policy.
+        """
+        fingerprint = getattr(self, "_fingerprint", None)
+        if fingerprint is None:
+            fingerprint = PolicyFingerprint()
+            for info_state, action_probs in self.policy.items():
+                fingerprint.add(info_state, action_probs)
+            self._fingerprint = fingerprint
+        return fingerprint.hexdigest()
+
     def get_action(self, info_state: str) -> int:
         """
         Take an action for the given state.
@@ -67,26 +111,67 @@ class Policy:
         a_p = self.get_action_probabilities(info_state)
         return max(a_p, key=a_p.get)
 
+    def sample_action(self,
+                      info_state: str,
+                      rng: np.random.Generator = None) -> int:
+        """
+        Sample an action for the given state. The alias table of the state is
+        built on the first call and cached with the policy, so later samples
+        take constant time.
+        Args:
+            info_state: The info state.
+            rng (np.random.Generator): The random generator to use.
+
+        Returns:
+            The sampled action.
+        """
+        if rng is None:
+            rng = _default_rng
+        key = info_state if isinstance(
+            info_state, str) else info_state.information_state_string()
+        alias_tables = self.__dict__.setdefault("_alias_tables", {})
+        table = alias_tables.get(key)
+        if table is None:
+            table = AliasTable.from_action_probs(
+                self.get_action_probabilities(info_state))
+            alias_tables[key] = table
+        return table.sample(rng)
+
     def _load_policy(self, policy_name: str, is_best_response: bool) -> None:
         """
         Load the Policy data from the file.
         Args:
             policy_name (str): The policy_name name/folder path.
         """
-        if policy_name not in os.listdir(util.PathVars.policies):
-            path = policy_name
+        file_name = "best_response.pkl" if is_best_response else "policy.pkl"
+        shards_path = os.path.join(util.PathVars.policies, policy_name,
+                                   "shards")
+        if is_sharded_policy(policy_name) or is_sharded_policy(shards_path):
+            path = policy_name if is_sharded_policy(
+                policy_name) else shards_path
+            table = ShardedPolicyTable(path, self.memory_budget)
+            data = util.dotdict(table.manifest, policy=table)
+            data.board_size = tuple(data.board_size)
         else:
-            if is_best_response:
-                path = util.PathVars.policies + policy_name + "/best_response.pkl"
+            catalog = get_catalog()
+            path = catalog.resolve(policy_name, file_name) or \
+                catalog.resolve(policy_name, "policy.db") or policy_name
+            if path.endswith(".db"):
+                store = SqlitePolicyStore(path)
+                data = util.dotdict(store.metadata, policy=store)
+                data.board_size = tuple(data.board_size)
             else:
-                path = util.PathVars.policies + policy_name + "/policy.pkl"
-        data = util.load_file(path)
-        log.debug(f"Loaded data from path: {path} | {data}")
+                data = util.load_file(path)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Loaded data from path: %s | %s", path, data)
         self.policy = data.policy
         self.initial_state = data.initial_state
         self.board_size = data.board_size
         self.is_perfect_recall = data.is_perfect_recall
         self.is_best_response = is_best_response
+        self.is_canonical = bool(data.is_canonical)
+        if data.fingerprint:
+            self._fingerprint = PolicyFingerprint(int(data.fingerprint, 16))
         if data.player in [0, 1]:
             self.player = data.player
 
@@ -106,7 +191,9 @@ class Policy:
             board_size=self.board_size,
             player=self.player if hasattr(self, "player") else None,
             is_perfect_recall=self.is_perfect_recall,
-            is_best_response=is_best_response)
+            is_best_response=is_best_response,
+            is_canonical=getattr(self, "is_canonical", False),
+            fingerprint=self.fingerprint)
         if policy_name.find("/") != -1 and policy_name.find(
                 ".") != -1:  # policy_name is a path
             path = policy_name
@@ -116,7 +203,8 @@ class Policy:
             else:
                 path = util.PathVars.policies + policy_name + "/policy.pkl"
         util.save_file(data, path)
-        log.info("Saved policy to path: " + path)
+        get_catalog().record(path, data)
+        log.info("Saved policy to path: %s", path)
 
 
 class TabularPolicy(Policy):
@@ -128,19 +216,21 @@ class TabularPolicy(Policy):
         initial_state: pyspiel.State = None,
         is_perfect_recall: bool = False,
         is_best_response: bool = False,
+        memory_budget: int = None,
     ):
         """
         Setup a tabular policy. Any two player policy that has a tabular representation can be used.
 
         Args:
-            policy (str or dict[str, dict[int, float]]): The policy name or a dictionary of action probability dictionary.
+            policy (str or dict[str, dict[int, float]]): The policy name, a sharded policy directory or a dictionary of action probability dictionary.
             board_size (list): The size of the board.
             initial_state (pyspiel.State): The initial state of the board.
             is_perfect_recall (bool): Whether the policy is perfect recall.
             is_best_response (bool): Whether the policy is best response.
+            memory_budget (int): Memory budget in bytes for the resident shards of a sharded policy.
         """
         super().__init__(policy, board_size, initial_state, is_perfect_recall,
-                         is_best_response)
+                         is_best_response, memory_budget)
 
     def get_action_probabilities(self,
                                  info_state: str) -> typing.Dict[int, float]:
@@ -152,8 +242,186 @@ class TabularPolicy(Policy):
         Returns:
             The action probability dictionary.
         """
+        if self.is_canonical:
+            return canonical_action_probs(self.policy, info_state,
+                                          self.num_rows, self.num_cols)
         return self.policy[info_state]
 
+    def set_action_probabilities(self, info_state: str,
+                                 action_probs: typing.Any) -> None:
+        """
+        Sets the action probabilities of an info state, keeping the
+        fingerprint up to date.
+
+        Args:
+            info_state (str): The info state.
+            action_probs: The action probability dictionary or list of
+                (action, probability) tuples.
+        """
+        if self._fingerprint is not None:
+            if info_state in self.policy:
+                self._fingerprint.remove(info_state, self.policy[info_state])
+            self._fingerprint.add(info_state, action_probs)
+        self.policy[info_state] = action_probs
+        alias_tables = self.__dict__.get("_alias_tables")
+        if alias_tables:
+            if self.is_canonical:
+                # rotated lookups share the entry, drop them all
+                alias_tables.clear()
+            else:
+                alias_tables.pop(info_state, None)
+
+    def canonicalize(self) -> None:
+        """
+        Keeps only the canonical info states under the 180 degree rotation,
+        roughly halving a symmetric policy. Lookups with any info state keep
+        working as before.
+        """
+        if self.is_canonical:
+            return
+        self.policy = canonicalize_policy(self.policy, self.num_rows,
+                                          self.num_cols)
+        self.is_canonical = True
+        self._fingerprint = None
+        self.__dict__.pop("_alias_tables", None)
+
+    def quantize(self, max_denominator: int = 0) -> util.dotdict:
+        """
+        Replaces the policy table with a quantized one, see quantize_policy.
+        Saving the policy afterwards saves the quantized table.
+
+        Args:
+            max_denominator (int): Largest denominator of the fractions kept
+                exactly. 0 to use fixed point for all the stochastic states.
+        Returns:
+            util.dotdict: The conversion report with the error bounds.
+        """
+        self.policy, report = quantize_policy(self.policy, max_denominator)
+        self._fingerprint = None
+        self.__dict__.pop("_alias_tables", None)
+        return report
+
+    def save_policy_to_binary(self, policy_name: str) -> None:
+        """
+        Save the policy as a binary policy file, see MemmapPolicy.
+
+        Args:
+            policy_name (str): The policy name or a file path.
+        """
+        if policy_name.find("/") != -1 and policy_name.find(".") != -1:
+            path = policy_name
+        else:
+            path = util.PathVars.policies + policy_name + "/policy.bin"
+        write_policy_file(self.policy, path, self.board_size,
+                          self.initial_state, getattr(self, "player", None),
+                          self.is_perfect_recall, self.is_canonical,
+                          self.fingerprint)
+        get_catalog().record(path)
+
+    def save_policy_to_shards(self,
+                              policy_name: str,
+                              num_shards: int = 16) -> None:
+        """
+        Save the policy as a sharded policy directory. Load it back with the
+        policy name or the directory to keep only some shards in memory.
+
+        Args:
+            policy_name (str): The policy name or a directory path.
+            num_shards (int): The number of shards.
+        """
+        if policy_name.find("/") != -1:
+            directory = policy_name
+        else:
+            directory = util.PathVars.policies + policy_name + "/shards"
+        write_sharded_policy(self.policy, directory, self.board_size,
+                             self.initial_state, getattr(self, "player", None),
+                             self.is_perfect_recall, self.is_canonical,
+                             num_shards, self.fingerprint)
+
+    def save_policy_to_sqlite(self, policy_name: str) -> None:
+        """
+        Save the policy to a SQLite policy store, see SqlitePolicyStore.
+        Existing info states in the store are overwritten.
+
+        Args:
+            policy_name (str): The policy name or a database file path.
+        """
+        if policy_name.find("/") != -1 and policy_name.find(".") != -1:
+            path = policy_name
+        else:
+            path = util.PathVars.policies + policy_name + "/policy.db"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with SqlitePolicyStore(path) as store:
+            store.set_metadata(board_size=self.board_size,
+                               initial_state=self.initial_state,
+                               player=getattr(self, "player", None),
+                               is_perfect_recall=self.is_perfect_recall,
+                               is_canonical=self.is_canonical,
+                               fingerprint=self.fingerprint)
+            store.update(self.policy)
+        get_catalog().record(path)
+        log.info("Saved policy to path: %s", path)
+
+    def _with_policy(self, policy: dict, initial_state: str,
+                     is_perfect_recall: bool) -> "TabularPolicy":
+        """ Copy of this policy with another policy table. """
+        new_policy = copy.copy(self)
+        new_policy.__dict__.pop("_alias_tables", None)
+        new_policy.policy = policy
+        new_policy.initial_state = initial_state
+        new_policy.is_perfect_recall = is_perfect_recall
+        new_policy.is_canonical = False
+        new_policy._fingerprint = None
+        return new_policy
+
+    def to_imperfect_recall(self) -> "TabularPolicy":
+        """
+        Projects a perfect recall single player policy onto imperfect recall
+        info states, averaging the perfect recall states of an imperfect
+        recall state weighted by their reach, see utils/recall.py.
+
+        Returns:
+            TabularPolicy: The imperfect recall policy.
+        """
+        if not self.is_perfect_recall or self.is_canonical:
+            raise ValueError(
+                "Only non canonical perfect recall policies can be projected")
+        player, board, _ = split_info_state(
+            self.initial_state, get_geometry(self.num_rows, self.num_cols))
+        return self._with_policy(
+            project_to_imperfect_recall(self.policy, self.num_rows,
+                                        self.num_cols),
+            util.get_info_state_from_board(board, player), False)
+
+    def to_perfect_recall(self) -> "TabularPolicy":
+        """
+        Expands an imperfect recall single player policy to the perfect
+        recall states it reaches, each with the distribution of its
+        imperfect recall state.
+
+        Returns:
+            TabularPolicy: The perfect recall policy.
+        """
+        if self.is_perfect_recall or self.is_canonical:
+            raise ValueError(
+                "Only non canonical imperfect recall policies can be expanded")
+        player, board, _ = split_info_state(
+            self.initial_state, get_geometry(self.num_rows, self.num_cols))
+        initial_state = util.get_info_state_from_board(board, player, [], True)
+        return self._with_policy(
+            expand_to_perfect_recall(self.policy, initial_state,
+                                     self.num_rows, self.num_cols),
+            initial_state, True)
+
+    def freeze(self) -> "CompiledTabularPolicy":
+        """
+        Compiles the policy into a read-only CompiledTabularPolicy.
+
+        Returns:
+            CompiledTabularPolicy: The compiled policy.
+        """
+        return CompiledTabularPolicy(self)
+
 
 class SinglePlayerTabularPolicy(TabularPolicy):
 
@@ -165,20 +433,22 @@ class SinglePlayerTabularPolicy(TabularPolicy):
         player: int = None,
         is_perfect_recall: bool = False,
         is_best_response: bool = False,
+        memory_budget: int = None,
     ):
         """
         Setup a single player tabular policy. Any single player policy that has a tabular representation can be used.
 
         Args:
-            policy (str or dict[str, dict[int, float]]): The policy name or a dictionary of action probability dictionary.
+            policy (str or dict[str, dict[int, float]]): The policy name, a sharded policy directory or a dictionary of action probability dictionary.
             board_size (list): The size of the board.
             initial_state (pyspiel.State): The initial state of the board.
             player (int): The player the policy belongs to.
             is_perfect_recall (bool): Whether the policy is perfect recall.
             is_best_response (bool): Whether the policy is a best response policy.
+            memory_budget (int): Memory budget in bytes for the resident shards of a sharded policy.
         """
         super().__init__(policy, board_size, initial_state, is_perfect_recall,
-                         is_best_response)
+                         is_best_response, memory_budget)
         if not hasattr(self, 'player'):
             self.player = player
         CHECK.PLAYER(self.player)
@@ -196,7 +466,173 @@ class SinglePlayerTabularPolicy(TabularPolicy):
         """
         # todo:
         # CHECK.STATE_PLAYER(info_state, self.player)
-        return self.policy[info_state]
+        return super().get_action_probabilities(info_state)
+
+
+class CompiledTabularPolicy(Policy):
+
+    def __init__(self, policy: TabularPolicy):
+        """
+        Read-only tabular policy backed by a dense (num_states, num_cells)
+        float32 matrix and an info state to row index. Use
+        TabularPolicy.freeze to create one.
+
+        Args:
+            policy (TabularPolicy): The policy to compile.
+        """
+        self.initial_state = policy.initial_state
+        self.board_size = policy.board_size
+        self.is_perfect_recall = policy.is_perfect_recall
+        self.is_best_response = policy.is_best_response
+        self.is_canonical = policy.is_canonical
+        self._fingerprint = PolicyFingerprint(int(policy.fingerprint, 16))
+        if hasattr(policy, "player"):
+            self.player = policy.player
+            self.opponent = 1 - self.player
+        self.num_rows = self.board_size[0]
+        self.num_cols = self.board_size[1]
+        self.num_cells = self.num_rows * self.num_cols
+
+        self.index = {}
+        self.matrix = np.zeros((len(policy.policy), self.num_cells),
+                               dtype=np.float32)
+        for row, (info_state, action_probs) in enumerate(
+                policy.policy.items()):
+            self.index[info_state] = row
+            items = action_probs.items() if isinstance(action_probs,
+                                                       dict) else action_probs
+            for action, prob in items:
+                self.matrix[row, action] = prob
+        self._cumulative = np.cumsum(self.matrix, axis=1)
+        self.matrix.setflags(write=False)
+        self._cumulative.setflags(write=False)
+
+    def _row(self, info_state: str) -> typing.Tuple[int, bool]:
+        """ Row of the info state and whether it is stored rotated. """
+        row = self.index.get(info_state)
+        if row is not None:
+            return row, False
+        if self.is_canonical:
+            key, rotated = canonical_info_state(info_state, self.num_rows,
+                                                self.num_cols)
+            return self.index[key], rotated
+        raise KeyError(info_state)
+
+    def get_action_probabilities(self,
+                                 info_state: str) -> typing.Dict[int, float]:
+        """
+        Get the action probability dictionary for the given state. Only the
+        actions with a positive probability are included.
+        Args:
+            info_state: The info state.
+        
+        Returns:
+            The action probability dictionary.
+        """
+        row, rotated = self._row(info_state)
+        probs = self.matrix[row]
+        if rotated:
+            probs = probs[::-1]
+        return {int(a): float(probs[a]) for a in np.flatnonzero(probs)}
+
+    def _rows(self,
+              info_states: typing.Sequence[str]) -> typing.Tuple[np.ndarray,
+                                                                 np.ndarray]:
+        rows = np.empty(len(info_states), dtype=np.int64)
+        rotated = np.zeros(len(info_states), dtype=bool)
+        for i, info_state in enumerate(info_states):
+            rows[i], rotated[i] = self._row(info_state)
+        return rows, rotated
+
+    def action_probabilities_batch(
+            self, info_states: typing.Sequence[str]) -> np.ndarray:
+        """
+        The action probabilities of many info states at once.
+
+        Args:
+            info_states (typing.Sequence[str]): The info states.
+        Returns:
+            np.ndarray: (len(info_states), num_cells) float32 array, one row
+                of probabilities over all cells per info state.
+        """
+        rows, rotated = self._rows(info_states)
+        probs = self.matrix[rows]
+        probs[rotated] = probs[rotated, ::-1]
+        return probs
+
+    def sample_actions_batch(self,
+                             info_states: typing.Sequence[str],
+                             rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Samples an action for each info state.
+
+        Args:
+            info_states (typing.Sequence[str]): The info states.
+            rng (np.random.Generator): The random generator to use.
+        Returns:
+            np.ndarray: int64 array of sampled actions.
+        """
+        if rng is None:
+            rng = _default_rng
+        rows, rotated = self._rows(info_states)
+        cumulative = self._cumulative[rows]
+        thresholds = rng.random(len(rows)) * cumulative[:, -1]
+        # first cell whose cumulative probability passes the threshold, cells
+        # without probability never pass it first
+        actions = (cumulative > thresholds[:, None]).argmax(axis=1)
+        actions[rotated] = self.num_cells - 1 - actions[rotated]
+        return actions
+
+
+class MemmapPolicy(Policy):
+
+    def __init__(self, policy: str):
+        """
+        Setup a tabular policy from a binary policy file. The file is
+        memory-mapped and info states are looked up with a binary search, so
+        the policy dictionary is never built.
+
+        Args:
+            policy (str): The policy name or the binary policy file path.
+        """
+        path = get_catalog().resolve(policy, "policy.bin") or policy
+        self.policy = PolicyFile(path)
+        header = self.policy.header
+        self.initial_state = header["initial_state"]
+        self.board_size = tuple(header["board_size"])
+        self.is_perfect_recall = header["is_perfect_recall"]
+        self.is_best_response = False
+        self.is_canonical = header["is_canonical"]
+        self._fingerprint = PolicyFingerprint(int(
+            header["fingerprint"], 16)) if header.get("fingerprint") else None
+        if header["player"] in [0, 1]:
+            self.player = header["player"]
+            self.opponent = 1 - self.player
+        self.num_rows = self.board_size[0]
+        self.num_cols = self.board_size[1]
+        self.num_cells = self.num_rows * self.num_cols
+
+    def get_action_probabilities(self,
+                                 info_state: str) -> typing.Dict[int, float]:
+        """
+        Get the action probability dictionary for the given state.
+        Args:
+            info_state: The info state.
+        
+        Returns:
+            The action probability dictionary.
+        """
+        if self.is_canonical and info_state not in self.policy:
+            key, rotated = canonical_info_state(info_state, self.num_rows,
+                                                self.num_cols)
+            action_probs = self.policy.action_probabilities(key)
+            if rotated:
+                return {
+                    rotate_action(a, self.num_cells): p
+                    for a, p in action_probs.items()
+                }
+            return action_probs
+        return self.policy.action_probabilities(info_state)
 
 
 class PyspielSolverPolicy(Policy):
@@ -206,11 +642,16 @@ class PyspielSolverPolicy(Policy):
                  path=None,
                  board_size: typing.Tuple[int] = None,
                  initial_state: pyspiel.State = None,
-                 is_perfect_recall: bool = False):
+                 is_perfect_recall: bool = False,
+                 cache_size: int = None):
         """
         Setup a pyspiel policy that uses a solver. A policy file that has a type where average
         policy can be accessed using a solver can be used.
 
+        Action probabilities are cached by info state string the first time
+        they are asked for, so repeated lookups do not go through the pyspiel
+        policy. export_tabular fills the whole table at once.
+
         Args:
             solver (pyspiel.OutcomeSamplingMCCFRSolver or pyspiel.ExternalSamplingMCCFRSolver): 
                 A pyspiel solver object.
@@ -218,15 +659,22 @@ class PyspielSolverPolicy(Policy):
             board_size (list): The size of the board.
             initial_state (pyspiel.State): The initial state of the board.
             is_perfect_recall (bool): Whether the policy is perfect recall.
+            cache_size (int): The maximum number of cached info states, the
+                least recently used ones are dropped first. None for no limit,
+                0 to disable the cache.
         """
         if (solver is None and path is None) or (solver is not None and
                                                  path is not None):
             raise ValueError("Either solver or path must be provided.")
         if solver:
             self.solver = solver
-            super().__init__(solver.average_policy(), board_size, initial_state)
+            super().__init__(solver.average_policy(), board_size, initial_state,
+                             is_perfect_recall)
         else:
             self._load_policy(path)
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._table = None
 
     def get_action_probabilities(
             self, pyspiel_state: pyspiel.State) -> typing.Dict[int, float]:
@@ -239,7 +687,73 @@ class PyspielSolverPolicy(Policy):
         Returns:
             The action probability dictionary.
         """
-        return self.policy.action_probabilities(pyspiel_state)
+        key = pyspiel_state.information_state_string()
+        if self._table is not None:
+            action_probs = self._table.get(key)
+            if action_probs is not None:
+                return action_probs
+        if self.cache_size == 0:
+            return self.policy.action_probabilities(pyspiel_state)
+        action_probs = self._cache.get(key)
+        if action_probs is None:
+            action_probs = self.policy.action_probabilities(pyspiel_state)
+            self._cache[key] = action_probs
+            if self.cache_size is not None and \
+                    len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        elif self.cache_size is not None:
+            self._cache.move_to_end(key)
+        return action_probs
+
+    def export_tabular(self, game: pyspiel.Game = None) -> TabularPolicy:
+        """
+        Exports the average policy of every info state of the game in one
+        pass. Later lookups are served from the exported table.
+
+        Args:
+            game (pyspiel.Game): The game to walk. Dark Hex with the policy's
+                board size if not given.
+        Returns:
+            TabularPolicy: The policy keyed by info state strings.
+        """
+        if game is None:
+            game = pyspiel.load_game(
+                "dark_hex" if self.is_perfect_recall else "dark_hex_ir", {
+                    "num_rows": self.num_rows,
+                    "num_cols": self.num_cols
+                })
+        table = {}
+        visited = set()
+        stack = [game.new_initial_state()]
+        while stack:
+            state = stack.pop()
+            if state.is_terminal():
+                continue
+            # the continuation only depends on both views and the player
+            key = (state.information_state_string(0),
+                   state.information_state_string(1), state.current_player())
+            if key in visited:
+                continue
+            visited.add(key)
+            info_state = state.information_state_string()
+            if info_state not in table:
+                table[info_state] = self.policy.action_probabilities(state)
+            for action in state.legal_actions():
+                stack.append(state.child(action))
+        self._table = table
+        self._cache.clear()
+        return TabularPolicy(table, self.board_size, self.initial_state,
+                             self.is_perfect_recall)
+
+    def refresh(self) -> None:
+        """
+        Takes a new average policy snapshot from the solver and drops the
+        cached and exported action probabilities.
+        """
+        self.policy = self.solver.average_policy()
+        self._cache.clear()
+        self._table = None
+        self.__dict__.pop("_alias_tables", None)
 
     def get_action(self, pyspiel_state: pyspiel.State) -> int:
         """
@@ -260,14 +774,14 @@ class PyspielSolverPolicy(Policy):
         Args:
             policy_path (str): The policy path/folder path.
         """
-        if policy_path not in os.listdir(util.PathVars.policies):
-            path = policy_path
-        else:
-            path = util.PathVars.policies + policy_path + "/policy.pkl"
+        path = get_catalog().resolve(policy_path) or policy_path
         data = util.load_file(path)
         self.solver = data.solver
         self.initial_state = data.initial_state
         self.board_size = data.board_size
+        self.is_perfect_recall = bool(data.is_perfect_recall)
+        self.is_best_response = False
+        self.is_canonical = False
         self.policy = self.solver.average_policy()
         self.num_rows = self.board_size[0]
         self.num_cols = self.board_size[1]
@@ -284,15 +798,17 @@ class PyspielSolverPolicy(Policy):
             solver=self.solver,
             initial_state=self.initial_state,
             board_size=self.board_size,
+            is_perfect_recall=self.is_perfect_recall,
         )
         if policy_name.find("/") != -1 and policy_name.find(
                 ".") != -1:  # policy_name is a path
             path = policy_name
         else:
             path = util.PathVars.policies + policy_name + "/policy.pkl"
-        log.debug(path)
+        log.debug("Saving policy to path: %s", path)
         util.save_file(data, path)
-        log.info("Saved policy to path: " + path)
+        get_catalog().record(path, data)
+        log.info("Saved policy to path: %s", path)
 
 
 def convert_pyspiel_policy_to_darkhex_policy():
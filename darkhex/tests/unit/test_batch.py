@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import darkhex.utils.util as util
+import darkhex.utils.batch as batch
+from darkhex.utils.bitboard import Bitboard
+from darkhex.tests.unit.test_bitboard import random_xo_board
+
+
+def test_boards_to_array():
+    array = batch.boards_to_array(["x.\n.o", "yz\nO."])
+    assert array.dtype == np.int8
+    assert array.shape == (2, 4)
+    assert array[0].tolist() == [batch.BLACK, batch.EMPTY, batch.EMPTY,
+                                 batch.WHITE]
+    assert batch.array_to_boards(array) == ["x..o", "yzO."]
+    assert batch.array_to_boards(array, 2) == ["x.\n.o", "yz\nO."]
+    pytest.raises(ValueError, batch.boards_to_array, ["x.", "x.."])
+    pytest.raises(ValueError, batch.boards_to_array, ["xa"])
+
+
+def test_matches_scalar_functions():
+    for num_rows, num_cols in [(2, 2), (3, 3), (4, 3), (1, 4)]:
+        xo_boards = [
+            random_xo_board(num_rows, num_cols, seed) for seed in range(100)
+        ]
+        boards = xo_boards + [util.convert_xo_to_board(b) for b in xo_boards]
+        array = batch.boards_to_array(boards)
+        legal = batch.legal_action_mask(array)
+        winners = batch.winners(array, num_rows, num_cols)
+        for player in [0, 1]:
+            collusion = batch.is_collusion_possible(array, player)
+            terminal = batch.is_board_terminal(array, player)
+            connected_terminal = batch.is_board_terminal(
+                array, player, num_rows, num_cols)
+            for i, board in enumerate(boards):
+                bitboard = Bitboard.from_board(board, num_cols)
+                assert collusion[i] == util.is_collusion_possible(
+                    board, player)
+                assert terminal[i] == util.is_board_terminal(board, player)
+                assert connected_terminal[i] == bitboard.is_terminal(player)
+        for i, board in enumerate(boards):
+            bitboard = Bitboard.from_board(board, num_cols)
+            assert np.flatnonzero(legal[i]).tolist() == \
+                bitboard.legal_actions()
+            expected = 0 if bitboard.is_connected(0) else (
+                1 if bitboard.is_connected(1) else -1)
+            assert winners[i] == expected
@@ -0,0 +1,131 @@
+import random
+import pytest
+import darkhex.utils.util as util
+from darkhex import cellState
+from darkhex.utils.bitboard import _MASK_CELLS, Bitboard, _render
+from darkhex.utils.connectivity import HexConnectivity
+
+
+def random_xo_board(num_rows, num_cols, seed):
+    rng = random.Random(seed)
+    cells = [
+        rng.choice([cellState.kEmpty, cellState.kBlack, cellState.kWhite])
+        for _ in range(num_rows * num_cols)
+    ]
+    return util.flat_board_to_layered("".join(cells), num_cols)
+
+
+def test_from_board():
+    bitboard = Bitboard.from_board("x..\n.o.\n..x")
+    assert bitboard.num_rows == 3
+    assert bitboard.num_cols == 3
+    assert bitboard.black == 0b100000001
+    assert bitboard.white == 0b000010000
+    assert Bitboard.from_board("y..\n.p.\n..z") == bitboard
+    assert Bitboard.from_board("x...o...x", 3) == bitboard
+    pytest.raises(ValueError, Bitboard.from_board, "x..\n.a.\n...")
+
+
+def test_round_trip():
+    for num_rows, num_cols in [(2, 2), (3, 3), (4, 3), (3, 4), (5, 5)]:
+        for seed in range(50):
+            board = random_xo_board(num_rows, num_cols, seed)
+            bitboard = Bitboard.from_board(board)
+            assert bitboard.to_xo() == board
+            assert bitboard.to_board() == util.convert_xo_to_board(board)
+            assert Bitboard.from_board(bitboard.to_board()) == bitboard
+
+
+def test_to_board():
+    assert Bitboard.from_board("..x\n..o\n.ox\nox.").to_board() == \
+        "..y\n..q\n.Oz\npz."
+    assert Bitboard.from_board("xx.\noxo\n.x.").to_board() == "yy.\npXq\n.z."
+
+
+def test_render():
+    for num_rows, num_cols in [(2, 2), (3, 3), (4, 3), (5, 5)]:
+        num_cells = num_rows * num_cols
+        for seed in range(50):
+            board = util.convert_xo_to_board(
+                random_xo_board(num_rows, num_cols, seed)).replace("\n", "")
+            masks = [
+                sum(1 << c for c, cell in enumerate(board) if cell == mask_cell)
+                for mask_cell in _MASK_CELLS
+            ]
+            assert _render(masks, num_cells) == board
+            black = sum(1 << c for c, cell in enumerate(board)
+                        if cell in cellState.black_pieces)
+            white = sum(1 << c for c, cell in enumerate(board)
+                        if cell in cellState.white_pieces)
+            assert _render([black, white], num_cells) == \
+                util.convert_board_to_xo(board)
+    assert _render([], 4) == "...."
+
+
+def test_after_action():
+    bitboard = Bitboard.from_board("...\n...\n...")
+    bitboard = util.board_after_action(bitboard, 4, 0)
+    assert bitboard.to_xo() == "...\n.x.\n..."
+    bitboard = util.board_after_action(bitboard, 0, 1)
+    assert bitboard.to_xo() == "o..\n.x.\n..."
+    assert util.board_after_action(bitboard, 0, 0) is False
+    assert bitboard.legal_actions() == [1, 2, 3, 5, 6, 7, 8]
+    assert util.is_valid_action(bitboard, 1)
+    assert not util.is_valid_action(bitboard, 4)
+    assert not util.is_valid_action(bitboard, 9)
+    assert util.get_random_action(bitboard) in bitboard.legal_actions()
+    assert Bitboard.from_board("xo\nxo").get_random_action() == -1
+
+
+def test_matches_string_functions():
+    for num_rows, num_cols in [(2, 2), (3, 3), (4, 3)]:
+        for seed in range(100):
+            board = random_xo_board(num_rows, num_cols, seed)
+            bitboard = Bitboard.from_board(board)
+            connection_board = util.convert_xo_to_board(board)
+            for player in [0, 1]:
+                assert util.is_collusion_possible(bitboard, player) == \
+                    util.is_collusion_possible(board, player)
+                assert util.is_board_terminal(bitboard, player) == \
+                    util.is_board_terminal(connection_board, player)
+
+
+def test_connectivity():
+    connectivity = HexConnectivity(3, 3)
+    for cell in [0, 3]:
+        connectivity.place(cell, 0)
+        assert not connectivity.north_south_connected()
+    connectivity.place(1, 1)
+    connectivity.place(4, 1)
+    connectivity.place(5, 1)
+    assert not connectivity.east_west_connected()
+    copied = connectivity.copy()
+    connectivity.place(6, 0)
+    assert connectivity.north_south_connected()
+    assert connectivity.to_board() == "yq.\nXqq\nz.."
+    assert not copied.is_connected(0)
+    copied.place(7, 1)
+    assert copied.to_board() == "yq.\nyqq\n.q."
+
+
+def test_connectivity_matches_bitboard():
+    for num_rows, num_cols in [(2, 2), (3, 3), (4, 3), (3, 4)]:
+        for seed in range(100):
+            board = random_xo_board(num_rows, num_cols, seed)
+            connectivity = HexConnectivity.from_board(board)
+            bitboard = Bitboard.from_board(board)
+            assert connectivity.to_board() == bitboard.to_board()
+            for player in [0, 1]:
+                assert connectivity.is_connected(player) == \
+                    bitboard.is_connected(player)
+
+
+def test_connectivity_after_action():
+    board = "...\n...\n..."
+    connectivity = HexConnectivity.from_board(board)
+    for action, player in [(0, 0), (4, 1), (3, 0), (5, 1), (6, 0)]:
+        board = util.board_after_action(board, action, player)
+        connectivity = util.board_after_action(connectivity, action, player)
+        assert connectivity.to_board() == board
+    assert connectivity.is_connected(0)
+    assert util.board_after_action(connectivity, 4, 0) is False
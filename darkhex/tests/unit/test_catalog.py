@@ -0,0 +1,68 @@
+import os
+import multiprocessing
+import darkhex.policy as policy
+from darkhex.utils.catalog import PolicyCatalog, get_catalog
+
+
+def test_catalog_record_and_list(tmp_path):
+    root = str(tmp_path) + "/"
+    catalog = PolicyCatalog(root)
+    tabular = policy.SinglePlayerTabularPolicy({"P0\n..\n..": {
+        0: 1.0
+    }}, (2, 2), "P0\n..\n..", 0)
+    path = root + "test_policy/policy.pkl"
+    tabular.save_policy_to_file(path)
+    entry = catalog.record(path)
+    assert entry["name"] == "test_policy"
+    assert entry["board_size"] == [2, 2]
+    assert entry["player"] == 0
+    assert entry["num_states"] == 1
+    assert entry["file_size"] == os.path.getsize(path)
+    assert catalog.record("/elsewhere/policy.pkl") is None
+
+    tabular.save_policy_to_binary(root + "test_policy/policy.bin")
+    catalog.record(root + "test_policy/policy.bin")
+    # a new catalog object reads the saved index
+    catalog = PolicyCatalog(root)
+    assert len(catalog.list()) == 2
+    assert [e["format"] for e in catalog.list(board_size=(2, 2))] == \
+        ["bin", "pkl"]
+    assert catalog.list(player=1) == []
+    assert catalog.resolve("test_policy") == path
+    assert catalog.resolve("missing") is None
+
+    os.remove(path)
+    assert len(catalog.list()) == 1
+    catalog.rebuild()
+    assert list(catalog.entries) == ["test_policy/policy.bin"]
+
+
+def _record_policies(root, names):
+    catalog = PolicyCatalog(root)
+    for name in names:
+        catalog.record(root + name + "/policy.bin")
+
+
+def test_catalog_concurrent_record(tmp_path):
+    root = str(tmp_path) + "/"
+    tabular = policy.SinglePlayerTabularPolicy({"P0\n..\n..": {
+        0: 1.0
+    }}, (2, 2), "P0\n..\n..", 0)
+    names = [f"policy_{i}" for i in range(40)]
+    for name in names:
+        tabular.save_policy_to_binary(root + name + "/policy.bin")
+    processes = [
+        multiprocessing.Process(target=_record_policies,
+                                args=(root, names[i::4])) for i in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert sorted(PolicyCatalog(root).entries) == sorted(
+        name + "/policy.bin" for name in names)
+
+
+def test_default_catalog():
+    assert get_catalog() is get_catalog()
+    assert get_catalog().resolve("4x3_white_hp_pr") is not None
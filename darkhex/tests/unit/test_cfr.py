@@ -0,0 +1,87 @@
+import numpy as np
+import pyspiel
+import pytest
+from open_spiel.python import policy
+from open_spiel.python.algorithms import cfr, exploitability
+from open_spiel.python.algorithms import expected_game_score
+from darkhex.algorithms.cfr import CFRSolver, GameTree
+from darkhex.utils.game_state import darkhex_info_state
+
+
+def _game(num_rows=2, num_cols=2):
+    return pyspiel.load_game("dark_hex_ir", {
+        "num_rows": num_rows,
+        "num_cols": num_cols
+    })
+
+
+def test_game_tree():
+    game = _game()
+    tree = GameTree(game)
+    # terminal nodes are merged by level and winner
+    assert tree.num_nodes == 112
+    assert tree.num_edges == 248
+    assert len(tree.info_states) == 42
+    assert tree.level_offsets[-1] == tree.num_nodes
+    assert tree.edge_offsets[-1] == tree.num_edges
+    # player 0's info states first
+    start, end = tree.player_slots[1]
+    assert end == tree.num_actions.sum()
+    assert all(tree.info_states[i].startswith("P1")
+               for i in np.flatnonzero(tree.offsets >= start))
+
+    solver = CFRSolver(game, tree=tree)
+    uniform = policy.UniformRandomPolicy(game)
+    expected = expected_game_score.policy_value(game.new_initial_state(),
+                                                [uniform] * 2)[0]
+    assert solver.expected_value(
+        solver.current_policies()) == pytest.approx(expected)
+
+    with pytest.raises(ValueError):
+        GameTree(pyspiel.load_game("kuhn_poker"))
+    with pytest.raises(ValueError):
+        GameTree(_game(3, 3), max_nodes=1000)
+
+
+@pytest.mark.parametrize("variant,open_spiel_solver",
+                         [("cfr", cfr.CFRSolver),
+                          ("cfr+", cfr.CFRPlusSolver)])
+@pytest.mark.parametrize("name", ["dark_hex_ir", "dark_hex"])
+def test_cfr_matches_open_spiel(variant, open_spiel_solver, name):
+    game = pyspiel.load_game(name, {"num_rows": 2, "num_cols": 2})
+    solver = CFRSolver(game, variant=variant)
+    solver.run(20)
+    reference = open_spiel_solver(game)
+    for _ in range(20):
+        reference.evaluate_and_update_policy()
+    average_policy = reference.average_policy()
+    for info_state in solver.tree.info_states:
+        legal_actions = solver._legal_actions[
+            solver._info_state_ids[info_state]]
+        assert np.allclose(
+            solver.average_policy(info_state),
+            average_policy.policy_for_key(info_state)[legal_actions])
+
+
+@pytest.mark.parametrize("variant", ["linear", "dcfr"])
+def test_cfr_variants(variant):
+    game = _game()
+    solver = CFRSolver(game, variant=variant, alternating_updates=False)
+
+    def nash_conv():
+        tabular = solver.to_policy()
+        return exploitability.nash_conv(
+            game,
+            policy.tabular_policy_from_callable(
+                game, lambda state: tabular.get_action_probabilities(
+                    darkhex_info_state(state.information_state_string(),
+                                       state.current_player()))))
+
+    solver.run(5)
+    early = nash_conv()
+    solver.run(100)
+    assert solver.iterations == 105
+    assert nash_conv() < early
+
+    with pytest.raises(ValueError):
+        CFRSolver(game, variant="unknown")
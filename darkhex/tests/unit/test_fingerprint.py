@@ -0,0 +1,51 @@
+import darkhex.policy as policy
+from darkhex.utils.fingerprint import PolicyFingerprint, policy_fingerprint
+
+
+def test_policy_fingerprint():
+    policy_dict = {
+        "P0\n..\n..": {
+            0: 0.25,
+            3: 0.75
+        },
+        "P0\nx.\n..": {
+            1: 1.0
+        },
+    }
+    reordered = {
+        "P0\nx.\n..": [(1, 1.0)],
+        "P0\n..\n..": [(3, 0.75), (0, 0.25)],
+    }
+    assert policy_fingerprint(policy_dict) == policy_fingerprint(reordered)
+    assert policy_fingerprint(policy_dict) != policy_fingerprint(
+        {**policy_dict, "P0\nx.\n..": {2: 1.0}})
+    assert policy_fingerprint(policy_dict) != policy_fingerprint(
+        {**policy_dict, "P0\n..\n..": {0: 0.75, 3: 0.25}})
+
+    fingerprint = PolicyFingerprint()
+    fingerprint.add("P0\n..\n..", policy_dict["P0\n..\n.."])
+    fingerprint.add("P0\n.x\n..", {2: 1.0})
+    fingerprint.add("P0\nx.\n..", policy_dict["P0\nx.\n.."])
+    fingerprint.remove("P0\n.x\n..", {2: 1.0})
+    assert fingerprint.hexdigest() == policy_fingerprint(policy_dict)
+    assert policy_fingerprint({}) == PolicyFingerprint().hexdigest()
+
+
+def test_tabular_policy_fingerprint(tmp_path):
+    tabular = policy.SinglePlayerTabularPolicy("4x3_white_hp_pr")
+    fingerprint = tabular.fingerprint
+    path = str(tmp_path / "policy" / "policy.pkl")
+    tabular.save_policy_to_file(path)
+    loaded = policy.SinglePlayerTabularPolicy(path)
+    assert loaded._fingerprint is not None
+    assert loaded.fingerprint == fingerprint
+    assert tabular.freeze().fingerprint == fingerprint
+
+    binary_path = str(tmp_path / "policy.bin")
+    tabular.save_policy_to_binary(binary_path)
+    assert policy.MemmapPolicy(binary_path).fingerprint == fingerprint
+
+    info_state = next(iter(tabular.policy))
+    tabular.set_action_probabilities(info_state, [(0, 1.0)])
+    assert tabular.fingerprint != fingerprint
+    assert tabular.fingerprint == policy_fingerprint(tabular.policy)
@@ -0,0 +1,49 @@
+import random
+import pyspiel
+import pytest
+from darkhex.utils.game_state import DarkHexState
+
+
+@pytest.mark.parametrize("name", ["dark_hex", "dark_hex_ir"])
+@pytest.mark.parametrize("version", ["cdh", "adh"])
+def test_matches_pyspiel(name, version):
+    rng = random.Random(0)
+    for num_rows, num_cols in [(2, 2), (3, 3), (4, 3)]:
+        game = pyspiel.load_game(name, {
+            "num_rows": num_rows,
+            "num_cols": num_cols,
+            "gameversion": version
+        })
+        for _ in range(30):
+            state = game.new_initial_state()
+            dark_hex_state = DarkHexState.from_game(game)
+            snapshots = []
+            while not state.is_terminal():
+                assert dark_hex_state.current_player() == state.current_player()
+                assert dark_hex_state.legal_actions() == state.legal_actions()
+                snapshot = [
+                    dark_hex_state.information_state_string(p) for p in [0, 1]
+                ]
+                assert snapshot == [
+                    state.information_state_string(p) for p in [0, 1]
+                ]
+                snapshots.append(snapshot)
+                action = rng.choice(state.legal_actions())
+                state.apply_action(action)
+                dark_hex_state.apply_action(action)
+            assert dark_hex_state.is_terminal()
+            assert state.returns() == [
+                dark_hex_state.player_return(p) for p in [0, 1]
+            ]
+            # undo walks back through the same info states
+            for snapshot in reversed(snapshots):
+                dark_hex_state.undo_action()
+                assert not dark_hex_state.is_terminal()
+                assert snapshot == [
+                    dark_hex_state.information_state_string(p) for p in [0, 1]
+                ]
+
+
+def test_unsupported_game():
+    with pytest.raises(ValueError):
+        DarkHexState.from_game(pyspiel.load_game("kuhn_poker"))
@@ -0,0 +1,96 @@
+import pytest
+import darkhex.utils.util as util
+from darkhex.utils.info_state import InfoState, InfoStateCodec
+
+
+def test_codec_imperfect_recall():
+    codec = InfoStateCodec(3, 3)
+    info_state = "P0\nx..\n.o.\n..."
+    key = codec.encode(info_state)
+    assert isinstance(key, int)
+    assert key.bit_length() <= codec.num_bits
+    assert codec.decode(key) == info_state
+    # connection and flat boards map to the same key
+    assert codec.encode("P0\ny..\n.o.\n...") == key
+    assert codec.encode("P0 x...o....") == key
+    assert codec.encode("P1\nx..\n.o.\n...") != key
+    pytest.raises(ValueError, codec.encode, "P0\nx..\n.o.\n...\n0,0 ")
+
+
+def test_codec_perfect_recall():
+    codec = InfoStateCodec(4, 3, perfect_recall=True)
+    info_states = [
+        "P1\n...\n...\n...\n...\n",
+        "P1\n..x\n...\n...\n...\n1,2 ",
+        "P1\n..x\n...\n...\no..\n1,2 1,9 ",
+        "P1\n..x\n...\n...\no..\n1,9 1,2 ",
+    ]
+    keys = [codec.encode(info_state) for info_state in info_states]
+    assert len(set(keys)) == len(keys)
+    for info_state, key in zip(info_states, keys):
+        assert codec.decode(key) == info_state
+        assert codec.from_bytes(codec.to_bytes(key)) == key
+        assert len(codec.to_bytes(key)) == codec.num_bytes
+    assert sorted(keys) == [
+        codec.from_bytes(b) for b in sorted(codec.to_bytes(k) for k in keys)
+    ]
+    assert codec.decode(
+        codec.encode(util.get_perfect_recall_state(
+            0, "x..\n...\n...\n...", [0]))) == "P0\nx..\n...\n...\n...\n0,0 "
+
+
+def test_codec_policy():
+    codec = InfoStateCodec(2, 2)
+    policy = {"P0\n..\n..": {0: 0.5, 3: 0.5}, "P0\nx.\n.o": {1: 1.0}}
+    compact = codec.encode_policy(policy)
+    assert all(isinstance(k, int) for k in compact)
+    assert codec.decode_policy(compact) == policy
+
+
+def test_info_state_parse():
+    info_state = InfoState.from_string("P0\nx..\n.o.\n...\n0,0 0,4 ",
+                                       perfect_recall=True)
+    assert info_state.player == 0
+    assert info_state.board == "x..\n.o.\n..."
+    assert info_state.action_history == (0, 4)
+    assert str(info_state) == "P0\nx..\n.o.\n...\n0,0 0,4 "
+    assert str(InfoState.from_string("P1 x...o....", 3,
+                                     3)) == "P1\nx..\n.o.\n..."
+    pytest.raises(AttributeError, setattr, info_state, "player", 1)
+
+
+def test_info_state_matches_util():
+    for perfect_recall in [False, True]:
+        info_state = util.get_info_state_from_board("...\n...\n...\n...", 1,
+                                                    [], perfect_recall)
+        parsed = InfoState.from_string(info_state, 4, 3, perfect_recall)
+        for action, stone in [(2, 1), (4, 0), (6, 1), (7, 1), (8, 1)]:
+            info_state = util.info_state_after_action(info_state, action,
+                                                      stone, perfect_recall)
+            parsed = util.info_state_after_action(parsed, action, stone,
+                                                  perfect_recall)
+            assert isinstance(parsed, InfoState)
+            assert str(parsed) == info_state
+            reparsed = InfoState.from_string(info_state, 4, 3, perfect_recall)
+            assert parsed == reparsed
+            assert hash(parsed) == hash(reparsed)
+            assert util.get_board_from_info_state(parsed) == \
+                util.get_board_from_info_state(info_state, perfect_recall)
+            assert util.is_collusion_possible_info_state(parsed) == \
+                util.is_collusion_possible_info_state(info_state)
+            assert util.is_info_state_terminal(parsed) == \
+                util.is_info_state_terminal(info_state, perfect_recall)
+        assert util.is_info_state_terminal(parsed)
+        assert util.get_player_from_info_state(parsed) == 1
+        assert util.info_state_after_action(parsed, 2, 1) is False
+    assert util.get_action_history(parsed) == [2, 4, 6, 7, 8]
+
+
+def test_info_state_as_key():
+    info_state = InfoState.from_string("P0\n..\n..")
+    policy = {InfoState.from_string("P0\nx.\n.."): {1: 1.0}}
+    assert info_state.after_action(0, 0) in policy
+    assert policy[info_state.after_action(0, 0)] == {1: 1.0}
+    assert info_state.after_action(1, 0) not in policy
+    # string keyed dictionaries are looked up with the string form
+    assert str(info_state.after_action(0, 0)) in {"P0\nx.\n..": {1: 1.0}}
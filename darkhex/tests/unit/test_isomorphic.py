@@ -0,0 +1,66 @@
+import darkhex.policy as policy
+from darkhex.utils.isomorphic import (canonical_info_state,
+                                      canonicalize_policy,
+                                      canonicalize_state_table, rotate_board,
+                                      rotate_info_state)
+
+
+def test_rotate():
+    assert rotate_board("yx.\n..q") == "p..\n.xz"
+    assert rotate_board("y..o") == "o..z"
+    assert rotate_info_state("P0\nx..\n.o.\n...", 3, 3) == "P0\n...\n.o.\n..x"
+    assert rotate_info_state("P0 x...o....", 3, 3) == "P0 ....o...x"
+    assert rotate_info_state("P1\n..x\n...\n...\no..\n1,2 1,9 ", 4,
+                             3) == "P1\n..o\n...\n...\nx..\n1,9 1,2 "
+    for info_state, rows in [("P0\nx..\n.o.\n...", 3),
+                             ("P1\n..x\n...\n...\no..\n1,2 ", 4)]:
+        assert rotate_info_state(rotate_info_state(info_state, rows, 3), rows,
+                                 3) == info_state
+
+
+def test_canonical_info_state():
+    info_state = "P0\nx..\n...\n..."
+    rotated = rotate_info_state(info_state, 3, 3)
+    assert canonical_info_state(info_state, 3, 3)[0] == \
+        canonical_info_state(rotated, 3, 3)[0]
+    assert canonical_info_state(info_state, 3, 3)[1] != \
+        canonical_info_state(rotated, 3, 3)[1]
+    # symmetric states are their own canonical form
+    assert canonical_info_state("P0\n...\n.x.\n...", 3,
+                                3) == ("P0\n...\n.x.\n...", False)
+
+
+def test_canonicalize_policy():
+    full = {
+        "P0\n...\n...": {
+            0: 0.5,
+            5: 0.5
+        },
+        "P0\nx..\n...": {
+            4: 1.0
+        },
+        "P0\n...\n..x": {
+            1: 1.0
+        },
+        "P0\n.x.\n...": {
+            3: 1.0
+        },
+        "P0\n...\n.x.": {
+            5: 1.0
+        },
+    }
+    canonical = canonicalize_policy(full, 2, 3)
+    # one pair is symmetric, the other is not and is kept as it is
+    assert len(canonical) == 4
+    tabular = policy.TabularPolicy(full, (2, 3), "P0\n...\n...")
+    tabular.canonicalize()
+    assert tabular.is_canonical
+    assert tabular.policy == canonical
+    for info_state, action_probs in full.items():
+        assert tabular.get_action_probabilities(info_state) == action_probs
+
+
+def test_canonicalize_state_table():
+    states = {"....": 0, "x...": 1, "...x": 1, "xo..": 0, "..ox": 0}
+    canonical = canonicalize_state_table(states, 2, 2)
+    assert canonical == {"....": 0, "...x": 1, "..ox": 0}
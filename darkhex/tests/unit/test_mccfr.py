@@ -1,4 +1,11 @@
+import numpy as np
+import pytest
 import pyspiel
+from open_spiel.python.algorithms import exploitability
+from open_spiel.python.policy import tabular_policy_from_callable
+from darkhex.algorithms.outcome_sampling_mccfr import OutcomeSamplingMCCFR
+from darkhex.algorithms.external_sampling_mccfr import ExternalSamplingMCCFR
+from darkhex.algorithms.parallel_mccfr import ParallelMCCFR
 
 
 def test_mccfr_os():
@@ -9,3 +16,168 @@ def test_mccfr_os():
 
     for i in range(int(1e3)):
         solver.run_iteration()
+
+
+def test_outcome_sampling_mccfr():
+    game = pyspiel.load_game("dark_hex_ir", {"num_rows": 2, "num_cols": 2})
+    solver = OutcomeSamplingMCCFR(game, seed=0)
+    assert solver.run(200) > 0
+    assert solver.num_info_states > 0
+    state = game.new_initial_state()
+    info_state = state.information_state_string(0)
+    avg_policy = solver.average_policy(info_state)
+    assert len(avg_policy) == len(state.legal_actions())
+    assert avg_policy.sum() == pytest.approx(1.0)
+    assert solver.average_policy("P0 unknown") is None
+
+    # the same seed gives the same tables
+    other = OutcomeSamplingMCCFR(game, seed=0)
+    other.run(200)
+    assert np.array_equal(other._regrets, solver._regrets)
+    assert np.array_equal(other._avg_policy, solver._avg_policy)
+
+
+def test_regret_matching():
+    game = pyspiel.load_game("dark_hex_ir", {"num_rows": 2, "num_cols": 2})
+    solver = OutcomeSamplingMCCFR(game)
+    regrets = np.array([-1.0, 1.0, 3.0])
+    assert np.allclose(solver._regret_matching(regrets, 3), [0, 0.25, 0.75])
+    assert regrets[0] == -1.0
+    assert np.allclose(solver._regret_matching(-regrets, 3), [1.0, 0, 0])
+    assert np.allclose(solver._regret_matching(np.zeros(4), 4), [0.25] * 4)
+
+
+def test_mccfr_policy_snapshot():
+    game = pyspiel.load_game("dark_hex_ir", {"num_rows": 2, "num_cols": 2})
+    solver = OutcomeSamplingMCCFR(game, seed=0)
+    solver.run(200)
+    average = solver.average_policies()
+    current = solver.current_policies()
+    for info_state, info_state_id in solver._info_state_ids.items():
+        info_state_slice = solver._slice(info_state_id)
+        assert np.allclose(average[info_state_slice],
+                           solver.average_policy(info_state))
+        assert np.allclose(
+            current[info_state_slice],
+            solver._regret_matching(solver._regrets[info_state_slice],
+                                    solver._num_actions[info_state_id]))
+
+
+def _nash_conv(game, solver):
+
+    def action_probs(state):
+        legal_actions = state.legal_actions()
+        probs = solver.average_policy(state.information_state_string())
+        if probs is None:  # not visited yet
+            probs = np.full(len(legal_actions), 1 / len(legal_actions))
+        return dict(zip(legal_actions, probs))
+
+    avg_policy = tabular_policy_from_callable(game, action_probs)
+    return exploitability.nash_conv(game, avg_policy)
+
+
+def test_external_sampling_mccfr():
+    game = pyspiel.load_game("dark_hex_ir", {"num_rows": 2, "num_cols": 2})
+    solver = ExternalSamplingMCCFR(game, seed=0)
+    solver.run(10)
+    early = _nash_conv(game, solver)
+    solver.run(300)
+    assert _nash_conv(game, solver) < early
+
+    tabular = solver.to_policy()
+    assert tabular.initial_state == "P0\n..\n.."
+    state = game.new_initial_state()
+    action_probs = tabular.get_action_probabilities(tabular.initial_state)
+    assert set(action_probs) == set(state.legal_actions())
+    assert sum(action_probs.values()) == pytest.approx(1.0)
+    single = solver.to_policy(player=1)
+    assert single.player == 1
+    assert all(info_state.startswith("P1") for info_state in single.policy)
+
+
+def test_external_sampling_mccfr_perfect_recall():
+    game = pyspiel.load_game("dark_hex", {"num_rows": 2, "num_cols": 2})
+    solver = ExternalSamplingMCCFR(game, seed=0)
+    solver.run(20)
+    state = game.new_initial_state()
+    state.apply_action(0)
+    state.apply_action(3)
+    expected = solver.average_policy(state.information_state_string(0))
+    for player in range(2):
+        single = solver.to_policy(player=player)
+        assert single.player == player
+        assert single.is_perfect_recall
+        assert single.initial_state == f"P{player}\n..\n..\n"
+        assert all(
+            info_state.startswith(f"P{player}\n") for info_state in single.policy)
+    action_probs = solver.to_policy(player=0).get_action_probabilities(
+        "P0\nx.\n..\n0,0 ")
+    assert list(action_probs) == [1, 2, 3]
+    assert np.allclose(list(action_probs.values()), expected)
+
+
+def test_parallel_mccfr():
+    game = pyspiel.load_game("dark_hex_ir", {"num_rows": 2, "num_cols": 2})
+
+    def run():
+        with ParallelMCCFR(OutcomeSamplingMCCFR,
+                           game,
+                           num_workers=2,
+                           seed=0) as parallel:
+            parallel.run(20)
+            early = _nash_conv(game, parallel)
+            parallel.run(2000)
+            return early, _nash_conv(game, parallel), parallel.solver
+
+    early, late, solver = run()
+    assert late < early
+    # same seed and workers, same merged tables
+    _, _, other = run()
+    assert solver.num_info_states == other.num_info_states
+    assert np.array_equal(solver._regrets, other._regrets)
+    assert np.array_equal(solver._avg_policy, other._avg_policy)
+
+
+def test_parallel_mccfr_quality():
+    # with the default sync interval, more workers do not lose the quality of
+    # the same number of iterations on a single worker
+    game = pyspiel.load_game("dark_hex_ir", {"num_rows": 2, "num_cols": 2})
+    nash_convs = []
+    for num_workers in [1, 2]:
+        with ParallelMCCFR(ExternalSamplingMCCFR,
+                           game,
+                           num_workers=num_workers,
+                           seed=0) as parallel:
+            parallel.run(2000)
+            nash_convs.append(_nash_conv(game, parallel))
+    assert nash_convs[1] < 1.5 * nash_convs[0]
+
+
+def test_parallel_mccfr_throughput():
+    # with the default sync interval, a single worker keeps most of the serial
+    # throughput of outcome sampling; merging every iteration loses over half
+    game = pyspiel.load_game("dark_hex_ir", {"num_rows": 3, "num_cols": 3})
+    solver = OutcomeSamplingMCCFR(game, seed=0)
+    solver.run(2000)
+    serial = solver.run(5000)
+    with ParallelMCCFR(OutcomeSamplingMCCFR, game, num_workers=1,
+                       seed=0) as parallel:
+        assert parallel._sync_interval == OutcomeSamplingMCCFR.sync_interval
+        parallel.run(2000)
+        assert parallel.run(5000) > 0.6 * serial
+
+
+def test_parallel_mccfr_grows_shared_arenas():
+    game = pyspiel.load_game("dark_hex_ir", {"num_rows": 3, "num_cols": 3})
+    with ParallelMCCFR(ExternalSamplingMCCFR,
+                       game,
+                       num_workers=2,
+                       sync_interval=1,
+                       seed=0) as parallel:
+        parallel.run(2)
+        assert parallel.solver._size > 1024
+        size = parallel.solver._size
+        assert np.array_equal(parallel._arenas[0].array[:size],
+                              parallel.solver._regrets[:size])
+        policy = parallel.to_policy(player=0)
+        assert all(info_state.startswith("P0") for info_state in policy.policy)
@@ -1,6 +1,7 @@
 import pytest
 import pyspiel
 import os
+import numpy as np
 
 import darkhex.utils.util as util
 import darkhex.policy as policy
@@ -17,6 +18,18 @@ def test_save_policy_to_file_mccfr_path():
     os.remove(save_path)
 
 
+def test_save_policy_to_file_mccfr_perfect_recall(tmp_path):
+    game = pyspiel.load_game("dark_hex", {"num_rows": 2, "num_cols": 2})
+    solver = pyspiel.OutcomeSamplingMCCFRSolver(game)
+    solver.run_iteration()
+    darkhex_policy = policy.PyspielSolverPolicy(solver, None, (2, 2),
+                                                game.new_initial_state(),
+                                                is_perfect_recall=True)
+    save_path = str(tmp_path / "policy.pkl")
+    darkhex_policy.save_policy_to_file(save_path)
+    assert policy.PyspielSolverPolicy(path=save_path).is_perfect_recall
+
+
 def test_save_policy_to_file_mccfr_str():
     file_path = "darkhex/tests/integration/fixtures/test_mccfr_policy.pkl"
     darkhex_policy = policy.PyspielSolverPolicy(path=file_path)
@@ -29,3 +42,71 @@ def test_save_policy_to_file_mccfr_str():
     assert save_path in os.listdir(util.PathVars.policies)
     # delete the created directory
     os.system("rm -rf " + util.PathVars.policies + save_path)
+
+
+def test_freeze_tabular_policy():
+    policy_dict = {
+        "P0\n...\n...": {
+            0: 0.25,
+            4: 0.75
+        },
+        "P0\nx..\n...": [(5, 1.0)],
+        "P0\n...\n.x.": {
+            2: 0.5,
+            3: 0.5
+        },
+    }
+    tabular = policy.SinglePlayerTabularPolicy(policy_dict, (2, 3),
+                                               "P0\n...\n...", 0)
+    compiled = tabular.freeze()
+    assert compiled.player == 0
+    assert compiled.matrix.shape == (3, 6)
+    assert not compiled.matrix.flags.writeable
+    assert compiled.get_action_probabilities("P0\n...\n...") == {
+        0: 0.25,
+        4: 0.75
+    }
+    probs = compiled.action_probabilities_batch(
+        ["P0\nx..\n...", "P0\n...\n..."])
+    assert probs.tolist() == [[0, 0, 0, 0, 0, 1], [0.25, 0, 0, 0, 0.75, 0]]
+
+    rng = np.random.default_rng(0)
+    actions = compiled.sample_actions_batch(["P0\n...\n..."] * 4000, rng)
+    assert set(actions.tolist()) == {0, 4}
+    assert abs((actions == 4).mean() - 0.75) < 0.03
+    # canonical policies answer for the rotated states as well
+    tabular.canonicalize()
+    compiled = tabular.freeze()
+    assert compiled.get_action_probabilities("P0\n.x.\n...") == {
+        2: 0.5,
+        3: 0.5
+    }
+    assert compiled.sample_actions_batch(["P0\n...\n..x"], rng)[0] == 0
+
+
+def test_pyspiel_solver_policy_cache():
+    game = pyspiel.load_game("dark_hex_ir", {"num_rows": 2, "num_cols": 2})
+    solver = pyspiel.OutcomeSamplingMCCFRSolver(game)
+    for _ in range(100):
+        solver.run_iteration()
+    initial_state = game.new_initial_state()
+    solver_policy = policy.PyspielSolverPolicy(
+        solver,
+        board_size=(2, 2),
+        initial_state=initial_state.information_state_string(),
+        cache_size=2)
+    state = initial_state.child(0)
+    expected = solver.average_policy().action_probabilities(state)
+    assert solver_policy.get_action_probabilities(state) == expected
+    assert state.information_state_string() in solver_policy._cache
+    for other in [initial_state, state.child(1), state.child(2)]:
+        solver_policy.get_action_probabilities(other)
+    # least recently used info states are dropped
+    assert len(solver_policy._cache) == 2
+    assert state.information_state_string() not in solver_policy._cache
+
+    tabular = solver_policy.export_tabular(game)
+    assert tabular.get_action_probabilities(
+        state.information_state_string()) == expected
+    assert solver_policy.get_action_probabilities(state) is \
+        tabular.policy[state.information_state_string()]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+import darkhex.policy as policy
+from darkhex.utils.policy_distance import compare_policies
+
+
+def test_compare_policies():
+    policy_a = policy.SinglePlayerTabularPolicy(
+        {
+            "P0\n..\n..": {
+                0: 0.5,
+                3: 0.5
+            },
+            "P0\nx.\n..": {
+                1: 1.0
+            },
+            "P0\n.x\n..": {
+                0: 1.0
+            },
+        }, (2, 2), "P0\n..\n..", 0)
+    policy_b = policy.SinglePlayerTabularPolicy(
+        {
+            "P0\n..\n..": {
+                0: 0.25,
+                3: 0.75
+            },
+            "P0\nx.\n..": [(1, 1.0)],
+            "P0\n..\nx.": {
+                1: 1.0
+            },
+        }, (2, 2), "P0\n..\n..", 0)
+    comparison = compare_policies(policy_a, policy_b)
+    assert comparison.info_states == ["P0\n..\n..", "P0\nx.\n.."]
+    assert np.allclose(comparison.total_variation, [0.25, 0.0])
+    assert np.allclose(comparison.max_deviation, [0.25, 0.0])
+    expected_kl = 0.5 * np.log(0.5 / 0.25) + 0.5 * np.log(0.5 / 0.75)
+    assert np.allclose(comparison.kl, [expected_kl, 0.0])
+    assert comparison.max_total_variation == pytest.approx(0.25)
+    assert comparison.mean_total_variation == pytest.approx(0.125)
+    assert comparison.missing_in_a == ["P0\n..\nx."]
+    assert comparison.missing_in_b == ["P0\n.x\n.."]
+
+    # a canonical policy compares through the rotated states
+    policy_b.canonicalize()
+    comparison = compare_policies(policy_a.freeze(), policy_b)
+    assert "P0\n.x\n.." not in comparison.missing_in_b
+    # b plays 1 in the rotation of .x\n.., so 2 in it, while a plays 0
+    i = comparison.info_states.index("P0\n.x\n..")
+    assert comparison.total_variation[i] == pytest.approx(1.0)
+
+    with pytest.raises(ValueError):
+        compare_policies(
+            policy_a,
+            policy.SinglePlayerTabularPolicy({"P1\n..\n..": {
+                0: 1.0
+            }}, (2, 2), "P1\n..\n..", 1))
+
+
+def test_compare_same_policy():
+    tabular = policy.SinglePlayerTabularPolicy("4x3_white_hp_pr")
+    comparison = compare_policies(tabular, tabular.freeze())
+    assert len(comparison.info_states) == len(tabular.policy)
+    assert comparison.max_total_variation < 1e-6
+    assert comparison.max_kl < 1e-6
+    assert not comparison.missing_in_a and not comparison.missing_in_b
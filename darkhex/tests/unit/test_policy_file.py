@@ -0,0 +1,86 @@
+import pytest
+import darkhex.utils.util as util
+import darkhex.policy as policy
+from darkhex.utils.policy_file import (PolicyFile, convert_binary_to_pkl,
+                                       convert_pkl_to_binary,
+                                       write_policy_file)
+
+
+def _close(action_probs_1, action_probs_2):
+    action_probs_1 = dict(action_probs_1)
+    action_probs_2 = dict(action_probs_2)
+    return action_probs_1.keys() == action_probs_2.keys() and all(
+        abs(p - action_probs_2[a]) < 1e-6 for a, p in action_probs_1.items())
+
+
+def test_convert_pkl_to_binary(tmp_path):
+    pkl_path = util.PathVars.policies + "4x3_white_hp_pr/policy.pkl"
+    data = util.load_file(pkl_path)
+    binary_path = str(tmp_path / "policy.bin")
+    convert_pkl_to_binary(pkl_path, binary_path)
+
+    memmap_policy = policy.MemmapPolicy(binary_path)
+    assert memmap_policy.board_size == (4, 3)
+    assert memmap_policy.player == data.player
+    assert memmap_policy.initial_state == data.initial_state
+    assert len(memmap_policy.policy) == len(data.policy)
+    for info_state, action_probs in data.policy.items():
+        assert _close(memmap_policy.get_action_probabilities(info_state),
+                      action_probs)
+    with pytest.raises(KeyError):
+        memmap_policy.get_action_probabilities("P1\nxxx\n...\n...\n...\n")
+
+    new_pkl_path = str(tmp_path / "policy.pkl")
+    convert_binary_to_pkl(binary_path, new_pkl_path)
+    new_data = util.load_file(new_pkl_path)
+    assert new_data.policy.keys() == data.policy.keys()
+    for info_state, action_probs in data.policy.items():
+        assert isinstance(new_data.policy[info_state], list)
+        assert _close(new_data.policy[info_state], action_probs)
+
+
+def test_policy_file_formats(tmp_path):
+    # flat connection keys and dictionary values are kept as they are
+    policy_dict = {
+        "P0 .........": {
+            0: 0.25,
+            4: 0.75
+        },
+        "P0 y...o....": {
+            8: 1.0
+        },
+        "P0 ........z": {
+            0: 1.0
+        },
+    }
+    path = str(tmp_path / "policy.bin")
+    write_policy_file(policy_dict, path, (3, 3), "P0 .........", 0)
+    policy_file = PolicyFile(path)
+    assert "P0\nx..\n.o.\n..." in policy_file
+    assert "P1 ........." not in policy_file
+    assert policy_file.to_dict() == policy_dict
+
+    tabular = policy.SinglePlayerTabularPolicy(policy_dict, (3, 3),
+                                               "P0 .........", 0)
+    tabular.canonicalize()
+    tabular.save_policy_to_binary(path)
+    memmap_policy = policy.MemmapPolicy(path)
+    assert memmap_policy.is_canonical
+    for info_state, action_probs in policy_dict.items():
+        assert memmap_policy.get_action_probabilities(
+            info_state) == action_probs
+
+
+def test_policy_file_duplicate_keys(tmp_path):
+    # the same board in two formats
+    policy_dict = {
+        "P0 y........": {
+            1: 1.0
+        },
+        "P0\nx..\n...\n...": {
+            2: 1.0
+        },
+    }
+    with pytest.raises(ValueError, match="same key"):
+        write_policy_file(policy_dict, str(tmp_path / "policy.bin"), (3, 3),
+                          "P0 .........", 0)
@@ -0,0 +1,91 @@
+import pickle
+import darkhex.utils.util as util
+import darkhex.policy as policy
+from darkhex.utils.policy_store import SqlitePolicyStore
+from darkhex.gui.strategy_generator import StrategyGenerator
+
+
+def test_policy_store(tmp_path):
+    path = str(tmp_path / "policy.db")
+    store = SqlitePolicyStore(path, batch_size=2)
+    store.set_metadata(board_size=(2, 2), player=0)
+    store.put("P0\n..\n..", {0: 0.25, 3: 0.75})
+    # buffered writes are visible before they are flushed
+    reader = SqlitePolicyStore(path)
+    assert "P0\n..\n.." in store
+    assert "P0\n..\n.." not in reader
+    store.put("P0\nx.\n..", [(1, 1.0)])
+    assert reader["P0\nx.\n.."] == [(1, 1.0)]
+    assert reader["P0\n..\n.."] == {0: 0.25, 3: 0.75}
+    assert reader.metadata == {"board_size": [2, 2], "player": 0}
+
+    store.put("P0\n.x\n..", {2: 1.0})
+    assert len(store) == 3
+    store.delete("P0\nx.\n..")
+    assert set(reader) == {"P0\n..\n..", "P0\n.x\n.."}
+    assert dict(reader.items()) == {
+        "P0\n..\n..": {0: 0.25, 3: 0.75},
+        "P0\n.x\n..": {2: 1.0}
+    }
+    copy = pickle.loads(pickle.dumps(reader))
+    assert copy["P0\n.x\n.."] == {2: 1.0}
+    store.close()
+    reader.close()
+    copy.close()
+
+
+def test_policy_from_store(tmp_path):
+    tabular = policy.SinglePlayerTabularPolicy("4x3_white_hp_pr")
+    path = str(tmp_path / "policy.db")
+    tabular.save_policy_to_sqlite(path)
+
+    stored = policy.SinglePlayerTabularPolicy(path)
+    assert stored.player == tabular.player
+    assert stored.board_size == tabular.board_size
+    assert stored.initial_state == tabular.initial_state
+    assert stored.is_perfect_recall == tabular.is_perfect_recall
+    assert len(stored.policy) == len(tabular.policy)
+    for info_state in tabular.policy:
+        assert stored.get_action_probabilities(info_state) == \
+            tabular.get_action_probabilities(info_state)
+
+
+def test_update_policy_in_store(tmp_path):
+    path = str(tmp_path / "policy.db")
+    policy.SinglePlayerTabularPolicy("4x3_white_hp_pr").save_policy_to_sqlite(
+        path)
+    stored = policy.SinglePlayerTabularPolicy(path)
+    info_state = next(iter(stored.policy))
+    num_info_states = len(stored.policy)
+    stored.set_action_probabilities(info_state, {0: 1.0})
+    assert stored.get_action_probabilities(info_state) == {0: 1.0}
+    stored.policy["P1\nxxx\n...\n...\n...\n"] = {3: 1.0}
+    # writes are buffered until the batch is flushed
+    reader = SqlitePolicyStore(path)
+    assert reader[info_state] != {0: 1.0}
+    stored.policy.flush()
+    assert reader[info_state] == {0: 1.0}
+    assert len(reader) == num_info_states + 1
+    del stored.policy["P1\nxxx\n...\n...\n...\n"]
+    assert len(reader) == num_info_states
+    stored.policy.close()
+    reader.close()
+
+
+def test_strategy_generator_store(tmp_path):
+    store = SqlitePolicyStore(str(tmp_path / "policy.db"))
+    strat_gen = StrategyGenerator("P0\n..\n..", 2, 2, 0, store=store)
+    strat_gen.iterate_board("0")
+    assert set(store) == set(strat_gen.info_states)
+    assert store["P0\n..\n.."] == [(0, 1.0)]
+    # states removed by the history buffer are removed from the store
+    strat_gen.iterate_board("1")
+    assert set(store) == set(strat_gen.info_states)
+    # only the info states touched by a move are written
+    assert strat_gen._dirty_info_states == set()
+    strat_gen.history_buffer.rewind()
+    assert strat_gen._dirty_info_states == set(store) - set(
+        strat_gen.info_states)
+    strat_gen.history_buffer.restart()
+    strat_gen._sync_store()
+    assert len(store) == 0
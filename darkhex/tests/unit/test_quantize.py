@@ -0,0 +1,52 @@
+import pickle
+import darkhex.utils.util as util
+import darkhex.policy as policy
+from darkhex.utils.quantize import FIXED_POINT_SCALE, quantize_policy
+
+
+def test_quantize_policy():
+    policy_dict = {
+        "P0\n..\n..": {
+            0: 1 / 3,
+            3: 2 / 3
+        },
+        "P0\nx.\n..": {
+            1: 1.0
+        },
+        "P0\n.x\n..": {
+            0: 0.123456,
+            2: 0.876544
+        },
+    }
+    table, report = quantize_policy(policy_dict, max_denominator=6)
+    assert (report.num_deterministic, report.num_fraction,
+            report.num_fixed) == (1, 1, 1)
+    assert report.max_error <= 0.5 / FIXED_POINT_SCALE
+    assert table["P0\n..\n.."] == {0: 1 / 3, 3: 2 / 3}
+    assert table["P0\nx.\n.."] == {1: 1.0}
+    action_probs = table["P0\n.x\n.."]
+    assert action_probs.keys() == {0, 2}
+    assert abs(sum(action_probs.values()) - 1) < 1e-12
+    assert "P1\n..\n.." not in table
+
+    # without fractions every stochastic state is fixed point
+    table, report = quantize_policy(policy_dict)
+    assert report.num_fixed == 2
+    assert abs(table["P0\n..\n.."][0] - 1 / 3) <= 0.5 / FIXED_POINT_SCALE
+
+
+def test_quantized_tabular_policy(tmp_path):
+    tabular = policy.SinglePlayerTabularPolicy("4x3_white_hp_pr")
+    original = dict(tabular.policy)
+    report = tabular.quantize(max_denominator=12)
+    assert report.num_states == len(original)
+    assert len(pickle.dumps(tabular.policy)) < len(pickle.dumps(original))
+    path = str(tmp_path / "quantized" / "policy.pkl")
+    tabular.save_policy_to_file(path)
+
+    loaded = policy.SinglePlayerTabularPolicy(path)
+    for info_state, action_probs in original.items():
+        quantized = loaded.get_action_probabilities(info_state)
+        assert [a for a, _ in quantized] == [a for a, _ in action_probs]
+        for (_, p), (_, q) in zip(action_probs, quantized):
+            assert abs(p - q) <= report.max_error
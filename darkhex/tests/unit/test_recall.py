@@ -0,0 +1,54 @@
+import pytest
+import darkhex.policy as policy
+from darkhex.utils.recall import (expand_to_perfect_recall,
+                                  own_reach_probabilities,
+                                  project_to_imperfect_recall)
+
+
+def test_own_reach_probabilities():
+    pr_policy = {
+        "P0\n..\n..\n": {
+            0: 0.25,
+            1: 0.75
+        },
+        "P0\nx.\n..\n0,0 ": {
+            3: 1.0
+        },
+        # the opponent stone was revealed, so the player moves again
+        "P0\n.o\n..\n0,1 ": {
+            0: 0.5,
+            2: 0.5
+        },
+        "P0\nxo\n..\n0,1 0,0 ": {
+            3: 1.0
+        },
+    }
+    reach = own_reach_probabilities(pr_policy, 2, 2)
+    assert reach == {
+        "P0\n..\n..\n": 1.0,
+        "P0\nx.\n..\n0,0 ": 0.25,
+        "P0\n.o\n..\n0,1 ": 0.75,
+        "P0\nxo\n..\n0,1 0,0 ": 0.375,
+    }
+
+
+def test_project_and_expand():
+    tabular = policy.SinglePlayerTabularPolicy("4x3_white_hp_pr")
+    ir = tabular.to_imperfect_recall()
+    assert not ir.is_perfect_recall
+    assert ir.initial_state == "P1\n...\n...\n...\n..."
+    assert ir.player == tabular.player
+    for action_probs in ir.policy.values():
+        assert sum(p for _, p in action_probs) == pytest.approx(1.0)
+
+    pr = ir.to_perfect_recall()
+    assert pr.is_perfect_recall
+    assert pr.initial_state == tabular.initial_state
+    # every reachable PR state is expanded again, with its IR distribution
+    assert set(tabular.policy) <= set(pr.policy)
+    ir_policy = project_to_imperfect_recall(tabular.policy, 4, 3)
+    pr_policy = expand_to_perfect_recall(ir_policy, tabular.initial_state, 4,
+                                         3)
+    assert pr_policy == pr.policy
+    with pytest.raises(ValueError):
+        ir.to_imperfect_recall()
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from darkhex.algorithms import regret_matching
+
+OFFSETS = np.array([0, 3, 5])
+NUM_ACTIONS = np.array([3, 2, 4])
+
+
+def test_current_strategy():
+    regrets = np.array([-1., 1., 3., -2., -1., 0., 2., 2., 4.])
+    strategy = regret_matching.current_strategy(regrets, OFFSETS, NUM_ACTIONS)
+    assert np.allclose(strategy,
+                       [0, .25, .75, .5, .5, 0, .25, .25, .5])
+    assert regrets[0] == -1.
+
+
+def test_average_strategy():
+    weights = np.array([1., 1., 2., 0., 0., 0., 0., 3., 1.])
+    average = regret_matching.average_strategy(weights, OFFSETS, NUM_ACTIONS)
+    assert np.allclose(average, [.25, .25, .5, .5, .5, 0, 0, .75, .25])
+    assert weights[0] == 1.
+
+
+def test_accumulate():
+    instant = np.array([1., -2.])
+    policy_weights = np.array([.5, .5])
+
+    regrets, avg_policy = np.array([0., 1.]), np.zeros(2)
+    regret_matching.accumulate(regrets, avg_policy, instant, policy_weights,
+                               3, "cfr+")
+    assert np.allclose(regrets, [1., 0.])
+    assert np.allclose(avg_policy, [1.5, 1.5])
+
+    regrets, avg_policy = np.zeros(2), np.zeros(2)
+    regret_matching.accumulate(regrets, avg_policy, instant, policy_weights,
+                               2, "linear")
+    assert np.allclose(regrets, [2., -4.])
+    assert np.allclose(avg_policy, [1., 1.])
+
+    regrets, avg_policy = np.zeros(2), np.zeros(2)
+    regret_matching.accumulate(regrets, avg_policy, instant, policy_weights,
+                               1, "dcfr")
+    assert np.allclose(regrets, [.5, -1.])
+    assert np.allclose(avg_policy, [.5, .5])
+
+    with pytest.raises(ValueError):
+        regret_matching.accumulate(regrets, avg_policy, instant,
+                                   policy_weights, 1, "unknown")
+
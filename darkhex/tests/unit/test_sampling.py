@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import darkhex.utils.util as util
+import darkhex.policy as policy
+from darkhex.utils.bitboard import Bitboard
+from darkhex.utils.sampling import AliasTable
+
+
+def test_alias_table():
+    table = AliasTable([3, 5, 7, 9], [0.1, 0.0, 0.6, 0.3])
+    rng = np.random.default_rng(0)
+    samples = table.sample_many(20000, rng)
+    assert 5 not in samples
+    for action, prob in [(3, 0.1), (7, 0.6), (9, 0.3)]:
+        assert abs((samples == action).mean() - prob) < 0.02
+    single = [table.sample(rng) for _ in range(5000)]
+    assert abs(single.count(7) / 5000 - 0.6) < 0.03
+    assert AliasTable.from_action_probs({4: 1.0}).sample(rng) == 4
+    pytest.raises(ValueError, AliasTable, [], [])
+    pytest.raises(ValueError, AliasTable, [0], [0.0])
+
+
+def test_policy_sample_action():
+    tabular = policy.TabularPolicy({"P0\n..\n..": [(0, 0.5), (3, 0.5)]},
+                                   (2, 2), "P0\n..\n..")
+    actions = [
+        tabular.sample_action("P0\n..\n..", np.random.default_rng(seed))
+        for seed in range(50)
+    ]
+    assert set(actions) == {0, 3}
+    # the same seed gives the same samples
+    assert actions == [
+        tabular.sample_action("P0\n..\n..", np.random.default_rng(seed))
+        for seed in range(50)
+    ]
+
+
+def test_policy_sample_action_after_update():
+    tabular = policy.TabularPolicy({"P0\n..\n..": {0: 1.0}}, (2, 2),
+                                   "P0\n..\n..")
+    rng = np.random.default_rng(0)
+    assert tabular.sample_action("P0\n..\n..", rng) == 0
+    tabular.set_action_probabilities("P0\n..\n..", {3: 1.0})
+    assert tabular.sample_action("P0\n..\n..", rng) == 3
+    tabular.set_action_probabilities("P0\n..\n..", {1: 0.5, 2: 0.5})
+    tabular.quantize()
+    assert {tabular.sample_action("P0\n..\n..") for _ in range(50)} == {1, 2}
+    tabular.canonicalize()
+    assert {tabular.sample_action("P0\n..\n..") for _ in range(50)} == {1, 2}
+    tabular.set_action_probabilities("P0\n..\n..", {0: 1.0})
+    assert tabular.sample_action("P0\n..\n..") == 0
+
+
+def test_random_action_rng():
+    board = "x.\n.o"
+    actions = {
+        util.get_random_action(board, np.random.default_rng(seed))
+        for seed in range(30)
+    }
+    assert actions == {1, 2}
+    assert util.get_random_action(Bitboard.from_board(board),
+                                  np.random.default_rng(1)) == \
+        util.get_random_action(board, np.random.default_rng(1))
@@ -0,0 +1,101 @@
+import os
+import json
+import itertools
+import darkhex.utils.util as util
+import darkhex.policy as policy
+from darkhex.utils.info_state import InfoStateCodec
+from darkhex.utils.sharded_policy import (ShardedPolicyTable, is_sharded_policy,
+                                          shard_of, write_sharded_policy)
+
+
+def test_sharded_policy_round_trip(tmp_path):
+    data = util.load_file(util.PathVars.policies + "4x3_white_hp_pr/policy.pkl")
+    directory = str(tmp_path / "shards")
+    write_sharded_policy(data.policy, directory, data.board_size,
+                         data.initial_state, data.player,
+                         data.is_perfect_recall, num_shards=8)
+    assert is_sharded_policy(directory)
+    assert not is_sharded_policy(str(tmp_path))
+
+    table = ShardedPolicyTable(directory)
+    assert len(table) == len(data.policy)
+    assert set(table) == set(data.policy)
+    for info_state, action_probs in data.policy.items():
+        assert info_state in table
+        assert table[info_state] == action_probs
+    assert "P1\nxxx\n...\n...\n...\n" not in table
+
+
+def test_sharded_policy_memory_budget(tmp_path):
+    policy_dict = {
+        f"P0\n{'.' * i}x{'.' * (8 - i)}": {i: 1.0} for i in range(9)
+    }
+    directory = str(tmp_path / "shards")
+    write_sharded_policy(policy_dict, directory, (3, 3), num_shards=4)
+    # a zero budget keeps only the last used shard
+    table = ShardedPolicyTable(directory, memory_budget=0)
+    for info_state, action_probs in policy_dict.items():
+        assert table[info_state] == action_probs
+        assert len(table.resident_shards) == 1
+    table = ShardedPolicyTable(directory)
+    for info_state in policy_dict:
+        table[info_state]
+    assert sorted(table.resident_shards) == [
+        shard for shard, num_states in enumerate(
+            table.manifest["shard_states"]) if num_states > 0
+    ]
+
+
+def test_single_player_policy_from_shards(tmp_path):
+    tabular = policy.SinglePlayerTabularPolicy("4x3_white_hp_pr")
+    directory = str(tmp_path / "4x3_white_hp_pr")
+    tabular.save_policy_to_shards(directory, num_shards=4)
+    assert os.path.isfile(os.path.join(directory, "manifest.json"))
+
+    sharded = policy.SinglePlayerTabularPolicy(directory, memory_budget=0)
+    assert isinstance(sharded.policy, ShardedPolicyTable)
+    assert sharded.player == tabular.player
+    assert sharded.board_size == tabular.board_size
+    assert sharded.initial_state == tabular.initial_state
+    assert sharded.is_perfect_recall == tabular.is_perfect_recall
+    for info_state in tabular.policy:
+        assert sharded.get_action_probabilities(info_state) == \
+            tabular.get_action_probabilities(info_state)
+
+
+def test_sharded_policy_balance():
+    # every 3x3 board seen by player 0, the codec keys of these only differ
+    # in their higher bits
+    codec = InfoStateCodec(3, 3)
+    counts = [0] * 16
+    for board in itertools.product(".xo", repeat=9):
+        info_state = "P0\n" + util.flat_board_to_layered("".join(board), 3)
+        counts[shard_of(codec, info_state, 16)] += 1
+    mean = 3**9 / 16
+    assert min(counts) > 0.9 * mean
+    assert max(counts) < 1.1 * mean
+
+
+def test_sharded_policy_version_1(tmp_path):
+    policy_dict = {
+        f"P0\n{'.' * i}x{'.' * (8 - i)}": {i: 1.0} for i in range(9)
+    }
+    codec = InfoStateCodec(3, 3)
+    directory = str(tmp_path / "shards")
+    write_sharded_policy(policy_dict, directory, (3, 3), num_shards=4)
+    # rewrite the directory the way version 1 laid it out
+    shards = [{} for _ in range(4)]
+    for info_state, action_probs in policy_dict.items():
+        shards[shard_of(codec, info_state, 4, 1)][info_state] = action_probs
+    for shard, shard_policy in enumerate(shards):
+        util.save_file(shard_policy,
+                       os.path.join(directory, f"shard_{shard:04d}.pkl"))
+    manifest_path = os.path.join(directory, "manifest.json")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest["version"] = 1
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    table = ShardedPolicyTable(directory)
+    for info_state, action_probs in policy_dict.items():
+        assert table[info_state] == action_probs
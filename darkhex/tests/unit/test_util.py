@@ -1,6 +1,7 @@
 import pytest
 import darkhex.utils.util as util
 from darkhex import cellState
+from darkhex.utils.geometry import get_geometry
 
 
 def test_dotdict():
@@ -230,3 +231,33 @@ def test_policy_tuple_to_policy_dict():
     assert dict_policy["P0\n...\n...\n..."] == {0: 1.}
     assert dict_policy["P0\nx..\n...\n..."] == {1: 0.5, 2: 0.5}
     assert dict_policy["P0\nxx.\n...\n..."] == {2: 1.}
+
+
+def test_get_geometry():
+    geometry = get_geometry(3, 4)
+    assert geometry is get_geometry(3, 4)
+    for cell in range(12):
+        assert set(geometry.neighbours[cell]) == set(
+            util.neighbour_indexes(cell, 4, 3))
+        assert geometry.neighbour_masks[cell] == sum(
+            1 << n for n in geometry.neighbours[cell])
+        assert geometry.labels[cell] == \
+            util.convert_position_to_alphanumeric(cell, 4)
+        assert geometry.positions[geometry.labels[cell]] == cell
+    assert geometry.north_cells == (0, 1, 2, 3)
+    assert geometry.south_cells == (8, 9, 10, 11)
+    assert geometry.west_cells == (0, 4, 8)
+    assert geometry.east_cells == (3, 7, 11)
+    assert geometry.layered("x...o.......") == "x...\no...\n...."
+
+
+def test_set_log_level():
+    import logging
+    from darkhex import logger, set_log_level
+    level = logger.level
+    set_log_level("debug")
+    assert logger.isEnabledFor(logging.DEBUG)
+    set_log_level(logging.WARNING)
+    assert not logger.isEnabledFor(logging.INFO)
+    pytest.raises(ValueError, set_log_level, "loud")
+    set_log_level(level)
@@ -0,0 +1,52 @@
+import pytest
+from darkhex.utils.bitboard import Bitboard
+from darkhex.utils.info_state import InfoState
+from darkhex.utils.zobrist import TranspositionTable, get_zobrist_table
+
+
+def test_bitboard_zobrist_incremental():
+    board = Bitboard(3, 3)
+    assert board.zobrist == 0
+    moved = board.after_action(4, 0).after_action(2, 1)
+    # the hash is carried along, and matches a hash computed from scratch
+    assert moved._zobrist is not None
+    assert moved.zobrist == Bitboard.from_board("..o\n.x.\n...").zobrist
+    # move order does not matter
+    assert moved.zobrist == board.after_action(2, 1).after_action(4, 0).zobrist
+    assert moved.zobrist != board.after_action(4, 1).after_action(2, 0).zobrist
+
+
+def test_info_state_zobrist_incremental():
+    for perfect_recall in [False, True]:
+        info_state = InfoState.from_string("P0\n...\n...\n...\n", 3, 3,
+                                           perfect_recall)
+        info_state.zobrist
+        new = info_state.after_action(4, 0).after_action(2, 0)
+        parsed = InfoState.from_string(str(new), 3, 3, perfect_recall)
+        assert new._zobrist is not None
+        assert new.zobrist == parsed.zobrist
+        swapped = info_state.after_action(2, 0).after_action(4, 0)
+        assert (swapped.zobrist == new.zobrist) != perfect_recall
+    assert InfoState.from_string("P0\nx..\n...\n...").zobrist != \
+        InfoState.from_string("P1\nx..\n...\n...").zobrist
+
+
+def test_transposition_table():
+    table = TranspositionTable(debug=True)
+    a = InfoState.from_string("P0\nx..\n...\n...")
+    b = InfoState.from_string("P1\n..o\n...\n...")
+    table[(a, b)] = 1
+    assert (a, b) in table
+    assert (b, a) not in table
+    assert table.get(a) is None
+    assert table[(a, b)] == 1
+    assert len(table) == 1
+    # force a collision by using the same hash for a different key
+    c = InfoState.from_string("P0\n.x.\n...\n...")
+    object.__setattr__(c, "_zobrist", a.zobrist)
+    table[a] = 2
+    pytest.raises(ValueError, table.__contains__, c)
+    fast_table = TranspositionTable(debug=False)
+    fast_table[a] = 2
+    assert c in fast_table
+    assert get_zobrist_table(3, 3) is get_zobrist_table(3, 3)
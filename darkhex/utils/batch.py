@@ -0,0 +1,212 @@
+"""
+Batch board evaluation over NumPy arrays. A batch of boards is an (N, cells)
+int8 array holding one code per cell, the index of the cell's character in
+CELL_CODES. The functions here give the same answers as their scalar versions
+in util, one array entry per board.
+"""
+import typing
+import numpy as np
+
+from darkhex import cellState
+
+# Cell codes; 0 is empty, 1 and 2 are the plain black and white stones.
+CELL_CODES = (
+    cellState.kEmpty,
+    cellState.kBlack,
+    cellState.kWhite,
+    cellState.kBlackNorth,
+    cellState.kBlackSouth,
+    cellState.kBlackWin,
+    cellState.kWhiteWest,
+    cellState.kWhiteEast,
+    cellState.kWhiteWin,
+)
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+
+# Byte value to cell code, -1 for characters that are not cells.
+_ENCODE = np.full(256, -1, dtype=np.int8)
+for _code, _piece in enumerate(CELL_CODES):
+    _ENCODE[ord(_piece)] = _code
+_DECODE = np.array([ord(c) for c in CELL_CODES], dtype=np.uint8)
+_IS_BLACK = np.array([c in cellState.black_pieces for c in CELL_CODES])
+_IS_WHITE = np.array([c in cellState.white_pieces for c in CELL_CODES])
+_IS_WIN = np.array(
+    [c in (cellState.kBlackWin, cellState.kWhiteWin) for c in CELL_CODES])
+
+
+def boards_to_array(boards: typing.Sequence[str]) -> np.ndarray:
+    """
+    Encodes boards into a batch array.
+
+    Args:
+        boards (typing.Sequence[str]): Boards of the same size. [:, :]
+    Returns:
+        np.ndarray: The (N, cells) int8 array.
+    """
+    flat = [board.replace("\n", "") for board in boards]
+    if not flat:
+        return np.zeros((0, 0), dtype=np.int8)
+    num_cells = len(flat[0])
+    if any(len(board) != num_cells for board in flat):
+        raise ValueError("Boards must have the same number of cells")
+    data = np.frombuffer("".join(flat).encode(), dtype=np.uint8)
+    array = _ENCODE[data].reshape(len(flat), num_cells)
+    if (array < 0).any():
+        raise ValueError("Boards contain characters that are not cells")
+    return array
+
+
+def array_to_boards(array: np.ndarray,
+                    num_cols: int = None) -> typing.List[str]:
+    """
+    Decodes a batch array into boards.
+
+    Args:
+        array (np.ndarray): The (N, cells) int8 array.
+        num_cols (int): If given, the boards are layered with this many
+            columns. Otherwise they are flat.
+    Returns:
+        typing.List[str]: The boards.
+    """
+    num_cells = array.shape[1]
+    data = _DECODE[array].tobytes().decode()
+    boards = [data[i:i + num_cells] for i in range(0, len(data), num_cells)]
+    if num_cols is None:
+        return boards
+    return [
+        "\n".join(board[i:i + num_cols] for i in range(0, num_cells, num_cols))
+        for board in boards
+    ]
+
+
+def piece_counts(
+        boards: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Counts the pieces on each board.
+
+    Args:
+        boards (np.ndarray): The (N, cells) int8 array.
+    Returns:
+        np.ndarray: The number of black pieces.
+        np.ndarray: The number of white pieces.
+        np.ndarray: The number of empty cells.
+    """
+    black = _IS_BLACK[boards].sum(axis=1)
+    white = _IS_WHITE[boards].sum(axis=1)
+    return black, white, boards.shape[1] - black - white
+
+
+def legal_action_mask(boards: np.ndarray) -> np.ndarray:
+    """ (N, cells) boolean array of the empty cells. """
+    return boards == EMPTY
+
+
+def is_collusion_possible(boards: np.ndarray, player: int) -> np.ndarray:
+    """
+    Batch version of util.is_collusion_possible.
+
+    Args:
+        boards (np.ndarray): The (N, cells) int8 array.
+        player (int): The player to check for collusion.
+    Returns:
+        np.ndarray: Boolean array, one entry per board.
+    """
+    black, white, _ = piece_counts(boards)
+    if player == 1:
+        return black <= white
+    return white < black
+
+
+def _dilate(mask: np.ndarray) -> np.ndarray:
+    """ Adds the hex neighbours of the cells of (N, rows, cols) masks. """
+    grown = mask.copy()
+    grown[:, :, 1:] |= mask[:, :, :-1]
+    grown[:, :, :-1] |= mask[:, :, 1:]
+    grown[:, 1:, :] |= mask[:, :-1, :]
+    grown[:, :-1, :] |= mask[:, 1:, :]
+    grown[:, 1:, :-1] |= mask[:, :-1, 1:]
+    grown[:, :-1, 1:] |= mask[:, 1:, :-1]
+    return grown
+
+
+def is_connected(boards: np.ndarray, num_rows: int, num_cols: int,
+                 player: int) -> np.ndarray:
+    """
+    Checks if the player connected their edges on each board, same as
+    Bitboard.is_connected. Works with xo and connection boards.
+
+    Args:
+        boards (np.ndarray): The (N, cells) int8 array.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+        player (int): The player to check the connection for.
+    Returns:
+        np.ndarray: Boolean array, one entry per board.
+    """
+    is_piece = _IS_WHITE if player else _IS_BLACK
+    stones = is_piece[boards].reshape(-1, num_rows, num_cols)
+    if player == 0:
+        if num_rows < 2:
+            return np.zeros(len(boards), dtype=bool)
+        start = np.zeros_like(stones)
+        start[:, 0, :] = stones[:, 0, :]
+    else:
+        if num_cols < 2:
+            return np.zeros(len(boards), dtype=bool)
+        start = np.zeros_like(stones)
+        start[:, :, 0] = stones[:, :, 0]
+    reached = start
+    while True:
+        grown = _dilate(reached) & stones
+        if np.array_equal(grown, reached):
+            break
+        reached = grown
+    if player == 0:
+        return reached[:, -1, :].any(axis=1)
+    return reached[:, :, -1].any(axis=1)
+
+
+def winners(boards: np.ndarray, num_rows: int, num_cols: int) -> np.ndarray:
+    """
+    The player that connected their edges on each board.
+
+    Args:
+        boards (np.ndarray): The (N, cells) int8 array.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        np.ndarray: int8 array, 0 or 1 for the winner, -1 for no winner.
+    """
+    result = np.full(len(boards), -1, dtype=np.int8)
+    result[is_connected(boards, num_rows, num_cols, 1)] = 1
+    result[is_connected(boards, num_rows, num_cols, 0)] = 0
+    return result
+
+
+def is_board_terminal(boards: np.ndarray,
+                      player: int,
+                      num_rows: int = None,
+                      num_cols: int = None) -> np.ndarray:
+    """
+    Batch version of util.is_board_terminal. Like the scalar version, a win is
+    only seen on connection boards through the X/O cells. If the board size is
+    given, connections are detected as well, same as Bitboard.is_terminal, so
+    xo boards can be used directly.
+
+    Args:
+        boards (np.ndarray): The (N, cells) int8 array.
+        player (int): The player to check for.
+        num_rows (int): The number of rows in the board, for connections.
+        num_cols (int): The number of columns in the board, for connections.
+    Returns:
+        np.ndarray: Boolean array, one entry per board.
+    """
+    terminal = _IS_WIN[boards].any(axis=1)
+    if num_rows is not None and num_cols is not None:
+        terminal |= winners(boards, num_rows, num_cols) != -1
+    black, white, empty = piece_counts(boards)
+    if player == 0:
+        return terminal | (white + empty == black)
+    return terminal | (black + empty == white + 1)
@@ -0,0 +1,302 @@
+"""
+Bitboard representation of a Dark Hex board. Black and white stones are kept
+as two integer masks where bit ``i`` is the cell ``i`` of the flat board, so
+the board operations in util can be done with bitwise arithmetic instead of
+rebuilding strings.
+"""
+import typing
+import numpy as np
+
+from darkhex import cellState
+from darkhex.utils.geometry import BoardGeometry, get_geometry
+from darkhex.utils.zobrist import get_zobrist_table
+
+# Translation tables from board characters to bit characters, row separators
+# are dropped. Any character that is not a cellState value is left untouched
+# so int() fails on it.
+_ALL_CELLS = [cellState.kEmpty] + cellState.black_pieces + cellState.white_pieces
+_BLACK_BITS = str.maketrans(
+    {c: "1" if c in cellState.black_pieces else "0" for c in _ALL_CELLS})
+_BLACK_BITS[ord("\n")] = None
+_WHITE_BITS = str.maketrans(
+    {c: "1" if c in cellState.white_pieces else "0" for c in _ALL_CELLS})
+_WHITE_BITS[ord("\n")] = None
+
+# Cell of each mask given to _render, in order.
+_MASK_CELLS = (cellState.kBlack, cellState.kWhite, cellState.kBlackNorth,
+               cellState.kBlackSouth, cellState.kBlackWin,
+               cellState.kWhiteWest, cellState.kWhiteEast,
+               cellState.kWhiteWin)
+
+
+def _render(masks: typing.List[int], num_cells: int) -> str:
+    """
+    Renders disjoint masks into a flat board string. Every cell of the k'th
+    mask gets _MASK_CELLS[k], the other cells are empty.
+
+    Args:
+        masks (typing.List[int]): Disjoint masks, in _MASK_CELLS order.
+        num_cells (int): The number of cells on the board.
+    Returns:
+        str: The flat board. [flat, :]
+    """
+    cells = [cellState.kEmpty] * num_cells
+    for cell, mask in zip(_MASK_CELLS, masks):
+        while mask:
+            low = mask & -mask
+            cells[low.bit_length() - 1] = cell
+            mask ^= low
+    return "".join(cells)
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def _dilate(geometry: BoardGeometry, mask: int) -> int:
+    """ Adds the hex neighbours of every cell in the mask to the mask. """
+    n = geometry.num_cols
+    west = geometry.west_mask
+    east = geometry.east_mask
+    return (mask | ((mask << 1) & ~west) | ((mask >> 1) & ~east) |
+            (mask << n) | (mask >> n) | ((mask << (n - 1)) & ~east) |
+            ((mask >> (n - 1)) & ~west)) & geometry.full_mask
+
+
+def _flood(geometry: BoardGeometry, seed: int, region: int) -> int:
+    """ Cells of the region connected to the seed through the region. """
+    current = seed & region
+    while True:
+        grown = _dilate(geometry, current) & region
+        if grown == current:
+            return current
+        current = grown
+
+
+class Bitboard:
+    """
+    Board state stored as black and white stone masks. Player 0 plays black and
+    connects north to south, player 1 plays white and connects west to east.
+    Bitboards are immutable, every move returns a new board. The Zobrist hash is
+    computed on first use and then carried along by after_action.
+    """
+    __slots__ = ("geometry", "black", "white", "_zobrist")
+
+    def __init__(self,
+                 num_rows: int,
+                 num_cols: int,
+                 black: int = 0,
+                 white: int = 0) -> None:
+        """
+        Args:
+            num_rows (int): The number of rows in the board.
+            num_cols (int): The number of columns in the board.
+            black (int): The mask of black stones.
+            white (int): The mask of white stones.
+        """
+        self.geometry = get_geometry(num_rows, num_cols)
+        self.black = black
+        self.white = white
+        self._zobrist = None
+
+    @classmethod
+    def from_masks(cls, geometry: BoardGeometry, black: int,
+                   white: int) -> "Bitboard":
+        """ Creates a bitboard without looking up the geometry. """
+        bitboard = object.__new__(cls)
+        bitboard.geometry = geometry
+        bitboard.black = black
+        bitboard.white = white
+        bitboard._zobrist = None
+        return bitboard
+
+    @classmethod
+    def from_board(cls, board: str, num_cols: int = None) -> "Bitboard":
+        """
+        Creates a bitboard from a board string. Both xo and connection boards
+        are accepted.
+
+        Args:
+            board (str): The board to convert. [:, :]
+            num_cols (int): The number of columns. Only needed for flat boards.
+        Returns:
+            Bitboard: The bitboard for the given board.
+        """
+        newline = board.find("\n")
+        if newline != -1:
+            num_cols = newline
+            board = board.replace("\n", "")
+        elif num_cols is None:
+            num_cols = len(board)
+        if len(board) % num_cols != 0:
+            raise ValueError(f"Board is not a multiple of num_cols: {board}")
+        return cls(len(board) // num_cols, num_cols,
+                   int(board.translate(_BLACK_BITS)[::-1], 2),
+                   int(board.translate(_WHITE_BITS)[::-1], 2))
+
+    @property
+    def num_rows(self) -> int:
+        return self.geometry.num_rows
+
+    @property
+    def num_cols(self) -> int:
+        return self.geometry.num_cols
+
+    @property
+    def num_cells(self) -> int:
+        return self.geometry.num_cells
+
+    @property
+    def empty(self) -> int:
+        """ Mask of the empty cells. """
+        return self.geometry.full_mask & ~(self.black | self.white)
+
+    @property
+    def zobrist(self) -> int:
+        """ Zobrist hash of the board. """
+        if self._zobrist is None:
+            self._zobrist = get_zobrist_table(
+                self.geometry.num_rows,
+                self.geometry.num_cols).board_hash(self.black, self.white)
+        return self._zobrist
+
+    def stones(self, player: int) -> int:
+        """ Mask of the stones of the given player. """
+        return self.white if player else self.black
+
+    def num_stones(self, player: int) -> int:
+        return _popcount(self.white if player else self.black)
+
+    def is_valid_action(self, action: int) -> bool:
+        return 0 <= action < self.num_cells and not (
+            (self.black | self.white) >> action) & 1
+
+    def legal_actions(self) -> typing.List[int]:
+        """ The empty cells in increasing order. """
+        actions = []
+        mask = self.empty
+        while mask:
+            low = mask & -mask
+            actions.append(low.bit_length() - 1)
+            mask ^= low
+        return actions
+
+    def after_action(self, action: int,
+                     player: int) -> typing.Union["Bitboard", bool]:
+        """
+        Places a stone of the player on the given cell.
+
+        Args:
+            action (int): The cell to place the stone on.
+            player (int): The player to place the stone for.
+        Returns:
+            Bitboard: The new board, or False if the cell is not empty.
+        """
+        bit = 1 << action
+        if (self.black | self.white) & bit:
+            return False
+        if player == 0:
+            new = Bitboard.from_masks(self.geometry, self.black | bit,
+                                      self.white)
+        else:
+            new = Bitboard.from_masks(self.geometry, self.black,
+                                      self.white | bit)
+        if self._zobrist is not None:
+            new._zobrist = self._zobrist ^ get_zobrist_table(
+                self.geometry.num_rows,
+                self.geometry.num_cols).cell_keys[player][action]
+        return new
+
+    def get_random_action(self, rng: np.random.Generator = None) -> int:
+        """ A random empty cell, -1 if the board is full. """
+        legal_actions = self.legal_actions()
+        if not legal_actions:
+            return -1
+        if rng is not None:
+            return legal_actions[rng.integers(len(legal_actions))]
+        return legal_actions[np.random.randint(len(legal_actions))]
+
+    # Connections
+
+    def _dilate(self, mask: int) -> int:
+        """ Adds the hex neighbours of every cell in the mask to the mask. """
+        return _dilate(self.geometry, mask)
+
+    def _flood(self, seed: int, region: int) -> int:
+        """ Cells of the region connected to the seed through the region. """
+        return _flood(self.geometry, seed, region)
+
+    def _component_masks(self, stones: int, start: int,
+                         end: int) -> typing.Tuple[int, int, int, int]:
+        """
+        Splits the stones of a player into the connection classes used by
+        convert_xo_to_board: (start, end, win, plain). Cells touching the end
+        edge are always marked end, and only the start group cells next to
+        them are marked as winning.
+        """
+        start_group = self._flood(start, stones)
+        end_seeds = stones & end
+        end_group = end_seeds | self._flood(end_seeds & ~start_group,
+                                            stones & ~start_group)
+        win = start_group & ~end & self._dilate(end & start_group)
+        return (start_group & ~end_group & ~win, end_group, win,
+                stones & ~start_group & ~end_group)
+
+    def is_connected(self, player: int) -> bool:
+        """ True if the player connected their edges. """
+        g = self.geometry
+        if player == 0:
+            return g.num_rows > 1 and self._flood(g.north_mask,
+                                                  self.black) & g.south_mask != 0
+        return g.num_cols > 1 and self._flood(g.west_mask,
+                                              self.white) & g.east_mask != 0
+
+    def is_collusion_possible(self, player: int) -> bool:
+        """ See util.is_collusion_possible. """
+        if player == 1:
+            return _popcount(self.black) <= _popcount(self.white)
+        return _popcount(self.white) < _popcount(self.black)
+
+    def is_terminal(self, player: int) -> bool:
+        """
+        Same as util.is_board_terminal on the connection board of this board.
+        """
+        if self.is_connected(0) or self.is_connected(1):
+            return True
+        black = _popcount(self.black)
+        white = _popcount(self.white)
+        empty = self.num_cells - black - white
+        if player == 0:
+            return white + empty == black
+        return black + empty == white + 1
+
+    # String conversions
+
+    def to_xo(self, layered: bool = True) -> str:
+        """ The board in xo notation. [layered or flat, xo] """
+        flat = _render([self.black, self.white], self.num_cells)
+        return self.geometry.layered(flat) if layered else flat
+
+    def to_board(self, layered: bool = True) -> str:
+        """
+        The board with connection annotations, identical to
+        util.convert_xo_to_board(self.to_xo()). [layered or flat, connection]
+        """
+        g = self.geometry
+        y, z, x_win, x = self._component_masks(self.black, g.north_mask,
+                                               g.south_mask)
+        p, q, o_win, o = self._component_masks(self.white, g.west_mask,
+                                               g.east_mask)
+        flat = _render([x, o, y, z, x_win, p, q, o_win], self.num_cells)
+        return g.layered(flat) if layered else flat
+
+    def __eq__(self, other: typing.Any) -> bool:
+        return (isinstance(other, Bitboard) and
+                self.geometry is other.geometry and
+                self.black == other.black and self.white == other.white)
+
+    def __hash__(self) -> int:
+        return hash((self.num_rows, self.num_cols, self.black, self.white))
+
+    def __repr__(self) -> str:
+        return f"Bitboard({self.num_rows}x{self.num_cols}, {self.to_xo(False)})"
@@ -0,0 +1,227 @@
+"""
+JSON catalog of the saved policies. The catalog keeps the metadata of every
+policy file under the policies directory (board size, player, recall type,
+number of states, file size and content hash), so policies can be listed and
+filtered without loading their payloads. It is updated when a policy is saved;
+the update holds a file lock, so processes saving policies at once do not
+lose each other's entries.
+"""
+import os
+import json
+import time
+import typing
+import hashlib
+import functools
+import contextlib
+import collections.abc
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, the catalog is updated without a lock
+    fcntl = None
+
+import darkhex.utils.util as util
+from darkhex import logger as log
+from darkhex.utils.policy_file import PolicyFile
+from darkhex.utils.policy_store import SqlitePolicyStore
+
+CATALOG_FILE = "catalog.json"
+POLICY_FILES = ("policy.pkl", "best_response.pkl", "policy.bin",
+                "policy.db")
+
+
+def file_hash(path: str) -> str:
+    """ blake2b hash of the file content. """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PolicyCatalog:
+    """
+    Catalog of the policy files under a policies directory. Entries are keyed
+    by the file path relative to the directory, i.e.
+    "4x3_white_hp_pr/policy.pkl".
+    """
+
+    def __init__(self, root: str = None) -> None:
+        """
+        Args:
+            root (str): The policies directory. util.PathVars.policies if not
+                given.
+        """
+        self.root = root if root is not None else util.PathVars.policies
+        self.path = os.path.join(self.root, CATALOG_FILE)
+        self._entries = None
+
+    @property
+    def entries(self) -> typing.Dict[str, dict]:
+        if self._entries is None:
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            else:
+                self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    @contextlib.contextmanager
+    def _locked(self) -> typing.Iterator[None]:
+        """ Holds an exclusive lock on the catalog file across processes. """
+        os.makedirs(self.root, exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield  # closing the file releases the lock
+
+    def _key(self, path: str) -> typing.Optional[str]:
+        """ Catalog key of a file path, None if it is outside the root. """
+        relative = os.path.relpath(os.path.abspath(path),
+                                   os.path.abspath(self.root))
+        if relative.startswith(os.pardir):
+            return None
+        return relative.replace(os.sep, "/")
+
+    def record(self,
+               path: str,
+               data: typing.Any = None) -> typing.Optional[dict]:
+        """
+        Adds or updates the entry of a saved policy file. Files outside the
+        catalog directory are ignored.
+
+        Args:
+            path (str): The policy file.
+            data: The saved policy data (a dotdict), read from the file if not
+                given.
+        Returns:
+            dict: The entry, None if the file is not in the catalog directory.
+        """
+        key = self._key(path)
+        if key is None:
+            return None
+        name, file_name = key.rsplit("/", 1) if "/" in key else ("", key)
+        if file_name.endswith(".bin"):
+            header = PolicyFile(path).header
+            metadata = {
+                "format": "bin",
+                "board_size": header["board_size"],
+                "player": header["player"],
+                "is_perfect_recall": header["is_perfect_recall"],
+                "is_best_response": False,
+                "is_canonical": header["is_canonical"],
+                "num_states": header["num_states"],
+                "fingerprint": header.get("fingerprint"),
+            }
+        elif file_name.endswith(".db"):
+            with SqlitePolicyStore(path) as store:
+                header = store.metadata
+                num_states = len(store)
+            metadata = {
+                "format": "db",
+                "board_size": header.get("board_size"),
+                "player": header.get("player"),
+                "is_perfect_recall": bool(header.get("is_perfect_recall")),
+                "is_best_response": False,
+                "is_canonical": bool(header.get("is_canonical")),
+                "num_states": num_states,
+                "fingerprint": header.get("fingerprint"),
+            }
+        else:
+            if data is None:
+                data = util.load_file(path)
+            policy = data.policy
+            metadata = {
+                "format": "pkl",
+                "board_size": list(data.board_size),
+                "player": data.player,
+                "is_perfect_recall": bool(data.is_perfect_recall),
+                "is_best_response": bool(data.is_best_response),
+                "is_canonical": bool(data.is_canonical),
+                "num_states": len(policy) if isinstance(
+                    policy, collections.abc.Mapping) else None,
+                "fingerprint": data.fingerprint,
+            }
+        entry = {
+            "name": name,
+            "file": file_name,
+            "path": key,
+            "file_size": os.path.getsize(path),
+            "content_hash": file_hash(path),
+            "updated": time.time(),
+            **metadata,
+        }
+        with self._locked():
+            self._entries = None  # pick up entries saved by other processes
+            self.entries[key] = entry
+            self._save()
+        log.debug("Catalog entry updated: %s", key)
+        return entry
+
+    def resolve(self,
+                name: str,
+                file_name: str = "policy.pkl") -> typing.Optional[str]:
+        """
+        Path of a policy file by policy name.
+
+        Args:
+            name (str): The policy name, i.e. the directory of the policy.
+            file_name (str): The file in the policy directory.
+        Returns:
+            str: The file path, None if there is no such policy.
+        """
+        path = os.path.join(self.root, name, file_name)
+        if os.path.isfile(path):
+            return path
+        return None
+
+    def list(self, **filters) -> typing.List[dict]:
+        """
+        Lists the catalog entries whose metadata match all the given values,
+        i.e. list(board_size=(4, 3), player=1). Entries of deleted files are
+        skipped.
+
+        Returns:
+            typing.List[dict]: The matching entries.
+        """
+        entries = []
+        for key, entry in sorted(self.entries.items()):
+            if not os.path.isfile(os.path.join(self.root, key)):
+                continue
+            if all(
+                    entry.get(field) == (list(value) if isinstance(
+                        value, tuple) else value)
+                    for field, value in filters.items()):
+                entries.append(entry)
+        return entries
+
+    def rebuild(self) -> None:
+        """
+        Rebuilds the catalog from the policy files on disk. Files that cannot
+        be read are skipped with a warning.
+        """
+        with self._locked():
+            self._entries = {}
+            self._save()
+        for name in sorted(os.listdir(self.root)):
+            for file_name in POLICY_FILES:
+                path = os.path.join(self.root, name, file_name)
+                if not os.path.isfile(path):
+                    continue
+                try:
+                    self.record(path)
+                except Exception as e:
+                    log.warning("Skipping %s in the catalog: %s", path, e)
+
+
+@functools.lru_cache(maxsize=None)
+def get_catalog(root: str = None) -> PolicyCatalog:
+    """ The shared catalog of the policies directory. """
+    return PolicyCatalog(root)
@@ -0,0 +1,212 @@
+"""
+Incremental connectivity for Hex boards. Stones are kept in a union-find
+structure with four edge sentinel nodes (north, south, west, east), so placing
+a stone costs near-constant time and checking a connection is a root
+comparison.
+"""
+import typing
+
+from darkhex import cellState
+from darkhex.utils.bitboard import _render
+from darkhex.utils.geometry import get_geometry
+
+
+class HexConnectivity:
+    """
+    Union-find over the cells of the board plus the edge sentinels. Black
+    stones are joined with the north/south sentinels and white stones with the
+    west/east sentinels, so a player is connected when both of their sentinels
+    share a root.
+    """
+    EMPTY = -1
+
+    def __init__(self, num_rows: int, num_cols: int) -> None:
+        """
+        Args:
+            num_rows (int): The number of rows in the board.
+            num_cols (int): The number of columns in the board.
+        """
+        self.geometry = get_geometry(num_rows, num_cols)
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.num_cells = num_rows * num_cols
+        self.north = self.num_cells
+        self.south = self.num_cells + 1
+        self.west = self.num_cells + 2
+        self.east = self.num_cells + 3
+        self.neighbours = self.geometry.neighbours
+        self.cells = [self.EMPTY] * self.num_cells
+        self.parent = list(range(self.num_cells + 4))
+        self.size = [1] * (self.num_cells + 4)
+
+    @classmethod
+    def from_board(cls, board: str) -> "HexConnectivity":
+        """
+        Builds the structure from a board. [layered, :]
+
+        Args:
+            board (str): The board to read the stones from.
+        Returns:
+            HexConnectivity: The connectivity of the board.
+        """
+        num_cols = board.find("\n")
+        flat = board.replace("\n", "")
+        if num_cols == -1:
+            num_cols = len(flat)
+        connectivity = cls(len(flat) // num_cols, num_cols)
+        for cell, piece in enumerate(flat):
+            if piece in cellState.black_pieces:
+                connectivity.place(cell, 0)
+            elif piece in cellState.white_pieces:
+                connectivity.place(cell, 1)
+        return connectivity
+
+    def copy(self) -> "HexConnectivity":
+        new = object.__new__(HexConnectivity)
+        new.__dict__.update(self.__dict__)
+        new.cells = self.cells[:]
+        new.parent = self.parent[:]
+        new.size = self.size[:]
+        return new
+
+    def find(self, node: int) -> int:
+        """ Root of the node, with path halving. """
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _union(self, a: int, b: int) -> None:
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def place(self, cell: int, player: int) -> None:
+        """
+        Places a stone of the player and joins it with its neighbours of the
+        same colour and the edges it touches.
+
+        Args:
+            cell (int): The cell to place the stone on. Must be empty.
+            player (int): The player the stone belongs to.
+        """
+        self.cells[cell] = player
+        row, col = divmod(cell, self.num_cols)
+        if player == 0:
+            if row == 0:
+                self._union(cell, self.north)
+            if row == self.num_rows - 1:
+                self._union(cell, self.south)
+        else:
+            if col == 0:
+                self._union(cell, self.west)
+            if col == self.num_cols - 1:
+                self._union(cell, self.east)
+        cells = self.cells
+        for neighbour in self.neighbours[cell]:
+            if cells[neighbour] == player:
+                self._union(cell, neighbour)
+
+    def after_action(self, action: int,
+                     player: int) -> typing.Union["HexConnectivity", bool]:
+        """
+        A copy with a stone of the player placed on the given cell, so a game
+        tree can keep one structure per node and pay a single place() per move.
+
+        Args:
+            action (int): The cell to place the stone on.
+            player (int): The player to place the stone for.
+        Returns:
+            HexConnectivity: The new structure, or False if the cell is not
+            empty.
+        """
+        if self.cells[action] != self.EMPTY:
+            return False
+        new = self.copy()
+        new.place(action, player)
+        return new
+
+    def north_south_connected(self) -> bool:
+        return self.find(self.north) == self.find(self.south)
+
+    def east_west_connected(self) -> bool:
+        return self.find(self.west) == self.find(self.east)
+
+    def is_connected(self, player: int) -> bool:
+        """ True if the player connected their edges. """
+        if player == 0:
+            return self.north_south_connected()
+        return self.east_west_connected()
+
+    def _edge_masks(self, player: int) -> typing.Tuple[int, int, int, int]:
+        """
+        Connection classes of the player's stones as in convert_xo_to_board:
+        (start, end, win, plain) masks.
+        """
+        g = self.geometry
+        if player == 0:
+            start_node, end_node = self.north, self.south
+            start_cells, end_cells = g.north_cells, g.south_cells
+        else:
+            start_node, end_node = self.west, self.east
+            start_cells, end_cells = g.west_cells, g.east_cells
+        cells = self.cells
+        stones = [c for c in range(self.num_cells) if cells[c] == player]
+        start_root = self.find(start_node)
+        end_root = self.find(end_node)
+        end_mask = 0
+        for c in end_cells:
+            if cells[c] == player:
+                end_mask |= 1 << c
+
+        start = end = 0
+        if start_root != end_root:
+            for c in stones:
+                root = self.find(c)
+                if root == start_root:
+                    start |= 1 << c
+                elif root == end_root:
+                    end |= 1 << c
+            win = 0
+        else:
+            # The sentinels join every group touching an edge, so the groups
+            # touching the start edge are found by walking from it.
+            stack = [c for c in start_cells if cells[c] == player]
+            for c in stack:
+                start |= 1 << c
+            while stack:
+                cell = stack.pop()
+                for n in self.neighbours[cell]:
+                    if cells[n] == player and not (start >> n) & 1:
+                        start |= 1 << n
+                        stack.append(n)
+            for c in stones:
+                if not (start >> c) & 1 and self.find(c) == end_root:
+                    end |= 1 << c
+            end |= end_mask
+            win = 0
+            for c in stones:
+                if (start >> c) & 1 and not (end_mask >> c) & 1 and \
+                        g.neighbour_masks[c] & end_mask:
+                    win |= 1 << c
+            start &= ~end & ~win
+        stone_mask = 0
+        for c in stones:
+            stone_mask |= 1 << c
+        return start, end, win, stone_mask & ~start & ~end & ~win
+
+    def to_board(self) -> str:
+        """
+        The board with connection annotations (y/z/p/q/X/O), same as
+        util.convert_xo_to_board. [layered, connection]
+        """
+        y, z, x_win, x = self._edge_masks(0)
+        p, q, o_win, o = self._edge_masks(1)
+        flat = _render([x, o, y, z, x_win, p, q, o_win], self.num_cells)
+        return self.geometry.layered(flat)
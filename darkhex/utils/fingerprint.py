@@ -0,0 +1,82 @@
+"""
+Content fingerprints of tabular policies. Every (info_state, action, prob)
+entry is hashed with blake2b and the entry hashes are summed modulo 2^64, so
+the fingerprint does not depend on the order of the states or of the actions,
+nor on whether the action probabilities are dictionaries or tuple lists. It
+is updated incrementally as entries are added or removed, and it is computed
+in one streaming pass without sorting the policy.
+"""
+import struct
+import typing
+import hashlib
+
+_MASK = (1 << 64) - 1
+_ENTRY = struct.Struct("<qd")
+
+
+def _items(
+        action_probs: typing.Any) -> typing.Iterable[typing.Tuple[int, float]]:
+    return action_probs.items() if isinstance(action_probs,
+                                              dict) else action_probs
+
+
+def entry_hash(info_state: str, action: int, prob: float) -> int:
+    """ 64 bit hash of a single (info_state, action, prob) entry. """
+    digest = hashlib.blake2b(info_state.encode(), digest_size=8)
+    digest.update(_ENTRY.pack(int(action), float(prob)))
+    return int.from_bytes(digest.digest(), "little")
+
+
+def state_hash(info_state: str, action_probs: typing.Any) -> int:
+    """ Sum of the entry hashes of an info state. """
+    total = 0
+    for action, prob in _items(action_probs):
+        total += entry_hash(info_state, action, prob)
+    return total & _MASK
+
+
+class PolicyFingerprint:
+    """
+    Incrementally maintained policy fingerprint.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value: int = 0) -> None:
+        self.value = value
+
+    def add(self, info_state: str, action_probs: typing.Any) -> None:
+        """ Adds the entries of an info state. """
+        self.value = (self.value + state_hash(info_state, action_probs)) & _MASK
+
+    def remove(self, info_state: str, action_probs: typing.Any) -> None:
+        """ Removes the entries of an info state added before. """
+        self.value = (self.value - state_hash(info_state, action_probs)) & _MASK
+
+    def hexdigest(self) -> str:
+        return f"{self.value:016x}"
+
+    def __eq__(self, other: typing.Any) -> bool:
+        return isinstance(other,
+                          PolicyFingerprint) and self.value == other.value
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+    def __repr__(self) -> str:
+        return f"PolicyFingerprint({self.hexdigest()})"
+
+
+def policy_fingerprint(policy: typing.Mapping[str, typing.Any]) -> str:
+    """
+    Fingerprint of a policy table.
+
+    Args:
+        policy (typing.Mapping[str, typing.Any]): Info state to action
+            probabilities.
+    Returns:
+        str: The fingerprint as 16 hex digits.
+    """
+    fingerprint = PolicyFingerprint()
+    for info_state, action_probs in policy.items():
+        fingerprint.add(info_state, action_probs)
+    return fingerprint.hexdigest()
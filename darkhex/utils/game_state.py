@@ -0,0 +1,216 @@
+"""
+Dark Hex game state on stone masks, with undo. It plays the same game as the
+pyspiel dark_hex and dark_hex_ir states (both the classical and the abrupt
+versions, observation type reveal-nothing) and gives the same info state
+strings, legal actions and returns, so solvers can walk the game tree with
+apply_action/undo_action on a single state instead of cloning pyspiel states.
+"""
+import typing
+
+from darkhex.utils.bitboard import _flood, _render
+from darkhex.utils.geometry import get_geometry
+from darkhex.utils.info_state import format_info_state
+
+SUPPORTED_GAMES = ("dark_hex", "dark_hex_ir")
+
+
+def format_pyspiel_info_state(board: str,
+                              player: int,
+                              perfect_recall: bool = False,
+                              num_moves: int = 0,
+                              action_history: typing.Sequence[int] = ()) -> str:
+    """
+    Info state string in the format of the pyspiel dark hex games.
+
+    Args:
+        board (str): The board the player sees. [layered, xo]
+        player (int): The player.
+        perfect_recall (bool): If true, the dark_hex format, otherwise the
+            dark_hex_ir format.
+        num_moves (int): The number of moves played by both players.
+        action_history (typing.Sequence[int]): The actions of the player.
+    Returns:
+        str: The info state.
+    """
+    if not perfect_recall:
+        return f"P{player} {board}"
+    history = "".join([f"{player},{a} " for a in action_history])
+    return f"{board}\n{num_moves}\n{history}"
+
+
+def darkhex_info_state(info_state: str, player: int,
+                       perfect_recall: bool = False) -> str:
+    """
+    Converts a pyspiel dark hex info state string to the darkhex format, see
+    darkhex.utils.info_state. Perfect recall pyspiel strings do not name the
+    player, so it is given.
+
+    Args:
+        info_state (str): The pyspiel info state.
+        player (int): The player of the info state.
+        perfect_recall (bool): If true, a dark_hex info state, otherwise a
+            dark_hex_ir one.
+    Returns:
+        str: The darkhex info state.
+    """
+    if not perfect_recall:
+        return format_info_state(player, info_state[3:])
+    board, _, history = info_state.rsplit("\n", 2)
+    return format_info_state(
+        player, board,
+        [int(a[a.index(",") + 1:]) for a in history.split()], True)
+
+
+class DarkHexState:
+    """
+    Mutable Dark Hex state. The true board and what each player has seen of it
+    are kept as masks; a move pushes the previous values on a stack and
+    undo_action pops them back. Player 0 plays black and connects north to
+    south, player 1 plays white and connects west to east.
+    """
+    __slots__ = ("geometry", "perfect_recall", "abrupt", "black", "white",
+                 "views", "player", "winner", "histories", "_stack",
+                 "_edges", "_connected", "_legal_actions", "_strings")
+
+    def __init__(self,
+                 num_rows: int,
+                 num_cols: int,
+                 perfect_recall: bool = False,
+                 abrupt: bool = False) -> None:
+        """
+        Args:
+            num_rows (int): The number of rows in the board.
+            num_cols (int): The number of columns in the board.
+            perfect_recall (bool): If true, info states are in the dark_hex
+                (perfect recall) format, otherwise in the dark_hex_ir format.
+            abrupt (bool): If true, the turn passes on a collision (abrupt
+                dark hex), otherwise the player moves again.
+        """
+        self.geometry = get_geometry(num_rows, num_cols)
+        self.perfect_recall = perfect_recall
+        self.abrupt = abrupt
+        self.black = 0
+        self.white = 0
+        self.views = [0, 0]  # cells each player has seen, own stones included
+        self.player = 0
+        self.winner = -1
+        self.histories = ([], [])  # actions tried by each player
+        self._stack = []
+        g = self.geometry
+        self._edges = ((g.north_mask, g.south_mask), (g.west_mask, g.east_mask))
+        self._connected = ({}, {})  # per player stones mask -> connects edges
+        self._legal_actions = {}  # unseen cells mask -> legal actions
+        # (player, seen stones) -> info state, or board for perfect recall
+        self._strings = {}
+
+    @classmethod
+    def from_game(cls, game: typing.Any) -> "DarkHexState":
+        """
+        The initial state of a pyspiel dark hex game.
+
+        Args:
+            game (pyspiel.Game): A dark_hex or dark_hex_ir game.
+        Returns:
+            DarkHexState: The initial state.
+        """
+        short_name = game.get_type().short_name
+        parameters = game.get_parameters()
+        if short_name not in SUPPORTED_GAMES or \
+                parameters.get("obstype", "reveal-nothing") != "reveal-nothing":
+            raise ValueError(f"Unsupported game: {game}")
+        return cls(parameters["num_rows"], parameters["num_cols"],
+                   short_name == "dark_hex",
+                   parameters.get("gameversion", "cdh") == "adh")
+
+    def current_player(self) -> int:
+        return self.player
+
+    def is_terminal(self) -> bool:
+        return self.winner != -1
+
+    def player_return(self, player: int) -> float:
+        """ The return of the player, 0 if the game is not over. """
+        if self.winner == -1:
+            return 0.
+        return 1. if self.winner == player else -1.
+
+    def legal_actions(self) -> typing.List[int]:
+        """ The cells the current player has not seen, in increasing order. """
+        unseen = self.geometry.full_mask & ~self.views[self.player]
+        actions = self._legal_actions.get(unseen)
+        if actions is None:
+            actions = []
+            mask = unseen
+            while mask:
+                low = mask & -mask
+                actions.append(low.bit_length() - 1)
+                mask ^= low
+            self._legal_actions[unseen] = actions
+        return actions
+
+    def information_state_string(self, player: int = None) -> str:
+        """ Same as the pyspiel state's information_state_string. """
+        if player is None:
+            player = self.player
+        view = self.views[player]
+        black = self.black & view
+        white = self.white & view
+        key = (player, black, white)
+        string = self._strings.get(key)
+        if string is None:
+            g = self.geometry
+            string = g.layered(_render([black, white], g.num_cells))
+            if not self.perfect_recall:
+                string = format_pyspiel_info_state(string, player)
+            self._strings[key] = string
+        if not self.perfect_recall:
+            return string
+        return format_pyspiel_info_state(string, player, True,
+                                         len(self._stack),
+                                         self.histories[player])
+
+    def apply_action(self, action: int) -> None:
+        """
+        Plays the action of the current player. A cell holding a stone of the
+        opponent is revealed to the player instead.
+
+        Args:
+            action (int): An action in legal_actions().
+        """
+        player = self.player
+        black = self.black
+        white = self.white
+        view = self.views[player]
+        self._stack.append((black, white, view, player))
+        self.histories[player].append(action)
+        bit = 1 << action
+        self.views[player] = view | bit
+        if (white if player == 0 else black) & bit:
+            if self.abrupt:
+                self.player = 1 - player
+            return
+        if player == 0:
+            self.black = stones = black | bit
+        else:
+            self.white = stones = white | bit
+        # a new win goes through the new stone, so it is enough to check the
+        # stones once they touch both edges of the player
+        first_edge, second_edge = self._edges[player]
+        if stones & first_edge and stones & second_edge:
+            connected = self._connected[player].get(stones)
+            if connected is None:
+                connected = bool(
+                    _flood(self.geometry, stones & first_edge, stones) &
+                    second_edge)
+                self._connected[player][stones] = connected
+            if connected:
+                self.winner = player
+        self.player = 1 - player
+
+    def undo_action(self) -> None:
+        """ Takes back the last apply_action. """
+        self.black, self.white, view, player = self._stack.pop()
+        self.views[player] = view
+        self.histories[player].pop()
+        self.player = player
+        self.winner = -1
@@ -0,0 +1,95 @@
+"""
+Precomputed board geometry. Neighbours, edges and cell labels only depend on
+the board size, so they are computed once per (num_rows, num_cols) and shared
+by util, the bitboard helpers and the algorithms.
+"""
+import functools
+import typing
+
+
+class BoardGeometry:
+    """
+    Lookup tables for a board size. All the tables are tuples (or a dict for the
+    label to position table) and must not be modified.
+
+    Attributes:
+        neighbours: The neighbour cells of every cell.
+        neighbour_masks: The neighbours of every cell as a bitmask.
+        north_cells, south_cells, west_cells, east_cells: The edge cells.
+        north_mask, south_mask, west_mask, east_mask: The edge cells as bitmasks.
+        full_mask: Bitmask with every cell set.
+        labels: Alphanumeric label of every cell, i.e. a1, b1, ...
+        positions: Alphanumeric label to cell.
+    """
+
+    def __init__(self, num_rows: int, num_cols: int) -> None:
+        """
+        Args:
+            num_rows (int): The number of rows in the board.
+            num_cols (int): The number of columns in the board.
+        """
+        if num_rows <= 0 or num_cols <= 0:
+            raise ValueError(f"Invalid board size: {num_rows}x{num_cols}")
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.num_cells = num_rows * num_cols
+
+        neighbours = []
+        for cell in range(self.num_cells):
+            row, col = divmod(cell, num_cols)
+            cell_neighbours = []
+            if col + 1 < num_cols:
+                cell_neighbours.append(cell + 1)
+            if col > 0:
+                cell_neighbours.append(cell - 1)
+            if row + 1 < num_rows:
+                cell_neighbours.append(cell + num_cols)
+                if col > 0:
+                    cell_neighbours.append(cell + num_cols - 1)
+            if row > 0:
+                cell_neighbours.append(cell - num_cols)
+                if col + 1 < num_cols:
+                    cell_neighbours.append(cell - num_cols + 1)
+            neighbours.append(tuple(cell_neighbours))
+        self.neighbours = tuple(neighbours)
+        self.neighbour_masks = tuple(
+            sum(1 << n for n in cell_neighbours) for cell_neighbours in neighbours)
+
+        self.north_cells = tuple(range(num_cols))
+        self.south_cells = tuple(
+            range(self.num_cells - num_cols, self.num_cells))
+        self.west_cells = tuple(range(0, self.num_cells, num_cols))
+        self.east_cells = tuple(range(num_cols - 1, self.num_cells, num_cols))
+        self.north_mask = sum(1 << c for c in self.north_cells)
+        self.south_mask = sum(1 << c for c in self.south_cells)
+        self.west_mask = sum(1 << c for c in self.west_cells)
+        self.east_mask = sum(1 << c for c in self.east_cells)
+        self.full_mask = (1 << self.num_cells) - 1
+
+        self.labels = tuple("{}{}".format(chr(ord("a") + cell % num_cols),
+                                          cell // num_cols + 1)
+                            for cell in range(self.num_cells))
+        self.positions = {label: cell for cell, label in enumerate(self.labels)}
+        self.row_slices = tuple(
+            slice(i, i + num_cols) for i in range(0, self.num_cells, num_cols))
+
+    def layered(self, flat_board: str) -> str:
+        """ Flat board to layered board, see util.flat_board_to_layered. """
+        return "\n".join([flat_board[s] for s in self.row_slices])
+
+    def __repr__(self) -> str:
+        return f"BoardGeometry({self.num_rows}x{self.num_cols})"
+
+
+@functools.lru_cache(maxsize=None)
+def get_geometry(num_rows: int, num_cols: int) -> BoardGeometry:
+    """
+    Returns the shared geometry for the board size.
+
+    Args:
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        BoardGeometry: The geometry tables.
+    """
+    return BoardGeometry(num_rows, num_cols)
@@ -0,0 +1,373 @@
+"""
+Compact representations of information states. Info states are passed around
+as OpenSpiel strings, i.e. "P0\\nx..\\n...\\n..." for imperfect recall and
+"P0\\nx..\\n...\\n...\\n0,0 " for perfect recall. The codec here packs them into
+fixed width integers so they can be used as cheap dictionary keys.
+"""
+import typing
+import numpy as np
+
+from darkhex.utils.bitboard import Bitboard, _BLACK_BITS, _WHITE_BITS
+from darkhex.utils.geometry import BoardGeometry, get_geometry
+from darkhex.utils.zobrist import get_zobrist_table
+
+
+def split_info_state(
+        info_state: str,
+        geometry: BoardGeometry) -> typing.Tuple[int, str, typing.List[int]]:
+    """
+    Splits an info state string into its parts. Both the layered ("P0\\nx..")
+    and the flat ("P0 x..") board formats are accepted.
+
+    Args:
+        info_state (str): The info state.
+        geometry (BoardGeometry): The geometry of the board.
+    Returns:
+        int: The player.
+        str: The board. [:, :]
+        typing.List[int]: The action history, empty for imperfect recall.
+    """
+    player = int(info_state[1])
+    body = info_state[3:]
+    num_cols = geometry.num_cols
+    if geometry.num_rows > 1 and body[num_cols:num_cols + 1] == "\n":
+        board_len = geometry.num_cells + geometry.num_rows - 1
+    else:
+        board_len = geometry.num_cells
+    board = body[:board_len]
+    history = body[board_len:].split()
+    return player, board, [int(a[a.index(",") + 1:]) for a in history]
+
+
+def format_info_state(player: int,
+                      board: str,
+                      action_history: typing.List[int] = None,
+                      perfect_recall: bool = False) -> str:
+    """
+    Formats an info state string, same as util.get_info_state_from_board for an
+    xo board.
+
+    Args:
+        player (int): The player.
+        board (str): The board. [layered, xo]
+        action_history (typing.List[int]): The action history. (perfect recall)
+        perfect_recall (bool): If true, the perfect recall format is used.
+    Returns:
+        str: The info state.
+    """
+    if perfect_recall:
+        history = "".join([f"{player},{a} " for a in action_history])
+        return f"P{player}\n{board}\n{history}"
+    return f"P{player}\n{board}"
+
+
+class InfoStateCodec:
+    """
+    Packs info states into fixed width integers. From the lowest bit:
+
+        player (1 bit) | black mask (C bits) | white mask (C bits)
+        | history length | history, one slot per action (perfect recall)
+
+    where C is the number of cells. The history is needed to tell perfect
+    recall states with the same board apart. Keys can also be turned into
+    fixed width big-endian bytes, which sort the same way as the integers.
+    """
+
+    def __init__(self,
+                 num_rows: int,
+                 num_cols: int,
+                 perfect_recall: bool = False) -> None:
+        """
+        Args:
+            num_rows (int): The number of rows in the board.
+            num_cols (int): The number of columns in the board.
+            perfect_recall (bool): If true, the action history is encoded.
+        """
+        self.geometry = get_geometry(num_rows, num_cols)
+        self.perfect_recall = perfect_recall
+        num_cells = self.geometry.num_cells
+        self._black_shift = 1
+        self._white_shift = 1 + num_cells
+        self._history_shift = 1 + 2 * num_cells
+        self._cell_mask = self.geometry.full_mask
+        self.num_bits = self._history_shift
+        if perfect_recall:
+            self._length_bits = num_cells.bit_length()
+            self._action_bits = max(1, (num_cells - 1).bit_length())
+            self._action_mask = (1 << self._action_bits) - 1
+            self._actions_shift = self._history_shift + self._length_bits
+            self.num_bits += self._length_bits + num_cells * self._action_bits
+        self.num_bytes = (self.num_bits + 7) // 8
+
+    def encode_parts(self, player: int, black: int, white: int,
+                     action_history: typing.List[int] = ()) -> int:
+        """
+        Packs the parts of an info state.
+
+        Args:
+            player (int): The player.
+            black (int): The black stones mask.
+            white (int): The white stones mask.
+            action_history (typing.List[int]): The action history.
+        Returns:
+            int: The key.
+        """
+        key = player | (black << self._black_shift) | (white <<
+                                                       self._white_shift)
+        if self.perfect_recall:
+            if len(action_history) > self.geometry.num_cells:
+                raise ValueError(f"Action history too long: {action_history}")
+            key |= len(action_history) << self._history_shift
+            shift = self._actions_shift
+            for action in action_history:
+                key |= action << shift
+                shift += self._action_bits
+        elif action_history:
+            raise ValueError("Imperfect recall info states have no history")
+        return key
+
+    def encode(self, info_state: str) -> int:
+        """
+        Packs an info state string. Connection boards are stored as xo.
+
+        Args:
+            info_state (str): The info state.
+        Returns:
+            int: The key.
+        """
+        player, board, action_history = split_info_state(
+            info_state, self.geometry)
+        black = int(board.translate(_BLACK_BITS)[::-1], 2)
+        white = int(board.translate(_WHITE_BITS)[::-1], 2)
+        return self.encode_parts(player, black, white, action_history)
+
+    def decode_parts(self,
+                     key: int) -> typing.Tuple[int, int, int, typing.List[int]]:
+        """
+        Unpacks a key.
+
+        Args:
+            key (int): The key.
+        Returns:
+            int: The player.
+            int: The black stones mask.
+            int: The white stones mask.
+            typing.List[int]: The action history.
+        """
+        player = key & 1
+        black = (key >> self._black_shift) & self._cell_mask
+        white = (key >> self._white_shift) & self._cell_mask
+        action_history = []
+        if self.perfect_recall:
+            length_mask = (1 << self._length_bits) - 1
+            length = (key >> self._history_shift) & length_mask
+            history = key >> self._actions_shift
+            for _ in range(length):
+                action_history.append(history & self._action_mask)
+                history >>= self._action_bits
+        return player, black, white, action_history
+
+    def decode(self, key: int) -> str:
+        """
+        Unpacks a key into the info state string.
+
+        Args:
+            key (int): The key.
+        Returns:
+            str: The info state. [layered, xo]
+        """
+        player, black, white, action_history = self.decode_parts(key)
+        board = Bitboard.from_masks(self.geometry, black, white).to_xo()
+        return format_info_state(player, board, action_history,
+                                 self.perfect_recall)
+
+    def to_bytes(self, key: int) -> bytes:
+        return key.to_bytes(self.num_bytes, "big")
+
+    def from_bytes(self, data: bytes) -> int:
+        return int.from_bytes(data, "big")
+
+    def encode_policy(
+        self, policy: typing.Dict[str, typing.Any]
+    ) -> typing.Dict[int, typing.Any]:
+        """ Re-keys a policy dictionary with compact keys. """
+        return {self.encode(k): v for k, v in policy.items()}
+
+    def decode_policy(
+        self, policy: typing.Dict[int, typing.Any]
+    ) -> typing.Dict[str, typing.Any]:
+        """ Re-keys a compact keyed policy dictionary with info state strings. """
+        return {self.decode(k): v for k, v in policy.items()}
+
+
+def _infer_board_size(info_state: str) -> typing.Tuple[int, int]:
+    """ Board size of a layered info state string. """
+    rows = [
+        line for line in info_state[3:].split("\n") if line and "," not in line
+    ]
+    if len(rows) < 2:
+        raise ValueError(
+            f"Board size must be given for flat info states: {info_state}")
+    return len(rows), len(rows[0])
+
+
+class InfoState:
+    """
+    Parsed information state. The string is parsed once, and the board,
+    player and action history are kept in the parsed form. Terminal and
+    collusion checks, and the string form, are computed on first use and
+    cached. InfoState objects are immutable; after_action returns a new object
+    without parsing any strings.
+
+    The zobrist property gives a 64 bit hash that after_action updates
+    incrementally, for use with zobrist.TranspositionTable; it is also the
+    hash of the object, so rendering the string is never needed to use an
+    InfoState as a key. Use str() to look up dictionaries keyed by info state
+    strings.
+    """
+    __slots__ = ("player", "bitboard", "action_history", "perfect_recall",
+                 "_string", "_terminal", "_collusion", "_zobrist")
+
+    def __init__(self,
+                 player: int,
+                 bitboard: Bitboard,
+                 action_history: typing.Tuple[int, ...] = (),
+                 perfect_recall: bool = False) -> None:
+        """
+        Args:
+            player (int): The player the info state belongs to.
+            bitboard (Bitboard): The board the player sees.
+            action_history (typing.Tuple[int, ...]): The player's actions.
+            perfect_recall (bool): If true, the action history is part of the
+                info state.
+        """
+        _set = object.__setattr__
+        _set(self, "player", player)
+        _set(self, "bitboard", bitboard)
+        _set(self, "action_history", tuple(action_history))
+        _set(self, "perfect_recall", perfect_recall)
+        _set(self, "_string", None)
+        _set(self, "_terminal", None)
+        _set(self, "_collusion", None)
+        _set(self, "_zobrist", None)
+
+    @classmethod
+    def from_string(cls,
+                    info_state: str,
+                    num_rows: int = None,
+                    num_cols: int = None,
+                    perfect_recall: bool = False) -> "InfoState":
+        """
+        Parses an info state string.
+
+        Args:
+            info_state (str): The info state.
+            num_rows (int): The number of rows. Inferred for layered boards.
+            num_cols (int): The number of columns. Inferred for layered boards.
+            perfect_recall (bool): If true, the info state is perfect recall.
+        Returns:
+            InfoState: The parsed info state.
+        """
+        if num_rows is None or num_cols is None:
+            num_rows, num_cols = _infer_board_size(info_state)
+        geometry = get_geometry(num_rows, num_cols)
+        player, board, action_history = split_info_state(info_state, geometry)
+        bitboard = Bitboard.from_masks(
+            geometry, int(board.translate(_BLACK_BITS)[::-1], 2),
+            int(board.translate(_WHITE_BITS)[::-1], 2))
+        return cls(player, bitboard, action_history, perfect_recall)
+
+    def __setattr__(self, name: str, value: typing.Any) -> None:
+        raise AttributeError("InfoState is immutable")
+
+    @property
+    def board(self) -> str:
+        """ The board. [layered, xo] """
+        return self.bitboard.to_xo()
+
+    @property
+    def is_terminal(self) -> bool:
+        """ Same as util.is_info_state_terminal. """
+        if self._terminal is None:
+            object.__setattr__(self, "_terminal",
+                               self.bitboard.is_terminal(self.player))
+        return self._terminal
+
+    @property
+    def is_collusion_possible(self) -> bool:
+        """ Same as util.is_collusion_possible_info_state. """
+        if self._collusion is None:
+            object.__setattr__(self, "_collusion",
+                               self.bitboard.is_collusion_possible(self.player))
+        return self._collusion
+
+    @property
+    def zobrist(self) -> int:
+        """
+        Zobrist hash of the info state; the board, the player and, for perfect
+        recall, the action history.
+        """
+        if self._zobrist is None:
+            geometry = self.bitboard.geometry
+            table = get_zobrist_table(geometry.num_rows, geometry.num_cols)
+            h = self.bitboard.zobrist ^ table.player_keys[self.player]
+            if self.perfect_recall:
+                h ^= table.history_hash(self.action_history)
+            object.__setattr__(self, "_zobrist", h)
+        return self._zobrist
+
+    def is_valid_action(self, action: int) -> bool:
+        return self.bitboard.is_valid_action(action)
+
+    def get_random_action(self, rng: np.random.Generator = None) -> int:
+        return self.bitboard.get_random_action(rng)
+
+    def after_action(self, action: int,
+                     player_stone: int) -> typing.Union["InfoState", bool]:
+        """
+        The info state after the action. The stone placed belongs to
+        player_stone; the player's own stone for a successful move or the
+        opponent's stone for a collision.
+
+        Args:
+            action (int): The action to play.
+            player_stone (int): The player the placed stone belongs to.
+        Returns:
+            InfoState: The new info state, False if the cell is not empty.
+        """
+        bitboard = self.bitboard.after_action(action, player_stone)
+        if bitboard is False:
+            return False
+        new = InfoState(self.player, bitboard, self.action_history + (action,),
+                        self.perfect_recall)
+        if self._zobrist is not None:
+            geometry = bitboard.geometry
+            table = get_zobrist_table(geometry.num_rows, geometry.num_cols)
+            h = self._zobrist ^ table.cell_keys[player_stone][action]
+            if self.perfect_recall:
+                h ^= table.history_keys[len(self.action_history)][action]
+            object.__setattr__(new, "_zobrist", h)
+        return new
+
+    def __str__(self) -> str:
+        if self._string is None:
+            object.__setattr__(
+                self, "_string",
+                format_info_state(self.player, self.bitboard.to_xo(),
+                                  self.action_history, self.perfect_recall))
+        return self._string
+
+    def __repr__(self) -> str:
+        return f"InfoState({str(self)!r})"
+
+    def __eq__(self, other: typing.Any) -> bool:
+        if isinstance(other, InfoState):
+            return (self.player == other.player and
+                    self.bitboard == other.bitboard and
+                    self.perfect_recall == other.perfect_recall and
+                    (not self.perfect_recall or
+                     self.action_history == other.action_history))
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return self.zobrist
@@ -3,7 +3,13 @@ Converts a given darkhex board strategy in the form
 of a dictionry (information_state: [actions]) with its
 isomorphic equivalent.
 """
+import re
+import typing
+
 from darkhex import cellState
+from darkhex import logger as log
+from darkhex.utils.geometry import get_geometry
+from darkhex.utils.info_state import split_info_state
 
 
 def convert_piece(given_piece):
@@ -44,3 +50,198 @@ def isomorphic_board(board):
         iso_index = len(board) - 1 - i
         new_board[iso_index] = convert_piece(board[i])
     return "".join(new_board)
+
+
+# Canonical forms under the 180 degree rotation. The rotation maps cell i to
+# cell num_cells - 1 - i and keeps the colours, so a black north group becomes
+# a black south group and a white west group becomes a white east group. Of an
+# info state and its rotation, the smaller string is the canonical one.
+
+_ROTATED_PIECES = str.maketrans({
+    cellState.kBlackNorth: cellState.kBlackSouth,
+    cellState.kBlackSouth: cellState.kBlackNorth,
+    cellState.kWhiteWest: cellState.kWhiteEast,
+    cellState.kWhiteEast: cellState.kWhiteWest,
+})
+_HISTORY_ACTION = re.compile(r"(\d),(\d+)")
+
+
+def rotate_action(action: int, num_cells: int) -> int:
+    return num_cells - 1 - action
+
+
+def rotate_board(board: str) -> str:
+    """
+    Rotates the board by 180 degrees.
+
+    Args:
+        board (str): The board. [:, :]
+    Returns:
+        str: The rotated board, in the same format.
+    """
+    return board[::-1].translate(_ROTATED_PIECES)
+
+
+def rotate_info_state(info_state: str, num_rows: int, num_cols: int) -> str:
+    """
+    Rotates the info state by 180 degrees. The actions in a perfect recall
+    history are rotated as well.
+
+    Args:
+        info_state (str): The info state.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        str: The rotated info state, in the same format.
+    """
+    geometry = get_geometry(num_rows, num_cols)
+    _, board, _ = split_info_state(info_state, geometry)
+    history = _HISTORY_ACTION.sub(
+        lambda m:
+        f"{m.group(1)},{rotate_action(int(m.group(2)), geometry.num_cells)}",
+        info_state[3 + len(board):])
+    return info_state[:3] + rotate_board(board) + history
+
+
+def canonical_board(board: str) -> typing.Tuple[str, bool]:
+    """
+    Returns the canonical form of the board.
+
+    Args:
+        board (str): The board. [:, :]
+    Returns:
+        str: The canonical board.
+        bool: True if the canonical board is the rotation of the given board.
+    """
+    rotated = rotate_board(board)
+    if rotated < board:
+        return rotated, True
+    return board, False
+
+
+def canonical_info_state(info_state: str, num_rows: int,
+                         num_cols: int) -> typing.Tuple[str, bool]:
+    """
+    Returns the canonical form of the info state.
+
+    Args:
+        info_state (str): The info state.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        str: The canonical info state.
+        bool: True if the canonical info state is the rotation of the given one.
+    """
+    rotated = rotate_info_state(info_state, num_rows, num_cols)
+    if rotated < info_state:
+        return rotated, True
+    return info_state, False
+
+
+def rotate_action_probs(action_probs, num_cells: int):
+    """
+    Rotates the actions of an action probability dictionary or list of
+    (action, probability) tuples.
+    """
+    if isinstance(action_probs, dict):
+        return {
+            rotate_action(a, num_cells): p for a, p in action_probs.items()
+        }
+    return [(rotate_action(a, num_cells), p) for a, p in action_probs]
+
+
+def _same_action_probs(action_probs_1, action_probs_2) -> bool:
+    action_probs_1 = dict(action_probs_1)
+    action_probs_2 = dict(action_probs_2)
+    return action_probs_1.keys() == action_probs_2.keys() and all(
+        abs(p - action_probs_2[a]) < 1e-9 for a, p in action_probs_1.items())
+
+
+def canonicalize_policy(policy: typing.Dict[str, typing.Any], num_rows: int,
+                        num_cols: int) -> typing.Dict[str, typing.Any]:
+    """
+    Re-keys a tabular policy with canonical info states, rotating the actions
+    of the states that are rotated. Where the policy does not agree with its
+    rotation, the non-canonical info state is kept under its own key so no
+    information is lost; canonical_action_probs checks the exact key first.
+
+    Args:
+        policy (typing.Dict[str, typing.Any]): Info state to action
+            probabilities, either as a dictionary or a list of tuples.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        typing.Dict[str, typing.Any]: The canonical policy.
+    """
+    num_cells = num_rows * num_cols
+    canonical = {}
+    rotated_states = []
+    for info_state, action_probs in policy.items():
+        key, rotated = canonical_info_state(info_state, num_rows, num_cols)
+        if rotated:
+            rotated_states.append((info_state, key))
+        else:
+            canonical[info_state] = action_probs
+    for info_state, key in rotated_states:
+        action_probs = rotate_action_probs(policy[info_state], num_cells)
+        if key not in canonical:
+            canonical[key] = action_probs
+        elif not _same_action_probs(canonical[key], action_probs):
+            log.debug("Policy is not symmetric at %s", info_state)
+            canonical[info_state] = policy[info_state]
+    return canonical
+
+
+def canonical_action_probs(policy: typing.Dict[str, typing.Any],
+                           info_state: str, num_rows: int, num_cols: int):
+    """
+    Looks up an info state in a policy made by canonicalize_policy.
+
+    Args:
+        policy (typing.Dict[str, typing.Any]): The canonical policy.
+        info_state (str): The info state, canonical or not.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        The action probabilities for the info state.
+    """
+    action_probs = policy.get(info_state)
+    if action_probs is not None:
+        return action_probs
+    key, rotated = canonical_info_state(info_state, num_rows, num_cols)
+    action_probs = policy[key]
+    if rotated:
+        return rotate_action_probs(action_probs, num_rows * num_cols)
+    return action_probs
+
+
+def canonicalize_state_table(states: typing.Dict[str, typing.Any],
+                             num_rows: int,
+                             num_cols: int) -> typing.Dict[str, typing.Any]:
+    """
+    Keeps only the canonical keys of a state table, i.e. all_states (info
+    state keys) or pone_states (board keys). The set of reachable states is
+    closed under the rotation, so every canonical key keeps its own value.
+    Use canonical_board / canonical_info_state to look up the table; a
+    rotated lookup gets the value of the rotated state.
+
+    Args:
+        states (typing.Dict[str, typing.Any]): The state table.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        typing.Dict[str, typing.Any]: The table with canonical keys only.
+    """
+    canonical = {}
+    for key, value in states.items():
+        if key.startswith("P"):
+            canonical_key, rotated = canonical_info_state(
+                key, num_rows, num_cols)
+        else:
+            canonical_key, rotated = canonical_board(key)
+        if not rotated:
+            canonical[key] = value
+        elif canonical_key not in states:
+            # rotation missing from the table, keep it under the canonical key
+            canonical.setdefault(canonical_key, value)
+    return canonical
@@ -0,0 +1,107 @@
+"""
+Distances between two tabular policies of the same board and player. The
+info states of the policies are aligned once, then total variation, KL
+divergence and maximum deviation are computed for all the shared states at
+once on the compiled probability matrices.
+"""
+import typing
+import numpy as np
+
+import darkhex.utils.util as util
+from darkhex.utils.isomorphic import canonical_info_state
+
+
+def _compiled(policy):
+    """ CompiledTabularPolicy of a tabular policy. """
+    return policy if hasattr(policy, "matrix") else policy.freeze()
+
+
+def _resolve(
+    policy, info_states: typing.Sequence[str]
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rows of the info states in a compiled policy, whether they are stored
+    rotated and whether they are in the policy at all.
+    """
+    rows = np.zeros(len(info_states), dtype=np.int64)
+    rotated = np.zeros(len(info_states), dtype=bool)
+    found = np.zeros(len(info_states), dtype=bool)
+    for i, info_state in enumerate(info_states):
+        row = policy.index.get(info_state)
+        if row is None and policy.is_canonical:
+            key, rotated[i] = canonical_info_state(info_state, policy.num_rows,
+                                                   policy.num_cols)
+            row = policy.index.get(key)
+        if row is not None:
+            rows[i] = row
+            found[i] = True
+    return rows, rotated, found
+
+
+def _probabilities(policy, rows: np.ndarray,
+                   rotated: np.ndarray) -> np.ndarray:
+    probs = policy.matrix[rows].astype(np.float64)
+    probs[rotated] = probs[rotated, ::-1]
+    return probs
+
+
+def compare_policies(policy_a, policy_b, epsilon: float = 1e-9) -> util.dotdict:
+    """
+    Compares two tabular policies over the info states they share.
+
+    Args:
+        policy_a: The first policy, a TabularPolicy or CompiledTabularPolicy.
+        policy_b: The second policy, a TabularPolicy or CompiledTabularPolicy.
+        epsilon (float): Floor for the probabilities of policy_b in the KL
+            divergence, so actions policy_b never takes give a finite value.
+    Returns:
+        util.dotdict: The comparison;
+            - info_states: the shared info states,
+            - total_variation, kl, max_deviation: per state arrays aligned
+              with info_states, kl is KL(policy_a || policy_b),
+            - mean_total_variation, max_total_variation, mean_kl, max_kl,
+              max_deviation_overall: the aggregates over the shared states,
+            - missing_in_a, missing_in_b: the info states only the other
+              policy has.
+    """
+    a = _compiled(policy_a)
+    b = _compiled(policy_b)
+    if tuple(a.board_size) != tuple(b.board_size):
+        raise ValueError(
+            f"Board sizes differ: {a.board_size} and {b.board_size}")
+    if getattr(a, "player", None) != getattr(b, "player", None):
+        raise ValueError(
+            f"Players differ: {getattr(a, 'player', None)} and "
+            f"{getattr(b, 'player', None)}")
+
+    info_states = list(a.index) + [k for k in b.index if k not in a.index]
+    rows_a, rotated_a, found_a = _resolve(a, info_states)
+    rows_b, rotated_b, found_b = _resolve(b, info_states)
+    shared = found_a & found_b
+
+    p = _probabilities(a, rows_a[shared], rotated_a[shared])
+    q = _probabilities(b, rows_b[shared], rotated_b[shared])
+    deviation = np.abs(p - q)
+    total_variation = 0.5 * deviation.sum(axis=1)
+    max_deviation = deviation.max(axis=1) if len(p) else np.zeros(0)
+    positive = p > 0
+    log_ratio = np.log(np.where(positive, p, 1.0)) - np.log(
+        np.maximum(q, epsilon))
+    kl = np.where(positive, p * log_ratio, 0.0).sum(axis=1)
+
+    def aggregate(values, reduce):
+        return float(reduce(values)) if len(values) else 0.0
+
+    return util.dotdict(
+        info_states=[s for s, keep in zip(info_states, shared) if keep],
+        total_variation=total_variation,
+        kl=kl,
+        max_deviation=max_deviation,
+        mean_total_variation=aggregate(total_variation, np.mean),
+        max_total_variation=aggregate(total_variation, np.max),
+        mean_kl=aggregate(kl, np.mean),
+        max_kl=aggregate(kl, np.max),
+        max_deviation_overall=aggregate(max_deviation, np.max),
+        missing_in_a=[s for s, keep in zip(info_states, ~found_a) if keep],
+        missing_in_b=[s for s, keep in zip(info_states, ~found_b) if keep],
+    )
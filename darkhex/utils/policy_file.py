@@ -0,0 +1,272 @@
+"""
+Columnar binary policy files. A policy is stored as
+
+    magic | header length | JSON header | keys | offsets | actions | probs
+
+where keys are the sorted InfoStateCodec keys as fixed width big-endian bytes,
+offsets are int64 CSR offsets into the action/probability columns, actions
+are int16 and probabilities float32. Every column is 8 byte aligned so it can
+be read straight from a numpy.memmap; looking up an info state is a binary
+search over the keys and nothing is deserialized up front.
+"""
+import os
+import json
+import typing
+import numpy as np
+
+import darkhex.utils.util as util
+from darkhex import cellState
+from darkhex import logger as log
+from darkhex.utils.fingerprint import policy_fingerprint
+from darkhex.utils.info_state import InfoStateCodec, split_info_state
+
+MAGIC = b"DHXPOL01"
+VERSION = 1
+_ALIGN = 8
+_CONNECTION_PIECES = set(cellState.black_pieces + cellState.white_pieces) - {
+    cellState.kBlack, cellState.kWhite
+}
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_policy_file(policy: typing.Dict[str, typing.Any],
+                      path: str,
+                      board_size: typing.Tuple[int, int],
+                      initial_state: typing.Any = None,
+                      player: int = None,
+                      is_perfect_recall: bool = False,
+                      is_canonical: bool = False,
+                      fingerprint: str = None) -> None:
+    """
+    Writes a tabular policy to a binary policy file.
+
+    Args:
+        policy (typing.Dict[str, typing.Any]): Info state to action
+            probabilities, either as a dictionary or a list of tuples.
+        path (str): The file path to write to.
+        board_size (typing.Tuple[int, int]): The board size.
+        initial_state: The initial state. Stored as a string.
+        player (int): The player the policy belongs to, if any.
+        is_perfect_recall (bool): Whether the policy is perfect recall.
+        is_canonical (bool): Whether the policy keys are canonical.
+        fingerprint (str): The policy fingerprint, computed if not given.
+    """
+    num_rows, num_cols = board_size
+    codec = InfoStateCodec(num_rows, num_cols, is_perfect_recall)
+    entries = sorted(
+        ((codec.to_bytes(codec.encode(k)), k, v) for k, v in policy.items()),
+        key=lambda item: item[0])
+    for (key, info_state, _), (next_key, next_info_state, _) in zip(
+            entries, entries[1:]):
+        if key == next_key:
+            raise ValueError(
+                f"Info states {info_state!r} and {next_info_state!r} have "
+                f"the same key")
+    entries = [(key, v) for key, _, v in entries]
+    keys = b"".join(key for key, _ in entries)
+    lengths = [len(v) for _, v in entries]
+    offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    actions = np.empty(offsets[-1], dtype=np.int16)
+    probs = np.empty(offsets[-1], dtype=np.float32)
+    for i, (_, action_probs) in enumerate(entries):
+        items = action_probs.items() if isinstance(action_probs,
+                                                   dict) else action_probs
+        for j, (action, prob) in enumerate(items):
+            actions[offsets[i] + j] = action
+            probs[offsets[i] + j] = prob
+
+    sample_key = next(iter(policy), "")
+    header = {
+        "version": VERSION,
+        "board_size": [num_rows, num_cols],
+        "initial_state":
+            initial_state if initial_state is None or
+            isinstance(initial_state, str) else str(initial_state),
+        "player": player,
+        "is_perfect_recall": is_perfect_recall,
+        "is_canonical": is_canonical,
+        # key and value formats, so the pkl policy can be rebuilt as it was
+        "flat_keys": sample_key[2:3] == " ",
+        "connection_keys": any(
+            c in _CONNECTION_PIECES for k in policy for c in k[3:]),
+        "list_values": not isinstance(next(iter(policy.values()), {}), dict),
+        "num_states": len(entries),
+        "fingerprint": fingerprint or policy_fingerprint(policy),
+        "key_bytes": codec.num_bytes,
+    }
+    # section offsets depend on the header length, which depends on them
+    header_len = 0
+    while True:
+        start = _aligned(len(MAGIC) + 8 + header_len)
+        header["keys_offset"] = start
+        header["offsets_offset"] = _aligned(start + len(keys))
+        header["actions_offset"] = header["offsets_offset"] + offsets.nbytes
+        header["probs_offset"] = _aligned(header["actions_offset"] +
+                                          actions.nbytes)
+        encoded = json.dumps(header).encode()
+        if len(encoded) == header_len:
+            break
+        header_len = len(encoded)
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(header_len.to_bytes(8, "little"))
+        f.write(encoded)
+        for offset, data in [(header["keys_offset"], keys),
+                             (header["offsets_offset"], offsets.tobytes()),
+                             (header["actions_offset"], actions.tobytes()),
+                             (header["probs_offset"], probs.tobytes())]:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    log.info("Saved binary policy to path: %s", path)
+
+
+class PolicyFile:
+    """
+    Read-only view of a binary policy file. The columns are memory-mapped,
+    so opening a file only reads its header.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): The binary policy file path.
+        """
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._data[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Not a binary policy file: {path}")
+        header_len = int.from_bytes(
+            bytes(self._data[len(MAGIC):len(MAGIC) + 8]), "little")
+        start = len(MAGIC) + 8
+        self.header = json.loads(bytes(self._data[start:start + header_len]))
+        if self.header["version"] != VERSION:
+            raise ValueError(
+                f"Unsupported policy file version: {self.header['version']}")
+        self.num_rows, self.num_cols = self.header["board_size"]
+        self.num_states = self.header["num_states"]
+        self.codec = InfoStateCodec(self.num_rows, self.num_cols,
+                                    self.header["is_perfect_recall"])
+        key_bytes = self.header["key_bytes"]
+        self.keys = np.frombuffer(self._data,
+                                  dtype=f"S{key_bytes}",
+                                  count=self.num_states,
+                                  offset=self.header["keys_offset"])
+        self.offsets = np.frombuffer(self._data,
+                                     dtype=np.int64,
+                                     count=self.num_states + 1,
+                                     offset=self.header["offsets_offset"])
+        num_entries = int(self.offsets[-1])
+        self.actions = np.frombuffer(self._data,
+                                     dtype=np.int16,
+                                     count=num_entries,
+                                     offset=self.header["actions_offset"])
+        self.probs = np.frombuffer(self._data,
+                                   dtype=np.float32,
+                                   count=num_entries,
+                                   offset=self.header["probs_offset"])
+
+    def __len__(self) -> int:
+        return self.num_states
+
+    def index(self, info_state: str) -> int:
+        """ Row of the info state, -1 if it is not in the policy. """
+        key = np.array(self.codec.to_bytes(self.codec.encode(info_state)),
+                       dtype=self.keys.dtype)
+        i = int(np.searchsorted(self.keys, key))
+        if i < self.num_states and self.keys[i] == key:
+            return i
+        return -1
+
+    def __contains__(self, info_state: str) -> bool:
+        return self.index(info_state) != -1
+
+    def row(self, i: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """ The actions and probabilities of the i'th info state. """
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.actions[start:end], self.probs[start:end]
+
+    def action_probabilities(self, info_state: str) -> typing.Dict[int, float]:
+        """
+        The action probabilities of the info state.
+
+        Args:
+            info_state (str): The info state.
+        Returns:
+            typing.Dict[int, float]: The action probabilities.
+        """
+        i = self.index(info_state)
+        if i == -1:
+            raise KeyError(info_state)
+        actions, probs = self.row(i)
+        return dict(zip(actions.tolist(), probs.tolist()))
+
+    def info_state(self, i: int) -> str:
+        """ The info state string of the i'th row, in the original format. """
+        key = self.codec.from_bytes(bytes(self.keys[i]).ljust(
+            self.keys.dtype.itemsize, b"\0"))
+        info_state = self.codec.decode(key)
+        if self.header["connection_keys"] or self.header["flat_keys"]:
+            player, board, history = split_info_state(info_state,
+                                                      self.codec.geometry)
+            if self.header["connection_keys"]:
+                board = util.convert_xo_to_board(board)
+            if self.header["flat_keys"]:
+                board = board.replace("\n", "")
+                return f"P{player} {board}"
+            info_state = f"P{player}\n{board}" + info_state[3 + len(board):]
+        return info_state
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """ The whole policy as a dictionary, as it was written. """
+        policy = {}
+        for i in range(self.num_states):
+            actions, probs = self.row(i)
+            items = list(zip(actions.tolist(), probs.tolist()))
+            policy[self.info_state(i)] = items if self.header[
+                "list_values"] else dict(items)
+        return policy
+
+
+def convert_pkl_to_binary(pkl_path: str, binary_path: str) -> None:
+    """
+    Converts a saved .pkl policy to a binary policy file.
+
+    Args:
+        pkl_path (str): The .pkl policy file.
+        binary_path (str): The binary policy file to write.
+    """
+    data = util.load_file(pkl_path)
+    write_policy_file(data.policy, binary_path, data.board_size,
+                      data.initial_state, data.player, data.is_perfect_recall,
+                      bool(data.is_canonical), data.fingerprint)
+
+
+def convert_binary_to_pkl(binary_path: str, pkl_path: str) -> None:
+    """
+    Converts a binary policy file to a .pkl policy. Probabilities are the
+    stored float32 values.
+
+    Args:
+        binary_path (str): The binary policy file.
+        pkl_path (str): The .pkl policy file to write.
+    """
+    policy_file = PolicyFile(binary_path)
+    header = policy_file.header
+    policy = policy_file.to_dict()
+    data = util.dotdict(policy=policy,
+                        initial_state=header["initial_state"],
+                        board_size=tuple(header["board_size"]),
+                        player=header["player"],
+                        is_perfect_recall=header["is_perfect_recall"],
+                        is_best_response=False,
+                        is_canonical=header["is_canonical"],
+                        fingerprint=policy_fingerprint(policy))
+    util.save_file(data, pkl_path)
@@ -0,0 +1,204 @@
+"""
+SQLite policy store. Info states are rows of (actions, probabilities) in an
+indexed table, so a policy can be written incrementally while it is generated
+and read by several processes at once without each of them loading a private
+copy. The database runs in WAL mode: readers do not block the writer and see
+every committed batch.
+"""
+import json
+import sqlite3
+import typing
+import collections.abc
+
+import numpy as np
+
+from darkhex import logger as log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS policy (
+    info_state TEXT PRIMARY KEY,
+    actions BLOB NOT NULL,
+    probs BLOB NOT NULL,
+    is_list INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+METADATA_FIELDS = ("board_size", "initial_state", "player", "is_perfect_recall",
+                   "is_canonical")
+
+
+def _encode_action_probs(
+        action_probs: typing.Any) -> typing.Tuple[bytes, bytes, int]:
+    """ Row values of an action probability dictionary or tuple list. """
+    is_list = not isinstance(action_probs, dict)
+    items = action_probs if is_list else action_probs.items()
+    actions, probs = zip(*items) if items else ((), ())
+    return (np.asarray(actions, dtype=np.int16).tobytes(),
+            np.asarray(probs, dtype=np.float64).tobytes(), int(is_list))
+
+
+def _decode_action_probs(actions: bytes, probs: bytes,
+                         is_list: int) -> typing.Any:
+    pairs = zip(
+        np.frombuffer(actions, dtype=np.int16).tolist(),
+        np.frombuffer(probs, dtype=np.float64).tolist())
+    return list(pairs) if is_list else dict(pairs)
+
+
+class SqlitePolicyStore(collections.abc.MutableMapping):
+    """
+    Policy table in a SQLite database. Reads and writes like a dictionary of
+    info state to action probabilities, so a Policy can be backed by a store.
+    Writes are buffered and inserted in batches, one transaction per batch;
+    lookups see the buffered writes as well. Deletes are written immediately.
+
+    Every process should open its own store. Pickled stores reconnect on
+    first use, so a store can be handed to worker processes.
+    """
+
+    def __init__(self,
+                 path: str,
+                 batch_size: int = 1000,
+                 timeout: float = 30.0) -> None:
+        """
+        Args:
+            path (str): The database file, created if it does not exist.
+            batch_size (int): Number of buffered writes that triggers a flush.
+            timeout (float): Seconds to wait for a lock held by another
+                process.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._connection = None
+        self._pending = {}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            with self._connection:
+                self._connection.executescript(SCHEMA)
+        return self._connection
+
+    @property
+    def metadata(self) -> typing.Dict[str, typing.Any]:
+        """ The policy metadata, i.e. board size and player. """
+        rows = self.connection.execute("SELECT key, value FROM metadata")
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_metadata(self, **metadata) -> None:
+        """
+        Sets metadata fields, i.e. set_metadata(board_size=(4, 3), player=1).
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in metadata.items()])
+
+    def put(self, info_state: str, action_probs: typing.Any) -> None:
+        """
+        Buffers the action probabilities of an info state. The buffer is
+        written once it reaches the batch size.
+
+        Args:
+            info_state (str): The info state.
+            action_probs: An action probability dictionary or a list of
+                (action, probability) tuples.
+        """
+        self._pending[info_state] = action_probs
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def update(self, policy: typing.Dict[str, typing.Any]) -> None:
+        """ Writes all the info states of a policy dictionary. """
+        for info_state, action_probs in policy.items():
+            self.put(info_state, action_probs)
+        self.flush()
+
+    def delete(self, info_state: str) -> None:
+        """ Removes an info state, written immediately. """
+        self._pending.pop(info_state, None)
+        with self.connection:
+            self.connection.execute("DELETE FROM policy WHERE info_state = ?",
+                                    (info_state,))
+
+    def flush(self) -> None:
+        """ Writes the buffered info states in a single transaction. """
+        if not self._pending:
+            return
+        rows = [(info_state, *_encode_action_probs(action_probs))
+                for info_state, action_probs in self._pending.items()]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO policy VALUES (?, ?, ?, ?)", rows)
+        log.debug("Wrote %d info states to %s", len(rows), self.path)
+        self._pending = {}
+
+    def close(self) -> None:
+        """ Flushes the buffer and closes the connection. """
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> "SqlitePolicyStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __getitem__(self, info_state: str) -> typing.Any:
+        if info_state in self._pending:
+            return self._pending[info_state]
+        row = self.connection.execute(
+            "SELECT actions, probs, is_list FROM policy WHERE info_state = ?",
+            (info_state,)).fetchone()
+        if row is None:
+            raise KeyError(info_state)
+        return _decode_action_probs(*row)
+
+    def __setitem__(self, info_state: str, action_probs: typing.Any) -> None:
+        self.put(info_state, action_probs)
+
+    def __delitem__(self, info_state: str) -> None:
+        if info_state not in self:
+            raise KeyError(info_state)
+        self.delete(info_state)
+
+    def __contains__(self, info_state: typing.Any) -> bool:
+        if info_state in self._pending:
+            return True
+        return self.connection.execute(
+            "SELECT 1 FROM policy WHERE info_state = ?",
+            (info_state,)).fetchone() is not None
+
+    def __iter__(self) -> typing.Iterator[str]:
+        self.flush()
+        for (info_state,) in self.connection.execute(
+                "SELECT info_state FROM policy ORDER BY info_state"):
+            yield info_state
+
+    def items(self) -> typing.Iterator[typing.Tuple[str, typing.Any]]:
+        """ All the info states and action probabilities in one query. """
+        self.flush()
+        for info_state, *row in self.connection.execute(
+                "SELECT info_state, actions, probs, is_list FROM policy "
+                "ORDER BY info_state"):
+            yield info_state, _decode_action_probs(*row)
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM policy").fetchone()[0]
+
+    def __getstate__(self) -> dict:
+        self.flush()
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        return state
@@ -0,0 +1,212 @@
+"""
+Quantized policy storage. Action probabilities are packed into a single bytes
+buffer instead of per-state dictionaries of floats:
+
+    - deterministic states (a single action) take one byte, the action,
+    - states whose probabilities are small fractions, i.e. SimPly+ policies,
+      keep them exactly as a common uint16 denominator and uint16 numerators,
+    - other states are rounded to uint16 fixed point (1 / 65535 steps), with
+      the largest probability adjusted so the state sums to one.
+
+Actions are stored as single bytes, so boards can have at most 256 cells.
+"""
+import math
+import struct
+import typing
+import collections
+import collections.abc
+from fractions import Fraction
+
+import numpy as np
+
+import darkhex.utils.util as util
+from darkhex import logger as log
+
+FIXED_POINT_SCALE = 65535
+KIND_FIXED = 0
+KIND_FRACTION = 1
+# tolerance for a probability to be considered equal to a fraction
+FRACTION_TOLERANCE = 1e-9
+
+
+def _as_items(
+        action_probs: typing.Any) -> typing.List[typing.Tuple[int, float]]:
+    if isinstance(action_probs, dict):
+        return list(action_probs.items())
+    return list(action_probs)
+
+
+def _fraction_numerators(
+        probs: typing.Sequence[float],
+        max_denominator: int) -> typing.Optional[typing.Tuple[int, list]]:
+    """
+    The common denominator and the numerators of the probabilities, None if
+    they are not all fractions with at most max_denominator summing to one.
+    """
+    fractions = []
+    for prob in probs:
+        frac = Fraction(prob).limit_denominator(max_denominator)
+        if abs(frac - prob) > FRACTION_TOLERANCE:
+            return None
+        fractions.append(frac)
+    if sum(fractions) != 1:
+        return None
+    denominator = 1
+    for frac in fractions:
+        denominator = denominator * frac.denominator // math.gcd(
+            denominator, frac.denominator)
+    if denominator > FIXED_POINT_SCALE:
+        return None
+    return denominator, [
+        frac.numerator * (denominator // frac.denominator) for frac in fractions
+    ]
+
+
+def _fixed_point(probs: typing.Sequence[float]) -> typing.List[int]:
+    """ uint16 fixed point probabilities summing to the scaled total. """
+    quantized = [int(prob * FIXED_POINT_SCALE + 0.5) for prob in probs]
+    target = min(int(sum(probs) * FIXED_POINT_SCALE + 0.5), FIXED_POINT_SCALE)
+    largest = int(np.argmax(probs))
+    quantized[largest] = max(quantized[largest] + target - sum(quantized), 0)
+    return quantized
+
+
+class QuantizedPolicyTable(collections.abc.Mapping):
+    """
+    Read-only dictionary view of a quantized policy. The info states index
+    rows of the payload; the row of an info state is decoded on lookup. Use
+    quantize_policy to create one.
+    """
+
+    def __init__(self, index: typing.Dict[str, int], offsets: np.ndarray,
+                 payload: bytes, list_values: bool) -> None:
+        """
+        Args:
+            index (typing.Dict[str, int]): Info state to row.
+            offsets (np.ndarray): Start of every row in the payload, plus the
+                end of the payload.
+            payload (bytes): The encoded rows.
+            list_values (bool): Whether the action probabilities are returned
+                as (action, probability) lists instead of dictionaries.
+        """
+        self.index = index
+        self.offsets = offsets
+        self.payload = payload
+        self.list_values = list_values
+
+    @property
+    def nbytes(self) -> int:
+        """ Size of the encoded probabilities, without the info states. """
+        return len(self.payload) + self.offsets.nbytes
+
+    def _decode(self, row: int) -> typing.List[typing.Tuple[int, float]]:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        if end - start == 1:
+            return [(self.payload[start], 1.0)]
+        kind = self.payload[start]
+        if kind == KIND_FRACTION:
+            (denominator,) = struct.unpack_from("<H", self.payload, start + 1)
+            start += 3
+            scale = denominator
+        else:
+            start += 1
+            scale = FIXED_POINT_SCALE
+        n = (end - start) // 3
+        actions = self.payload[start:start + n]
+        numerators = struct.unpack_from(f"<{n}H", self.payload, start + n)
+        return [(action, numerator / scale)
+                for action, numerator in zip(actions, numerators)]
+
+    def __getitem__(self, info_state: str) -> typing.Any:
+        items = self._decode(self.index[info_state])
+        return items if self.list_values else dict(items)
+
+    def __contains__(self, info_state: typing.Any) -> bool:
+        return info_state in self.index
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+def quantize_policy(
+        policy: typing.Dict[str, typing.Any],
+        max_denominator: int = 0
+) -> typing.Tuple[QuantizedPolicyTable, util.dotdict]:
+    """
+    Quantizes a tabular policy.
+
+    Args:
+        policy (typing.Dict[str, typing.Any]): Info state to action
+            probabilities, as dictionaries or (action, probability) lists.
+        max_denominator (int): Largest denominator of the fractions kept
+            exactly, i.e. the SimPly+ frac_limit. 0 to always use fixed point.
+    Returns:
+        QuantizedPolicyTable: The quantized policy.
+        util.dotdict: The conversion report; number of states of each kind,
+            maximum and mean absolute probability error and sizes in bytes.
+    """
+    list_values = not all(isinstance(v, dict) for v in policy.values())
+    index = {}
+    offsets = [0]
+    payload = bytearray()
+    counts = collections.Counter()
+    max_error = 0.0
+    total_error = 0.0
+    num_entries = 0
+    for row, (info_state, action_probs) in enumerate(policy.items()):
+        items = _as_items(action_probs)
+        if not items:
+            raise ValueError(f"No actions for the info state: {info_state}")
+        actions = [int(action) for action, _ in items]
+        probs = [float(prob) for _, prob in items]
+        if max(actions) > 255 or min(actions) < 0:
+            raise ValueError(
+                f"Actions must fit in a byte to be quantized: {info_state}")
+        if len(items) == 1:
+            payload.append(actions[0])
+            decoded = [1.0]
+            counts["deterministic"] += 1
+        else:
+            fraction = _fraction_numerators(
+                probs, max_denominator) if max_denominator > 0 else None
+            if fraction is not None:
+                denominator, numerators = fraction
+                payload.append(KIND_FRACTION)
+                payload += struct.pack("<H", denominator)
+                scale = denominator
+                counts["fraction"] += 1
+            else:
+                numerators = _fixed_point(probs)
+                payload.append(KIND_FIXED)
+                scale = FIXED_POINT_SCALE
+                counts["fixed"] += 1
+            payload += bytes(actions)
+            payload += struct.pack(f"<{len(numerators)}H", *numerators)
+            decoded = [numerator / scale for numerator in numerators]
+        for prob, new_prob in zip(probs, decoded):
+            error = abs(prob - new_prob)
+            max_error = max(max_error, error)
+            total_error += error
+        num_entries += len(probs)
+        index[info_state] = row
+        offsets.append(len(payload))
+    table = QuantizedPolicyTable(index, np.array(offsets, dtype=np.uint32),
+                                 bytes(payload), list_values)
+    report = util.dotdict(
+        num_states=len(index),
+        num_deterministic=counts["deterministic"],
+        num_fraction=counts["fraction"],
+        num_fixed=counts["fixed"],
+        max_error=max_error,
+        mean_error=total_error / num_entries if num_entries else 0.0,
+        nbytes=table.nbytes,
+    )
+    log.info(
+        "Quantized %d states (%d deterministic, %d fraction, %d fixed point) "
+        "into %d bytes, max error %.3g, mean error %.3g", report.num_states,
+        report.num_deterministic, report.num_fraction, report.num_fixed,
+        report.nbytes, report.max_error, report.mean_error)
+    return table, report
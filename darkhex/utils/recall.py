@@ -0,0 +1,203 @@
+"""
+Conversions between perfect recall (PR) and imperfect recall (IR) single
+player policies.
+
+A PR info state is the board the player has seen plus its own action history,
+so its parent is the same state without the last action and the cell that
+action revealed. This gives the reach probability of every PR state (the
+product of the player's own action probabilities along the history) in one
+forward pass over the states by history length. Projecting to IR averages the
+PR distributions that share an IR state (the same board) weighted by their
+reach; expanding to PR gives every reachable PR state the distribution of its
+IR state.
+
+Policies keyed by canonical info states must be expanded first, see
+TabularPolicy.canonicalize.
+"""
+import typing
+import numpy as np
+
+import darkhex.utils.util as util
+from darkhex.utils.bitboard import Bitboard
+from darkhex.utils.info_state import InfoStateCodec
+
+
+def _items(
+        action_probs: typing.Any) -> typing.Iterable[typing.Tuple[int, float]]:
+    return action_probs.items() if isinstance(action_probs,
+                                              dict) else action_probs
+
+
+def _pr_parts(
+    pr_policy: typing.Dict[str, typing.Any], codec: InfoStateCodec
+) -> typing.List[typing.List[typing.Tuple[str, int, int, int, list]]]:
+    """ Decoded PR info states, bucketed by history length. """
+    buckets = [[] for _ in range(codec.geometry.num_cells + 1)]
+    for info_state in pr_policy:
+        player, black, white, history = codec.decode_parts(
+            codec.encode(info_state))
+        buckets[len(history)].append(
+            (info_state, player, black, white, history))
+    return buckets
+
+
+def own_reach_probabilities(pr_policy: typing.Dict[str, typing.Any],
+                            num_rows: int,
+                            num_cols: int) -> typing.Dict[str, float]:
+    """
+    Reach probability of every PR info state under the policy's own actions.
+    States whose parent is not in the policy (i.e. the initial state) are
+    reached with probability 1.
+
+    Args:
+        pr_policy (typing.Dict[str, typing.Any]): PR info state to action
+            probabilities.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        typing.Dict[str, float]: The reach probability of every info state.
+    """
+    codec = InfoStateCodec(num_rows, num_cols, perfect_recall=True)
+    return _own_reach(pr_policy, _pr_parts(pr_policy, codec), codec)
+
+
+def _own_reach(pr_policy: typing.Dict[str, typing.Any], buckets: list,
+               codec: InfoStateCodec) -> typing.Dict[str, float]:
+    reach = {}  # codec key -> reach
+    probs = {}  # codec key -> action probabilities
+    result = {}
+    for bucket in buckets:
+        for info_state, player, black, white, history in bucket:
+            key = codec.encode_parts(player, black, white, history)
+            value = 1.0
+            if history:
+                action = history[-1]
+                cleared = ~(1 << action)
+                parent = codec.encode_parts(player, black & cleared,
+                                            white & cleared, history[:-1])
+                if parent in reach:
+                    value = reach[parent] * probs[parent].get(action, 0.0)
+            reach[key] = value
+            probs[key] = dict(_items(pr_policy[info_state]))
+            result[info_state] = value
+    return result
+
+
+def _imperfect_recall_key(player: int, black: int, white: int,
+                          codec: InfoStateCodec) -> str:
+    board = Bitboard.from_masks(codec.geometry, black, white).to_xo()
+    return util.get_info_state_from_board(board, player)
+
+
+def project_to_imperfect_recall(
+        pr_policy: typing.Dict[str, typing.Any], num_rows: int,
+        num_cols: int) -> typing.Dict[str, typing.Any]:
+    """
+    Projects a PR policy onto IR info states. The distribution of an IR state
+    is the reach weighted average of the distributions of its PR states, or
+    their plain average if none of them is reachable.
+
+    Args:
+        pr_policy (typing.Dict[str, typing.Any]): PR info state to action
+            probabilities.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        typing.Dict[str, typing.Any]: IR info state to action probabilities,
+            in the value format of the PR policy. Actions of any of the PR
+            states are kept, even with zero probability.
+    """
+    codec = InfoStateCodec(num_rows, num_cols, perfect_recall=True)
+    buckets = _pr_parts(pr_policy, codec)
+    reach = _own_reach(pr_policy, buckets, codec)
+    list_values = not all(isinstance(v, dict) for v in pr_policy.values())
+    ir_rows = {}
+    rows, actions, probs, weights = [], [], [], []
+    for bucket in buckets:
+        for info_state, player, black, white, _ in bucket:
+            ir_state = _imperfect_recall_key(player, black, white, codec)
+            row = ir_rows.setdefault(ir_state, len(ir_rows))
+            for action, prob in _items(pr_policy[info_state]):
+                rows.append(row)
+                actions.append(action)
+                probs.append(prob)
+                weights.append(reach[info_state])
+    num_cells = codec.geometry.num_cells
+    rows = np.array(rows, dtype=np.int64)
+    actions = np.array(actions, dtype=np.int64)
+    probs = np.array(probs, dtype=np.float64)
+    weights = np.array(weights, dtype=np.float64)
+    weighted = np.zeros((len(ir_rows), num_cells))
+    uniform = np.zeros((len(ir_rows), num_cells))
+    present = np.zeros((len(ir_rows), num_cells), dtype=bool)
+    np.add.at(weighted, (rows, actions), weights * probs)
+    np.add.at(uniform, (rows, actions), probs)
+    present[rows, actions] = True
+    totals = weighted.sum(axis=1, keepdims=True)
+    projected = np.where(
+        totals > 0, weighted / np.where(totals > 0, totals, 1.0),
+        uniform / np.maximum(uniform.sum(axis=1, keepdims=True), 1e-300))
+    ir_policy = {}
+    for ir_state, row in ir_rows.items():
+        items = [(int(a), float(projected[row, a]))
+                 for a in np.flatnonzero(present[row])]
+        ir_policy[ir_state] = items if list_values else dict(items)
+    return ir_policy
+
+
+def expand_to_perfect_recall(ir_policy: typing.Dict[str, typing.Any],
+                             initial_state: str, num_rows: int,
+                             num_cols: int) -> typing.Dict[str, typing.Any]:
+    """
+    Expands an IR policy to the PR states it reaches from the initial state;
+    every PR state gets the distribution of its IR state. Each action with a
+    positive probability leads to the state where the stone is placed and,
+    if the opponent may have a stone there, the state where it is revealed.
+    States without an IR distribution are left out.
+
+    Args:
+        ir_policy (typing.Dict[str, typing.Any]): IR info state to action
+            probabilities.
+        initial_state (str): The initial PR info state.
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        typing.Dict[str, typing.Any]: PR info state to action probabilities.
+    """
+    pr_codec = InfoStateCodec(num_rows, num_cols, perfect_recall=True)
+    ir_codec = InfoStateCodec(num_rows, num_cols)
+    ir_index = {ir_codec.encode(k): v for k, v in ir_policy.items()}
+    player, black, white, history = pr_codec.decode_parts(
+        pr_codec.encode(initial_state))
+    own_bits, opponent_bits = ((black, white) if player == 0 else
+                               (white, black))
+    pr_policy = {}
+    stack = [(own_bits, opponent_bits, history)]
+    while stack:
+        own, opponent, history = stack.pop()
+        black, white = (own, opponent) if player == 0 else (opponent, own)
+        action_probs = ir_index.get(
+            ir_codec.encode_parts(player, black, white))
+        if action_probs is None:
+            continue
+        board = Bitboard.from_masks(pr_codec.geometry, black, white)
+        pr_policy[util.get_info_state_from_board(board.to_xo(), player,
+                                                 history, True)] = action_probs
+        collision_possible = board.is_collusion_possible(player)
+        for action, prob in _items(action_probs):
+            if prob <= 0:
+                continue
+            bit = 1 << action
+            children = [(own | bit, opponent)]
+            if collision_possible:
+                children.append((own, opponent | bit))
+            for child_own, child_opponent in children:
+                child_black, child_white = (
+                    (child_own, child_opponent) if player == 0 else
+                    (child_opponent, child_own))
+                child_board = Bitboard.from_masks(pr_codec.geometry,
+                                                  child_black, child_white)
+                if not child_board.is_terminal(player):
+                    stack.append(
+                        (child_own, child_opponent, history + [action]))
+    return pr_policy
@@ -0,0 +1,96 @@
+"""
+Walker alias tables for sampling actions from fixed distributions in constant
+time. A table is built once per info state (O(n)), after which every sample
+costs one uniform draw.
+"""
+import typing
+import numpy as np
+
+
+class AliasTable:
+    """
+    Alias table over a set of actions, built with Vose's method.
+    """
+    __slots__ = ("actions", "prob", "alias", "_actions_array", "_prob_array",
+                 "_alias_array")
+
+    def __init__(self, actions: typing.Sequence[int],
+                 probs: typing.Sequence[float]) -> None:
+        """
+        Args:
+            actions (typing.Sequence[int]): The actions.
+            probs (typing.Sequence[float]): The probabilities of the actions.
+                They are normalized, so they only need to be non-negative.
+        """
+        n = len(actions)
+        if n == 0:
+            raise ValueError("Alias table needs at least one action")
+        probs = np.asarray(probs, dtype=np.float64)
+        total = probs.sum()
+        if total <= 0:
+            raise ValueError(f"Probabilities must have a positive sum: {probs}")
+        scaled = probs * (n / total)
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = float(scaled[s])
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # the rest are 1 up to rounding errors
+        self.actions = [int(a) for a in actions]
+        self.prob = prob
+        self.alias = [self.actions[i] for i in alias]
+        self._actions_array = None
+
+    def sample(self, rng: np.random.Generator) -> int:
+        """
+        Samples an action with a single uniform draw.
+
+        Args:
+            rng (np.random.Generator): The random generator to use.
+        Returns:
+            int: The sampled action.
+        """
+        x = rng.random() * len(self.actions)
+        i = int(x)
+        if x - i < self.prob[i]:
+            return self.actions[i]
+        return self.alias[i]
+
+    def sample_many(self, size: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Samples many actions at once.
+
+        Args:
+            size (int): The number of samples.
+            rng (np.random.Generator): The random generator to use.
+        Returns:
+            np.ndarray: The sampled actions.
+        """
+        if self._actions_array is None:
+            self._actions_array = np.array(self.actions, dtype=np.int64)
+            self._prob_array = np.array(self.prob)
+            self._alias_array = np.array(self.alias, dtype=np.int64)
+        x = rng.random(size) * len(self.actions)
+        i = x.astype(np.int64)
+        return np.where(x - i < self._prob_array[i], self._actions_array[i],
+                        self._alias_array[i])
+
+    @classmethod
+    def from_action_probs(cls, action_probs) -> "AliasTable":
+        """
+        Builds a table from an action probability dictionary or a list of
+        (action, probability) tuples.
+        """
+        if isinstance(action_probs, dict):
+            action_probs = action_probs.items()
+        actions, probs = zip(*action_probs)
+        return cls(actions, probs)
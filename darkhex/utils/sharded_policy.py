@@ -0,0 +1,185 @@
+"""
+Sharded policy directories. A large tabular policy is split into shards by a
+hash of the info state, each shard a small dill file, plus a manifest.json
+with the policy metadata. ShardedPolicyTable reads such a directory like a
+dictionary, loading shards on demand and keeping the recently used ones
+resident within a memory budget.
+"""
+import os
+import json
+import hashlib
+import typing
+import collections
+import collections.abc
+
+import darkhex.utils.util as util
+from darkhex import logger as log
+from darkhex.utils.fingerprint import policy_fingerprint
+from darkhex.utils.info_state import InfoStateCodec
+
+MANIFEST_FILE = "manifest.json"
+# Version 1 directories shard by the compact key modulo the shard count.
+MANIFEST_VERSION = 2
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# Loaded dictionaries take several times the size of their dill files.
+_MEMORY_PER_FILE_BYTE = 8
+
+
+def _shard_file(shard: int) -> str:
+    return f"shard_{shard:04d}.pkl"
+
+
+def shard_of(codec: InfoStateCodec,
+             info_state: str,
+             num_shards: int,
+             version: int = MANIFEST_VERSION) -> int:
+    """
+    Shard of an info state. Hashes the compact key of the info state, so the
+    shard does not depend on the board notation. The low bits of the key are
+    the player and the first cells, which leave most shards empty when taken
+    as is.
+
+    Args:
+        codec (InfoStateCodec): The codec of the policy.
+        info_state (str): The info state.
+        num_shards (int): The number of shards.
+        version (int): The manifest version of the directory.
+    Returns:
+        int: The shard.
+    """
+    key = codec.encode(info_state)
+    if version < 2:
+        return key % num_shards
+    digest = hashlib.blake2b(codec.to_bytes(key), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % num_shards
+
+
+def write_sharded_policy(policy: typing.Dict[str, typing.Any],
+                         directory: str,
+                         board_size: typing.Tuple[int, int],
+                         initial_state: typing.Any = None,
+                         player: int = None,
+                         is_perfect_recall: bool = False,
+                         is_canonical: bool = False,
+                         num_shards: int = 16,
+                         fingerprint: str = None) -> None:
+    """
+    Writes a tabular policy as a sharded policy directory.
+
+    Args:
+        policy (typing.Dict[str, typing.Any]): Info state to action
+            probabilities.
+        directory (str): The directory to write the shards to.
+        board_size (typing.Tuple[int, int]): The board size.
+        initial_state: The initial state.
+        player (int): The player the policy belongs to, if any.
+        is_perfect_recall (bool): Whether the policy is perfect recall.
+        is_canonical (bool): Whether the policy keys are canonical.
+        num_shards (int): The number of shards.
+        fingerprint (str): The policy fingerprint, computed if not given.
+    """
+    codec = InfoStateCodec(board_size[0], board_size[1], is_perfect_recall)
+    shards = [{} for _ in range(num_shards)]
+    for info_state, action_probs in policy.items():
+        shards[shard_of(codec, info_state,
+                        num_shards)][info_state] = action_probs
+    shard_sizes = []
+    for shard, shard_policy in enumerate(shards):
+        path = os.path.join(directory, _shard_file(shard))
+        util.save_file(shard_policy, path)
+        shard_sizes.append(os.path.getsize(path))
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "num_shards": num_shards,
+        "num_states": len(policy),
+        "fingerprint": fingerprint or policy_fingerprint(policy),
+        "shard_states": [len(s) for s in shards],
+        "shard_sizes": shard_sizes,
+        "board_size": list(board_size),
+        "initial_state": initial_state if initial_state is None or
+                         isinstance(initial_state, str) else str(initial_state),
+        "player": player,
+        "is_perfect_recall": is_perfect_recall,
+        "is_canonical": is_canonical,
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=1)
+    log.info("Saved sharded policy to path: %s", directory)
+
+
+def is_sharded_policy(directory: str) -> bool:
+    return os.path.isfile(os.path.join(directory, MANIFEST_FILE))
+
+
+class ShardedPolicyTable(collections.abc.Mapping):
+    """
+    Read-only dictionary view of a sharded policy directory. Shards are
+    loaded when one of their info states is looked up. The least recently
+    used shards are dropped once the estimated size of the resident shards
+    passes the memory budget; the last used shard always stays.
+    """
+
+    def __init__(self, directory: str, memory_budget: int = None) -> None:
+        """
+        Args:
+            directory (str): The sharded policy directory.
+            memory_budget (int): Memory budget in bytes for the resident
+                shards. DEFAULT_MEMORY_BUDGET if not given.
+        """
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.memory_budget = memory_budget if memory_budget is not None \
+            else DEFAULT_MEMORY_BUDGET
+        self.num_shards = self.manifest["num_shards"]
+        self.version = self.manifest.get("version", 1)
+        num_rows, num_cols = self.manifest["board_size"]
+        self.codec = InfoStateCodec(num_rows, num_cols,
+                                    self.manifest["is_perfect_recall"])
+        self._resident = collections.OrderedDict()
+        self._resident_memory = 0
+
+    def _shard_memory(self, shard: int) -> int:
+        return self.manifest["shard_sizes"][shard] * _MEMORY_PER_FILE_BYTE
+
+    def shard(self, shard: int) -> typing.Dict[str, typing.Any]:
+        """ The policy dictionary of a shard, loaded if not resident. """
+        shard_policy = self._resident.get(shard)
+        if shard_policy is not None:
+            self._resident.move_to_end(shard)
+            return shard_policy
+        shard_policy = util.load_file(
+            os.path.join(self.directory, _shard_file(shard)))
+        self._resident[shard] = shard_policy
+        self._resident_memory += self._shard_memory(shard)
+        while len(self._resident) > 1 and \
+                self._resident_memory > self.memory_budget:
+            evicted, _ = self._resident.popitem(last=False)
+            self._resident_memory -= self._shard_memory(evicted)
+        return shard_policy
+
+    @property
+    def resident_shards(self) -> typing.List[int]:
+        return list(self._resident)
+
+    def __getitem__(self, info_state: str) -> typing.Any:
+        return self.shard(
+            shard_of(self.codec, info_state, self.num_shards,
+                     self.version))[info_state]
+
+    def __contains__(self, info_state: typing.Any) -> bool:
+        return info_state in self.shard(
+            shard_of(self.codec, info_state, self.num_shards, self.version))
+
+    def __iter__(self) -> typing.Iterator[str]:
+        for shard in range(self.num_shards):
+            yield from list(self.shard(shard))
+
+    def __len__(self) -> int:
+        return self.manifest["num_states"]
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_resident"] = collections.OrderedDict()
+        state["_resident_memory"] = 0
+        return state
@@ -1,5 +1,6 @@
 import os
 import typing
+import functools
 from copy import deepcopy
 from collections import Counter
 import dill
@@ -8,6 +9,10 @@ import numpy as np
 from darkhex import cellState
 import darkhex.check as CHECK
 from darkhex import logger as log
+from darkhex.utils.bitboard import Bitboard
+from darkhex.utils.connectivity import HexConnectivity
+from darkhex.utils.geometry import get_geometry
+from darkhex.utils.info_state import InfoState
 
 
 class dotdict(dict):
@@ -72,52 +77,51 @@ def neighbour_indexes(cell: int, num_cols: int,
     Returns:
         list: The neighbours of the given cell. each element in the form of 
         [row_index, column_index].
+
+    Hot loops should use get_geometry(num_rows, num_cols).neighbours directly,
+    which skips the index checks and the list copy.
     """
     row = cell // num_cols
     col = cell % num_cols
     CHECK.ROW_INDEX(row, num_rows)
     CHECK.COLUMN_INDEX(col, num_cols)
+    return list(get_geometry(num_rows, num_cols).neighbours[cell])
+
 
-    positions = []
-    if col + 1 < num_cols:
-        positions.append(position_from_coordinates(num_cols, row, col + 1))
-    if col - 1 >= 0:
-        positions.append(position_from_coordinates(num_cols, row, col - 1))
-    if row + 1 < num_rows:
-        positions.append(position_from_coordinates(num_cols, row + 1, col))
-        if col - 1 >= 0:
-            positions.append(
-                position_from_coordinates(num_cols, row + 1, col - 1))
-    if row - 1 >= 0:
-        positions.append(position_from_coordinates(num_cols, row - 1, col))
-        if col + 1 < num_cols:
-            positions.append(
-                position_from_coordinates(num_cols, row - 1, col + 1))
-    return positions
-
-
-def board_after_action(board: str, action: int, player: int) -> str:
-    """
-    Update the board state with the new action.
+def board_after_action(
+    board: typing.Union[str, Bitboard, HexConnectivity],
+    action: int,
+    player: int,
+    num_rows: int = None,
+    num_cols: int = None
+) -> typing.Union[str, Bitboard, HexConnectivity]:
+    """
+    Update the board state with the new action. Bitboard and HexConnectivity
+    boards are updated with a single stone placement, string boards are
+    converted again with convert_xo_to_board.
     
     Args:
-        board (str): The current board state to update the action on. [layered, xo]
+        board (str, Bitboard or HexConnectivity): The current board state to update the action on. [layered, xo]
         action (int): The action to play.
         player (int): The player to play the action. Based on the player the stone
         to be placed will change.
-        num_rows (int): The number of rows in the board.
-        num_cols (int): The number of columns in the board.
+        num_rows (int): The number of rows in the board. (optional)
+        num_cols (int): The number of columns in the board. (optional)
     Returns:
-        str: The new board state.
+        str: The new board state. Same type as the given board.
     """
+    if isinstance(board, (Bitboard, HexConnectivity)):
+        return board.after_action(action, player)
     stone = cellState.kBlack if player == 0 else cellState.kWhite
-    num_cols = board.find("\n")
+    if num_cols is None:
+        num_cols = board.find("\n")
     board_flat = layered_board_to_flat(board)
+    if num_rows is None:
+        num_rows = len(board_flat) // num_cols
     if board_flat[action] != cellState.kEmpty:
         return False
     board_flat = board_flat[:action] + stone + board_flat[action + 1:]
-    board_layered = flat_board_to_layered(board_flat, num_cols)
-    log.debug(board_layered)
+    board_layered = get_geometry(num_rows, num_cols).layered(board_flat)
     return convert_xo_to_board(board_layered)
 
 
@@ -153,6 +157,7 @@ def save_file(content: typing.Any, file_path: str) -> None:
         dill.dump(content, f)
 
 
+@functools.lru_cache(maxsize=None)
 def convert_position_to_alphanumeric(position: int, num_cols: int) -> str:
     """
     Converts a position of the board to an alphanumeric representation. 
@@ -163,12 +168,16 @@ def convert_position_to_alphanumeric(position: int, num_cols: int) -> str:
         num_cols (int): The number of columns in the board.
     Returns:
         str: The alphanumeric representation of the position.
+
+    When the number of rows is known, get_geometry(...).labels is a
+    precomputed table of the same labels.
     """
     col = position % num_cols
     row = position // num_cols
     return "{}{}".format(chr(ord("a") + col), row + 1)
 
 
+@functools.lru_cache(maxsize=1024)
 def convert_alphanumeric_to_position(alpha_numeric: str, num_cols: int) -> int:
     """
     Converts the action in the form of alpha-numeric row column sequence to
@@ -218,7 +227,9 @@ def convert_xo_to_board(board_in_xo: str) -> str:
     Converts the board cells to location values as in cellState, from xo notation.
     i.e. North connected x will be converted to y.
     
-    Uses flood fill to be able to determine the connections.
+    Uses flood fill to be able to determine the connections. Code that
+    places stones one at a time should keep a Bitboard or a HexConnectivity
+    instead, see board_after_action.
 
     Args:
         board_in_xo (str): The board state to convert. [layered, xo]
@@ -226,66 +237,59 @@ def convert_xo_to_board(board_in_xo: str) -> str:
         str: The converted board state [layered, connection]
     """
     num_cols = board_in_xo.find("\n")
+    if num_cols == -1:
+        num_cols = len(board_in_xo)
     num_rows = board_in_xo.count("\n") + 1
+    geometry = get_geometry(num_rows, num_cols)
+    neighbours = geometry.neighbours
+    board_as_list = list(board_in_xo.replace("\n", ""))
 
-    def flood_fill(state: list, init_pos: int, num_rows: int,
-                   num_cols: int) -> list:
-        if state[init_pos] in cellState.black_pieces:
-            player = cellState.kBlack
-            opposite_type = cellState.kBlackSouth if state[
-                init_pos] == cellState.kBlackNorth else cellState.kBlackNorth
-        elif state[init_pos] in cellState.white_pieces:
-            player = cellState.kWhite
-            opposite_type = cellState.kWhiteEast if state[
-                init_pos] == cellState.kWhiteWest else cellState.kWhiteWest
+    def flood_fill(init_pos: int, player: str, opposite_type: str,
+                   win_type: str) -> None:
+        label = board_as_list[init_pos]
         flood_stack = [init_pos]
-        while len(flood_stack) > 0:
+        while flood_stack:
             latest_cell = flood_stack.pop()
-            for n in neighbour_indexes(latest_cell, num_cols, num_rows):
-                if state[n] == player:
-                    state[n] = state[latest_cell]
+            for n in neighbours[latest_cell]:
+                if board_as_list[n] == player:
+                    board_as_list[n] = label
                     flood_stack.append(n)
-                elif state[n] == opposite_type:
-                    state[
-                        n] = cellState.kBlackWin if player == cellState.kBlack else cellState.kWhiteWin
-        return state
-
-    # first row
-    board_as_list = list(layered_board_to_flat(board_in_xo))
-    log.debug(board_as_list)
-    for i in range(num_cols):
-        if board_as_list[i] in cellState.black_pieces:
-            board_as_list[i] = cellState.kBlackNorth
-            board_as_list = flood_fill(board_as_list, i, num_rows, num_cols)
-    # last row
-    for i in range(num_rows * num_cols - num_cols, num_rows * num_cols):
-        if board_as_list[i] in cellState.black_pieces:
-            board_as_list[i] = cellState.kBlackSouth
-            board_as_list = flood_fill(board_as_list, i, num_rows, num_cols)
-    # first column
-    for i in range(0, num_rows * num_cols, num_cols):
-        if board_as_list[i] in cellState.white_pieces:
-            board_as_list[i] = cellState.kWhiteWest
-            board_as_list = flood_fill(board_as_list, i, num_rows, num_cols)
-    # last column
-    for i in range(num_rows * num_cols - 1, -1, -num_cols):
-        if board_as_list[i] in cellState.white_pieces:
-            board_as_list[i] = cellState.kWhiteEast
-            board_as_list = flood_fill(board_as_list, i, num_rows, num_cols)
-    return flat_board_to_layered("".join(board_as_list), num_cols)
-
-
-def is_collusion_possible(board: str, player: int) -> bool:
+                elif board_as_list[n] == opposite_type:
+                    board_as_list[n] = win_type
+
+    black_pieces = cellState.black_pieces
+    white_pieces = cellState.white_pieces
+    for cells, pieces, start, opposite, player, win in (
+        (geometry.north_cells, black_pieces, cellState.kBlackNorth,
+         cellState.kBlackSouth, cellState.kBlack, cellState.kBlackWin),
+        (geometry.south_cells, black_pieces, cellState.kBlackSouth,
+         cellState.kBlackNorth, cellState.kBlack, cellState.kBlackWin),
+        (geometry.west_cells, white_pieces, cellState.kWhiteWest,
+         cellState.kWhiteEast, cellState.kWhite, cellState.kWhiteWin),
+        (geometry.east_cells[::-1], white_pieces, cellState.kWhiteEast,
+         cellState.kWhiteWest, cellState.kWhite, cellState.kWhiteWin),
+    ):
+        for i in cells:
+            if board_as_list[i] in pieces:
+                board_as_list[i] = start
+                flood_fill(i, player, opposite, win)
+    return geometry.layered("".join(board_as_list))
+
+
+def is_collusion_possible(board: typing.Union[str, Bitboard],
+                          player: int) -> bool:
     """
     Checks if a collusion is possible given the board state and player.
     
     Args:
-        board (str): The board state to check. [:, :]
+        board (str or Bitboard): The board state to check. [:, :]
         player (int): The player to check for collusion.
     Returns:
         bool: True if collusion is possible, False otherwise.
     """
     CHECK.PLAYER(player)
+    if isinstance(board, Bitboard):
+        return board.is_collusion_possible(player)
     count = Counter(board)
     if player == 1:
         player_pieces = sum(
@@ -300,19 +304,21 @@ def is_collusion_possible(board: str, player: int) -> bool:
     return opponent_pieces < player_pieces
 
 
-def is_board_terminal(board: str, player: int) -> bool:
+def is_board_terminal(board: typing.Union[str, Bitboard], player: int) -> bool:
     """
     Checks if the board is in a terminal state by looking at the number of
     pieces or if there is a connection. Works with player boards. Functions
     both with xo and connection boards.
 
     Args:
-        board (str): The board state to check / Can also be single item string
+        board (str or Bitboard): The board state to check / Can also be single item string
         in the case of updated_board returns [:, connection]
         player (int): The player to check for collusion.
     Returns:
         bool: True if the board state is a terminal state, False otherwise.
     """
+    if isinstance(board, Bitboard):
+        return board.is_terminal(player)
     if (board.count(cellState.kBlackWin) + board.count(cellState.kWhiteWin) >
             0):
         return True
@@ -337,7 +343,7 @@ def is_board_terminal(board: str, player: int) -> bool:
     return False
 
 
-def get_board_from_info_state(info_state: str,
+def get_board_from_info_state(info_state: typing.Union[str, InfoState],
                               perfect_recall: bool = False) -> str:
     """
     Gets the board state from the info state. The info state can be either in the
@@ -345,11 +351,13 @@ def get_board_from_info_state(info_state: str,
     in xo format.
     
     Args:
-        info_state (str): The info state to get the board state from.
+        info_state (str or InfoState): The info state to get the board state from.
         perfect_recall (bool): If true, the perfect recall is used.
     Returns:
         str: The board state. [layered, xo]
     """
+    if isinstance(info_state, InfoState):
+        return info_state.board
     split_items = info_state.split("\n")
     if perfect_recall:
         if split_items[-1] == "":
@@ -370,7 +378,7 @@ def get_imperfect_recall_state(player: int, board: str) -> str:
         str: The imperfect recall state.
     """
     CHECK.PLAYER(player)
-    board_state = convert_board_to_xo(board)
+    board = convert_board_to_xo(board)
     return "P{}\n{}".format(player, board)
 
 
@@ -487,31 +495,37 @@ def get_all_states(board_size: typing.Tuple[int, int]) -> dict:
         f"{util.PathVars.all_states}{board_size[0]}x{board_size[1]}.pkl")
 
 
-def is_valid_action(board: str, action: int) -> bool:
+def is_valid_action(board: typing.Union[str, Bitboard], action: int) -> bool:
     """
     Checks if the action is valid for the board.
     
     Args:
-        board (str): The board to check the action on. [:, :]
+        board (str or Bitboard): The board to check the action on. [:, :]
         action (int): The action to check.
     Returns:
         bool: True if the action is valid, False otherwise.
     """
+    if isinstance(board, Bitboard):
+        return board.is_valid_action(action)
     if board.find('\n') != -1:
         board = layered_board_to_flat(board)
     return action >= 0 and action < len(
         board) and board[action] == cellState.kEmpty
 
 
-def get_random_action(board: str) -> int:
+def get_random_action(board: typing.Union[str, Bitboard],
+                      rng: np.random.Generator = None) -> int:
     """
     Returns a random action for the board.
     
     Args:
-        board (str): The board to get the random action from. [:, :]
+        board (str or Bitboard): The board to get the random action from. [:, :]
+        rng (np.random.Generator): The random generator to use. (optional)
     Returns:
         int: The random action. Returns -1 if no action is valid.
     """
+    if isinstance(board, Bitboard):
+        return board.get_random_action(rng)
     if board.find('\n') != -1:
         board = layered_board_to_flat(board)
     legal_actions = [
@@ -519,26 +533,31 @@ def get_random_action(board: str) -> int:
     ]
     if len(legal_actions) == 0:
         return -1
+    if rng is not None:
+        return legal_actions[rng.integers(len(legal_actions))]
     return np.random.choice(legal_actions)
 
 
-def info_state_after_action(info_state: str,
+def info_state_after_action(info_state: typing.Union[str, InfoState],
                             action: int,
                             player_stone: int,
-                            is_perfect_recall: bool = False) -> str:
+                            is_perfect_recall: bool = False
+                           ) -> typing.Union[str, InfoState]:
     """
     Update the info_state with the new action.
     
     Args:
-        info_state (str): The current info_state. 
+        info_state (str or InfoState): The current info_state. 
         action (int): The action to play.
         player (int): The player to play the action. Based on the player the stone
         to be placed will change.
         is_perfect_recall (bool): If true, the action will be played on the 
         perfect recall info_state.
     Returns:
-        str: The new board state.
+        str: The new board state. An InfoState if an InfoState is given.
     """
+    if isinstance(info_state, InfoState):
+        return info_state.after_action(action, player_stone)
     board = get_board_from_info_state(info_state, is_perfect_recall)
     state_player = get_player_from_info_state(info_state)
     board = board_after_action(board, action, player_stone)
@@ -549,87 +568,104 @@ def info_state_after_action(info_state: str,
                                      is_perfect_recall)
 
 
-def get_random_action_for_info_state(info_state: str) -> int:
+def get_random_action_for_info_state(info_state: typing.Union[str, InfoState],
+                                     rng: np.random.Generator = None) -> int:
     """
     Returns a random action for the info_state.
     
     Args:
-        info_state (str): The info_state to get the random action from.
+        info_state (str or InfoState): The info_state to get the random action from.
+        rng (np.random.Generator): The random generator to use. (optional)
     Returns:
         int: The random action. Returns -1 if no action is valid.
     """
+    if isinstance(info_state, InfoState):
+        return info_state.get_random_action(rng)
     board = get_board_from_info_state(info_state)
-    return get_random_action(board)
+    return get_random_action(board, rng)
 
 
-def is_valid_action_from_info_state(info_state: str, action: int) -> bool:
+def is_valid_action_from_info_state(info_state: typing.Union[str, InfoState],
+                                    action: int) -> bool:
     """
     Checks if the action is valid for the info_state.
     
     Args:
-        info_state (str): The info_state to check the action on.
+        info_state (str or InfoState): The info_state to check the action on.
         action (int): The action to check.
     Returns:
         bool: True if the action is valid, False otherwise.
     """
+    if isinstance(info_state, InfoState):
+        return info_state.is_valid_action(action)
     board = get_board_from_info_state(info_state)
     return is_valid_action(board, action)
 
 
-def is_collusion_possible_info_state(info_state: str) -> bool:
+def is_collusion_possible_info_state(
+        info_state: typing.Union[str, InfoState]) -> bool:
     """
     Checks if collusion is possible for the info_state.
     
     Args:
-        info_state (str): The info_state to check collusion on.
+        info_state (str or InfoState): The info_state to check collusion on.
     Returns:
         bool: True if collusion is possible, False otherwise.
     """
+    if isinstance(info_state, InfoState):
+        return info_state.is_collusion_possible
     board = get_board_from_info_state(info_state)
     player = get_player_from_info_state(info_state)
     return is_collusion_possible(board, player)
 
 
-def get_action_history(info_state: str) -> typing.List[int]:
+def get_action_history(
+        info_state: typing.Union[str, InfoState]) -> typing.List[int]:
     """
     Returns the action history for the info_state. Only works for
     perfect recall info_states.
     
     Args:
-        info_state (str): The info_state to get the action history from.
+        info_state (str or InfoState): The info_state to get the action history from.
     Returns:
         typing.List[int]: The action history.
     """
+    if isinstance(info_state, InfoState):
+        return list(info_state.action_history)
     # 0,1 0,2 0,3 -> [1, 2, 3]
     player_action_pairs = info_state.split('\n')[-1]
     if not player_action_pairs:
         return []
     action_pairs = player_action_pairs.split(' ')[:-1]
-    log.debug(action_pairs)
     return [int(action_pair.split(',')[1]) for action_pair in action_pairs]
 
 
-def get_player_from_info_state(info_state: str) -> int:
+def get_player_from_info_state(info_state: typing.Union[str, InfoState]) -> int:
     """
     Returns the player from the info_state.
     
     Args:
-        info_state (str): The info_state to get the player from.
+        info_state (str or InfoState): The info_state to get the player from.
     Returns:
         int: The player.
     """
+    if isinstance(info_state, InfoState):
+        return info_state.player
     return int(info_state[1])
 
 
-def is_info_state_terminal(info_state: str, perfect_recall = False) -> bool:
+def is_info_state_terminal(info_state: typing.Union[str, InfoState],
+                           perfect_recall = False) -> bool:
     """
     Checks if the info_state is terminal.
     
     Args:
-        info_state (str): The info_state to check.
+        info_state (str or InfoState): The info_state to check.
     Returns:
         bool: True if the info_state is terminal, False otherwise.
     """
+    if isinstance(info_state, InfoState):
+        return info_state.is_terminal
     board = get_board_from_info_state(info_state, perfect_recall)
     player = get_player_from_info_state(info_state)
     board = convert_xo_to_board(board)
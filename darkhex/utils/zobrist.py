@@ -0,0 +1,138 @@
+"""
+Zobrist hashing for boards and info states. Every (cell, colour) pair, both
+players and every (history position, action) pair for perfect recall get a
+random 64 bit key, and a hash is the XOR of the keys of its parts. Placing a
+stone updates a hash with a single XOR.
+"""
+import os
+import random
+import functools
+import typing
+
+from darkhex import logger as log
+
+HASH_BITS = 64
+
+
+class ZobristTable:
+    """
+    Random keys for a board size. Keys are generated from a fixed seed so
+    hashes are the same across runs and processes.
+    """
+
+    def __init__(self, num_rows: int, num_cols: int) -> None:
+        """
+        Args:
+            num_rows (int): The number of rows in the board.
+            num_cols (int): The number of columns in the board.
+        """
+        rng = random.Random(f"darkhex-zobrist-{num_rows}x{num_cols}")
+        num_cells = num_rows * num_cols
+        self.num_cells = num_cells
+        self.cell_keys = tuple(
+            tuple(rng.getrandbits(HASH_BITS) for _ in range(num_cells))
+            for _ in range(2))
+        self.player_keys = tuple(rng.getrandbits(HASH_BITS) for _ in range(2))
+        self.history_keys = tuple(
+            tuple(rng.getrandbits(HASH_BITS) for _ in range(num_cells))
+            for _ in range(num_cells))
+
+    def _mask_hash(self, mask: int, keys: typing.Tuple[int, ...]) -> int:
+        h = 0
+        while mask:
+            low = mask & -mask
+            h ^= keys[low.bit_length() - 1]
+            mask ^= low
+        return h
+
+    def board_hash(self, black: int, white: int) -> int:
+        """ Hash of a board given as stone masks. """
+        return self._mask_hash(black, self.cell_keys[0]) ^ self._mask_hash(
+            white, self.cell_keys[1])
+
+    def history_hash(self, action_history: typing.Sequence[int]) -> int:
+        h = 0
+        for position, action in enumerate(action_history):
+            h ^= self.history_keys[position][action]
+        return h
+
+
+@functools.lru_cache(maxsize=None)
+def get_zobrist_table(num_rows: int, num_cols: int) -> ZobristTable:
+    """
+    Returns the shared Zobrist table for the board size.
+
+    Args:
+        num_rows (int): The number of rows in the board.
+        num_cols (int): The number of columns in the board.
+    Returns:
+        ZobristTable: The table.
+    """
+    return ZobristTable(num_rows, num_cols)
+
+
+def zobrist_hash(key: typing.Any) -> int:
+    """
+    Zobrist hash of a Bitboard, an InfoState or a tuple of them. Tuple
+    elements are rotated by their position so (a, b) and (b, a) differ. An
+    int is taken as an already computed (i.e. incrementally updated) hash.
+    """
+    if isinstance(key, int):
+        return key
+    if isinstance(key, tuple):
+        h = 0
+        for i, item in enumerate(key):
+            item_hash = zobrist_hash(item)
+            shift = (7 * i) % HASH_BITS
+            h ^= ((item_hash << shift) |
+                  (item_hash >> (HASH_BITS - shift))) & ((1 << HASH_BITS) - 1)
+        return h
+    return key.zobrist
+
+
+class TranspositionTable:
+    """
+    Dictionary keyed by Zobrist hashes of Bitboards, InfoStates, hashes or
+    tuples of them. Only the 64 bit hash is stored. In debug mode the full key is kept as
+    well and a hash collision raises a ValueError. Debug mode can be turned on
+    with the DARKHEX_ZOBRIST_DEBUG environment variable.
+    """
+
+    def __init__(self, debug: bool = None) -> None:
+        """
+        Args:
+            debug (bool): If true, full keys are stored to detect collisions.
+        """
+        if debug is None:
+            debug = os.environ.get("DARKHEX_ZOBRIST_DEBUG", "0") not in ("",
+                                                                          "0")
+        self.debug = debug
+        self._values = {}
+        self._keys = {}
+
+    def _hash(self, key: typing.Any) -> int:
+        h = zobrist_hash(key)
+        if self.debug:
+            stored = self._keys.get(h)
+            if stored is not None and stored != key:
+                log.error(f"Zobrist collision: {stored} and {key}")
+                raise ValueError(f"Zobrist collision: {stored} and {key}")
+        return h
+
+    def __contains__(self, key: typing.Any) -> bool:
+        return self._hash(key) in self._values
+
+    def __getitem__(self, key: typing.Any) -> typing.Any:
+        return self._values[self._hash(key)]
+
+    def get(self, key: typing.Any, default: typing.Any = None) -> typing.Any:
+        return self._values.get(self._hash(key), default)
+
+    def __setitem__(self, key: typing.Any, value: typing.Any) -> None:
+        h = self._hash(key)
+        self._values[h] = value
+        if self.debug:
+            self._keys[h] = key
+
+    def __len__(self) -> int:
+        return len(self._values)